@@ -0,0 +1,114 @@
+# /benchmarks/import_time.py
+#
+# Startup time report. Every entry module is imported in a fresh interpreter with -X importtime, and the modules it
+# loads are reported by cumulative import cost. Entry points that must stay free of graphics dependencies are checked
+# for PyOpenGL, and every entry point is checked against an import time budget.
+#
+# Usage:
+#   python -m benchmarks.import_time
+#   python -m benchmarks.import_time --modules src.models.world --top 30 --budget 250
+#
+# Exits with status 1 when a module goes over the budget or loads a forbidden module, so it can gate a CI job.
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+# Modules tools and headless workers import, none of them may load PyOpenGL
+CORE_MODULES = (
+    'src.models.settings',
+    'src.models.world',
+    'src.entities.player',
+    'src.renderer',
+    'src.renderer.batch_raycaster',
+    'src.renderer.software_renderer',
+    'src.renderer.frame_capture',
+    'src.controllers.game_controller',
+    'src.controllers.headless_runtime',
+    'src.controllers.batch_environment',
+)
+FORBIDDEN_PREFIXES = ('OpenGL',)
+
+DEFAULT_BUDGET_MS = 500  # Cumulative import time allowed per entry module
+DEFAULT_TOP = 15
+RUNS = 3  # Imports per module, the fastest run is reported to filter out disk cache and scheduling noise
+
+ImportEntry = namedtuple('ImportEntry', ['module', 'self_us', 'cumulative_us', 'depth'])
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """Import a module in a new interpreter, returns the list of ImportEntry of every module it loaded."""
+    environment = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_ROOT,
+                               env=environment, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+
+    return parse_importtime(completed.stderr)
+
+
+def parse_importtime(output):
+    # Lines look like "import time:       self [us] |  cumulative | imported package", nesting is shown by indent
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append(ImportEntry(name.strip(), int(self_us), int(cumulative_us), depth))
+
+    return entries
+
+
+def total_time(entries, module):
+    """Cumulative import time of a module in microseconds, 0 if it was already loaded by the interpreter."""
+    for entry in entries:
+        if entry.module == module:
+            return entry.cumulative_us
+    return 0
+
+
+def report(module, entries, top, log=print):
+    total = total_time(entries, module)
+    log(f"\n{module}: {total / 1000:.1f} ms, {len(entries)} modules")
+    for entry in sorted(entries, key=lambda entry: entry.cumulative_us, reverse=True)[1:top + 1]:
+        log(f"  {entry.cumulative_us / 1000:9.1f} ms  {entry.self_us / 1000:9.1f} ms self  {entry.module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-module import time report and startup budget check')
+    parser.add_argument('--modules', nargs='+', default=CORE_MODULES, help='Entry modules to import')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Most expensive imports listed per module')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Import time in milliseconds allowed per module, 0 for no limit')
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        entries = min((measure(module) for _ in range(RUNS)), key=lambda run: total_time(run, module))
+        report(module, entries, args.top)
+
+        forbidden = sorted({entry.module for entry in entries if entry.module.startswith(FORBIDDEN_PREFIXES)})
+        if forbidden and module in CORE_MODULES:
+            failures.append(f"{module} loads {', '.join(forbidden[:5])}")
+
+        total_ms = total_time(entries, module) / 1000
+        if 0 < args.budget < total_ms:
+            failures.append(f"{module} takes {total_ms:.1f} ms to import, the budget is {args.budget:.0f} ms")
+
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print("\nEvery module is within the import budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# /benchmarks/parallel_scaling.py
+#
+# Frame time of the parallel raycaster from 1 to N worker processes, compared to the serial SoftwareRenderer.
+# Every parallel frame is checked against the serial one, the output must be identical.
+#
+# Usage: python -m benchmarks.parallel_scaling [--columns 960] [--max-workers N] [--map-size 256] [--frames 60]
+
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.scenarios import generate_world, camera_path
+from src.renderer.parallel_raycaster import ParallelRaycaster
+from src.renderer.software_renderer import SoftwareRenderer
+
+
+def time_frames(render, poses):
+    start = time.perf_counter()
+    for pose in poses:
+        render(*pose)
+    return (time.perf_counter() - start) / len(poses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame time of the parallel raycaster per worker count')
+    parser.add_argument('--columns', type=int, default=960)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--map-size', type=int, default=256)
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--height', type=int, default=400)
+    args = parser.parse_args()
+
+    world = generate_world(args.map_size)
+    poses = camera_path(world, args.frames)
+
+    player = SimpleNamespace(FOV=60, angle=0.0, x=0.0, y=0.0)
+    serial = SoftwareRenderer(SimpleNamespace(player=player, world=world), height=args.height, column_width=1,
+                              num_columns=args.columns)
+
+    def render_serial(angle, x, y):
+        player.angle, player.x, player.y = angle, x, y
+        return serial.render()
+
+    serial_time = time_frames(render_serial, poses)
+    print(f"{args.columns} columns, {args.map_size}x{args.map_size} map, {args.frames} frames")
+    print(f"{'workers':>8} {'ms/frame':>10} {'speedup':>8}")
+    print(f"{'serial':>8} {serial_time * 1000:10.2f} {1.0:8.2f}")
+
+    for workers in range(1, args.max_workers + 1):
+        with ParallelRaycaster(world, args.columns, 60, workers=workers, height=args.height,
+                               column_width=1) as parallel:
+            # Warm up the workers and check the output against the serial renderer
+            for pose in poses[:5]:
+                _, frame = parallel.render(*pose)
+                if not np.array_equal(frame, render_serial(*pose)):
+                    raise AssertionError(f"The output with {workers} workers differs from the serial renderer")
+
+            parallel_time = time_frames(parallel.render, poses)
+
+        print(f"{workers:>8} {parallel_time * 1000:10.2f} {serial_time / parallel_time:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+# /benchmarks/run_benchmarks.py
+#
+# Headless benchmark suite. Scripted camera paths are played over generated maps at several column counts, and every
+# frame of every backend is timed per stage. Results are written as JSON and can be compared to a stored baseline.
+#
+# Usage:
+#   python -m benchmarks.run_benchmarks --output results.json
+#   python -m benchmarks.run_benchmarks --output current.json --baseline results.json
+#
+# The comparison exits with status 1 when a benchmark got slower than the threshold, so it can gate a CI job.
+
+import argparse
+import datetime
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.scenarios import generate_world, camera_path, populate_entities
+from src.controllers.game_controller import GameController
+from src.renderer.batch_raycaster import raycast_columns
+from src.renderer.occupancy_pyramid import OccupancyPyramid
+from src.renderer.ray_cache import RayCache
+from src.renderer.raycaster import raycaster_2d, view_distance
+from src.renderer.software_renderer import SoftwareRenderer
+
+RESULTS_SCHEMA = 1
+
+DEFAULT_MAP_SIZES = (8, 64, 512, 4096)
+DEFAULT_COLUMNS = (60, 320, 960)
+DEFAULT_FRAMES = 60
+SPRITE_DENSITY = 0.05  # Sprite entities per tile of the sprites benchmark
+MAX_SPRITES = 5000
+WARMUP_FRAMES = 3
+ALLOCATION_FRAMES = 10  # Frames replayed under tracemalloc, which is too slow to trace the timed frames
+FOV = 60
+
+# Relative change of the median frame time reported as a regression or an improvement
+REGRESSION_THRESHOLD = 0.10
+
+
+class StageTimer:
+    def __init__(self):
+        """Collects the duration of named stages, one sample per stage and frame."""
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+
+# Every benchmark builds its state for a world and a column count, and returns a function rendering one frame of a
+# pose. The frame function returns the number of items processed (rays, checks...).
+
+def setup_raycaster_2d(world, columns):
+    controller = SimpleNamespace(world=world)
+    max_distance = view_distance(world)
+
+    def frame(angle, x, y, timer):
+        with timer.stage('cast'):
+            for _ in raycaster_2d(angle, x, y, controller, num_rays=columns, fov=FOV, max_distance=max_distance):
+                pass
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_raycast_columns(world, columns):
+    max_distance = view_distance(world)
+
+    def frame(angle, x, y, timer):
+        with timer.stage('cast'):
+            raycast_columns(angle, x, y, world, num_columns=columns, fov=FOV, max_distance=max_distance)
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_raycast_columns_pyramid(world, columns):
+    pyramid = OccupancyPyramid(world)
+    max_distance = view_distance(world)
+
+    def frame(angle, x, y, timer):
+        with timer.stage('cast'):
+            raycast_columns(angle, x, y, world, num_columns=columns, fov=FOV, max_distance=max_distance,
+                            pyramid=pyramid)
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_ray_cache(world, columns):
+    # Snapping to column steps as the Renderer does, otherwise a turn never reuses columns
+    cache = RayCache(world, num_columns=columns, fov=FOV, rotation_tolerance=math.radians(FOV) / columns / 2)
+
+    def frame(angle, x, y, timer):
+        with timer.stage('cast'):
+            cache.cast(angle, x, y)
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_software_renderer(world, columns):
+    player = SimpleNamespace(FOV=FOV, angle=0.0, x=0.0, y=0.0)
+    renderer = SoftwareRenderer(SimpleNamespace(player=player, world=world), column_width=max(1, 960 // columns),
+                                num_columns=columns)
+
+    def frame(angle, x, y, timer):
+        player.angle, player.x, player.y = angle, x, y
+        with timer.stage('cast'):
+            result = renderer.cast_rays()
+        with timer.stage('ceiling_floor'):
+            renderer.draw_background(result, (angle, x, y))
+        with timer.stage('walls'):
+            renderer.draw_world_3d(result)
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_sprites(world, columns):
+    count = min(MAX_SPRITES, int(world.map_grid_size_x * world.map_grid_size_y * SPRITE_DENSITY))
+    player = SimpleNamespace(FOV=FOV, angle=0.0, x=0.0, y=0.0)
+    controller = SimpleNamespace(player=player, world=world, entities=populate_entities(world, max(count, 1)))
+    renderer = SoftwareRenderer(controller, column_width=max(1, 960 // columns), num_columns=columns)
+
+    def frame(angle, x, y, timer):
+        player.angle, player.x, player.y = angle, x, y
+        with timer.stage('cast'):
+            result = renderer.cast_rays()
+        with timer.stage('walls'):
+            renderer.draw_world_3d(result)
+        with timer.stage('sprites'):
+            renderer.draw_sprites()
+        return columns
+
+    return frame, 'rays'
+
+
+def setup_collision(world, columns):
+    controller = GameController()
+    controller.world = world
+
+    def frame(angle, x, y, timer):
+        controller.player.x, controller.player.y = x, y
+        controller.player.update_angle(0)
+        with timer.stage('collision'):
+            controller.check_player_collision_forward()
+        return 1
+
+    return frame, 'checks'
+
+
+BENCHMARKS = {
+    'raycaster_2d': setup_raycaster_2d,
+    'raycast_columns': setup_raycast_columns,
+    'raycast_columns_pyramid': setup_raycast_columns_pyramid,
+    'ray_cache': setup_ray_cache,
+    'software_renderer': setup_software_renderer,
+    'sprites': setup_sprites,
+    'collision': setup_collision,
+}
+
+# Benchmarks that do not depend on the number of columns run once per map
+COLUMN_INDEPENDENT = {'collision'}
+
+
+def run_benchmark(name, world, map_size, columns, poses):
+    frame, unit = BENCHMARKS[name](world, columns)
+
+    for pose in poses[:WARMUP_FRAMES]:
+        frame(*pose, StageTimer())
+
+    timer = StageTimer()
+    items = 0
+    for pose in poses:
+        with timer.stage('frame'):
+            items += frame(*pose, timer)
+    total_time = sum(timer.samples['frame'])
+
+    # Allocations of a few frames, traced separately so tracing does not skew the timings
+    peaks = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for pose in poses[:ALLOCATION_FRAMES]:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        frame(*pose, StageTimer())
+        peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+    return {
+        'benchmark': name,
+        'map_size': map_size,
+        'columns': None if name in COLUMN_INDEPENDENT else columns,
+        'frames': len(poses),
+        'unit': unit,
+        'throughput': items / total_time if total_time > 0 else None,
+        'stages': {stage: summarize(samples) for stage, samples in timer.samples.items()},
+        'allocations': {
+            'peak_bytes_per_frame': summarize(peaks, scale=1),
+            'retained_blocks': retained,
+        },
+    }
+
+
+def summarize(samples, scale=1000):
+    """min, mean, percentiles and max of samples, seconds are reported in milliseconds."""
+    values = np.asarray(samples, dtype=np.float64) * scale
+    summary = {'min': values.min(), 'mean': values.mean()}
+    for percentile in (50, 95, 99):
+        summary[f'p{percentile}'] = np.percentile(values, percentile)
+    summary['max'] = values.max()
+
+    return {key: round(float(value), 6) for key, value in summary.items()}
+
+
+def result_key(result):
+    key = f"{result['benchmark']}/map={result['map_size']}"
+    if result['columns'] is not None:
+        key += f"/columns={result['columns']}"
+    return key
+
+
+def run_suite(map_sizes, column_counts, frames, benchmarks, seed=0, log=print):
+    results = {}
+    for map_size in map_sizes:
+        world = generate_world(map_size, seed=seed)
+        poses = camera_path(world, frames, seed=seed)
+
+        for name in benchmarks:
+            for columns in column_counts:
+                result = run_benchmark(name, world, map_size, columns, poses)
+                results[result_key(result)] = result
+                log(f"{name:>24} map={map_size:<6} columns={columns:<5} "
+                    f"p50={result['stages']['frame']['p50']:9.3f} ms  "
+                    f"{result['throughput']:14,.0f} {result['unit']}/s")
+
+                if name in COLUMN_INDEPENDENT:
+                    break
+
+    return results
+
+
+def environment():
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare the median frame time of every benchmark present in both runs.
+
+    :return: (regressions, improvements), lists of (key, baseline ms, current ms, relative change).
+    """
+    regressions = []
+    improvements = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+
+        before = previous['stages']['frame']['p50']
+        after = result['stages']['frame']['p50']
+        if before <= 0:
+            continue
+
+        change = after / before - 1
+        if change > threshold:
+            regressions.append((key, before, after, change))
+        elif change < -threshold:
+            improvements.append((key, before, after, change))
+
+    return regressions, improvements
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless raycaster and renderer benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_MAP_SIZES, help='Map sizes in tiles')
+    parser.add_argument('--columns', type=int, nargs='+', default=DEFAULT_COLUMNS, help='Rays per frame')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help='Frames of camera path per benchmark')
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results to a JSON file written by a previous run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Relative slowdown of the median frame time reported as a regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.columns, args.frames, args.benchmarks, args.seed)
+
+    if args.output:
+        report = {
+            'schema': RESULTS_SCHEMA,
+            'environment': environment(),
+            'config': {'sizes': args.sizes, 'columns': args.columns, 'frames': args.frames, 'seed': args.seed,
+                       'fov': FOV},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if baseline.get('schema') != RESULTS_SCHEMA:
+            sys.exit(f"{args.baseline} was written by an incompatible version of the benchmarks")
+
+        regressions, improvements = compare(results, baseline['results'], args.threshold)
+        for title, entries in (('Improvements', improvements), ('Regressions', regressions)):
+            if entries:
+                print(f"\n{title} (median frame time, threshold {args.threshold:.0%}):")
+                for key, before, after, change in entries:
+                    print(f"  {key:<56} {before:9.3f} ms -> {after:9.3f} ms  {change:+.1%}")
+
+        if regressions:
+            sys.exit(1)
+        print("\nNo regression against the baseline")
+
+
+if __name__ == '__main__':
+    main()
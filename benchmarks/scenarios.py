@@ -0,0 +1,108 @@
+# /benchmarks/scenarios.py
+#
+# Deterministic maps and camera paths shared by the benchmarks. The same seed always gives the same world and path,
+# so runs on different machines or commits measure the same work.
+
+import math
+
+import numpy as np
+
+from src.entities.entity import Entity
+from src.entities.entity_manager import EntityManager
+from src.models.world import World
+
+TILE_SIZE = 64
+
+
+def generate_world(size, density=0.08, seed=0):
+    """
+    Square world of random walls enclosed by a border, the built-in map for size 8.
+
+    :param size: Number of tiles on each axis.
+    :param density: Probability of a tile being a wall.
+    :param seed: Seed of the random generator.
+    """
+    if size == 8:
+        return World()
+
+    rng = np.random.default_rng(seed)
+    walls = (rng.random((size, size)) < density) * rng.integers(1, 5, (size, size))
+    walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = 1
+
+    return World(size, size, TILE_SIZE, walls.astype(np.uint8))
+
+
+def camera_path(world, frames, seed=0, turn_speed=0.05, move_speed=12.0):
+    """
+    Scripted walk through the empty tiles of a world, a list of (angle, x, y) poses.
+
+    The camera walks forward while turning slowly, and turns away from walls it is about to enter. Every few frames
+    it stands still or only turns, the idle and rotation frames a player produces.
+    """
+    rng = np.random.default_rng(seed)
+    tile_size = world.map_grid_size
+    walls = world.map_grid_walls
+
+    def is_empty(x, y):
+        tile_x = int(x // tile_size)
+        tile_y = int(y // tile_size)
+        return (0 <= tile_x < world.map_grid_size_x and 0 <= tile_y < world.map_grid_size_y
+                and walls.get(tile_x, tile_y) == 0)
+
+    # Start in the empty tile closest to the center
+    x, y = _center_start(world, is_empty)
+    angle = float(rng.uniform(0, 2 * math.pi))
+
+    poses = []
+    for frame in range(frames):
+        phase = frame % 16
+        if phase < 10:
+            angle += turn_speed * float(rng.uniform(-1, 1))
+            next_x = x + math.cos(angle) * move_speed
+            next_y = y + math.sin(angle) * move_speed
+            if is_empty(next_x, next_y):
+                x, y = next_x, next_y
+            else:
+                angle += math.pi / 2
+        elif phase < 13:
+            angle += turn_speed
+        # The remaining frames of every cycle are idle
+
+        angle = math.fmod(angle + 2 * math.pi, 2 * math.pi)
+        poses.append((angle, x, y))
+
+    return poses
+
+
+def populate_entities(world, count, seed=0, radius=16, sprites=4):
+    """EntityManager holding `count` sprite entities standing in random empty tiles of a world."""
+    rng = np.random.default_rng(seed)
+    tile_size = world.map_grid_size
+    walls = world.map_grid_walls
+    entities = EntityManager(world)
+
+    while len(entities) < count:
+        tile_x, tile_y = (int(value) for value in rng.integers(0, (world.map_grid_size_x, world.map_grid_size_y)))
+        if walls.get(tile_x, tile_y) != 0:
+            continue
+
+        x, y = (float(value) for value in (np.array([tile_x, tile_y]) + rng.uniform(0.3, 0.7, 2)) * tile_size)
+        entities.spawn(Entity(x, y, radius=radius, sprite=int(rng.integers(0, sprites))))
+
+    return entities
+
+
+def _center_start(world, is_empty):
+    tile_size = world.map_grid_size
+    center_x = world.map_grid_size_x // 2
+    center_y = world.map_grid_size_y // 2
+
+    for radius in range(max(world.map_grid_size_x, world.map_grid_size_y)):
+        for tile_y in range(center_y - radius, center_y + radius + 1):
+            for tile_x in range(center_x - radius, center_x + radius + 1):
+                x = (tile_x + 0.5) * tile_size
+                y = (tile_y + 0.5) * tile_size
+                if is_empty(x, y):
+                    return x, y
+
+    raise ValueError("The world has no empty tile to start the camera in")
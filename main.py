@@ -1,50 +1,107 @@
 # main.py
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+import argparse
+import sys
+import time
+from types import SimpleNamespace
 
 import src.models.constants
-from src.renderer.renderer import Renderer
+from src.controllers.frame_scheduler import FrameScheduler
 from src.controllers.game_controller import GameController
-
-frame1 = frame2 = avg_fps = delta_time = 0
-
-
-def fps_callback(calculated_fps, dt):
-    global frame1, frame2, avg_fps, delta_time
-    frame2 = frame1
-    frame1 = calculated_fps
-    delta_time = dt
-    avg_fps = (frame1 + frame2) // 2
+from src.controllers.input_recording import InputRecorder
 
 
 def window_resize(w, h):
     glutReshapeWindow(1024, 512)
 
 
-def idle_func():
-    game_controller.update(delta_time)
+def render_frame(alpha):
+    # Drawn by the display callback, from the player interpolated between the last two ticks
+    renderer.interpolation = alpha
     glutPostRedisplay()
 
 
-game_controller = GameController()
+def idle_func():
+    scheduler.advance()
+
+    if game_controller.quit_requested:
+        glutLeaveMainLoop()
+        return
+
+    # Sleep instead of spinning while nothing is due, such as when the window is hidden or the frame rate is capped
+    delay = scheduler.idle_time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def visibility_func(state):
+    scheduler.visible = state == GLUT_VISIBLE
+
+
+# Worker processes started with spawn import this module again, only the game process opens the window and loads
+# PyOpenGL
+if __name__ == '__main__':
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+    from OpenGL.GLUT import *
+
+    from src.renderer import Renderer
+    from src.renderer.frame_capture import CAPTURE_FORMATS, CAPTURE_POLICIES, CAPTURE_FORMAT_PNG, CAPTURE_POLICY_DROP
+    from src.renderer.renderer import CAPTURE_SOURCE_VIEW, CAPTURE_SOURCE_WINDOW
+
+    parser = argparse.ArgumentParser(description='Raycaster')
+    parser.add_argument('--record', metavar='FILE', help='Record the input of the session, replay it with '
+                                                         'python -m src.controllers.input_recording')
+    parser.add_argument('--capture', metavar='DIR', help='Write every displayed frame to this directory')
+    parser.add_argument('--capture-format', choices=CAPTURE_FORMATS, default=CAPTURE_FORMAT_PNG,
+                        help='PNG or raw RGB file per frame, or a single stream of PPM frames')
+    parser.add_argument('--capture-policy', choices=CAPTURE_POLICIES, default=CAPTURE_POLICY_DROP,
+                        help='Drop frames or slow the game down while the writer is behind')
+    parser.add_argument('--capture-source', choices=(CAPTURE_SOURCE_WINDOW, CAPTURE_SOURCE_VIEW),
+                        default=CAPTURE_SOURCE_WINDOW, help='Capture the whole window or only the 3D view')
+    args, glut_args = parser.parse_known_args()
+
+    game_controller = GameController()
+
+    # Every key and tick goes through the recorder, which forwards it to the game
+    if args.record:
+        inputs = InputRecorder.to_file(game_controller, args.record)
+    else:
+        inputs = SimpleNamespace(key_down=game_controller.handle_keyboard_input_down,
+                                 key_up=game_controller.handle_keyboard_input_up, update=game_controller.update)
+
+    glutInit([sys.argv[0]] + glut_args)
+    # Closing the window returns from glutMainLoop, by default freeglut calls exit() and the cleanup after it never runs
+    glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA)
+    glutInitWindowSize(src.models.constants.WINDOW_WIDTH, src.models.constants.WINDOW_HEIGHT)
+    glutInitWindowPosition(500, 400)
+    glutCreateWindow(src.models.constants.WINDOW_TITLE.encode('ascii'))
+
+    # initialization code
+    renderer = Renderer(game_controller, glutGet(GLUT_WINDOW_WIDTH), glutGet(GLUT_WINDOW_HEIGHT))
+    scheduler = FrameScheduler(inputs.update, render_frame)
+
+    if args.capture:
+        renderer.start_capture(args.capture, args.capture_format, args.capture_policy, args.capture_source)
 
-glutInit(sys.argv)
-glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA)
-glutInitWindowSize(src.models.constants.WINDOW_WIDTH, src.models.constants.WINDOW_HEIGHT)
-glutInitWindowPosition(500, 400)
-glutCreateWindow(src.models.constants.WINDOW_TITLE.encode('ascii'))
+    glClearColor(0.3, 0.3, 0.3, 0)
+    gluOrtho2D(0, src.models.constants.WINDOW_WIDTH, src.models.constants.WINDOW_HEIGHT, 0)
 
-# initialization code
-renderer = Renderer(game_controller, glutGet(GLUT_WINDOW_WIDTH), glutGet(GLUT_WINDOW_HEIGHT), fps_callback)
+    glutKeyboardFunc(inputs.key_down)
+    glutKeyboardUpFunc(inputs.key_up)
+    glutDisplayFunc(renderer.display)
+    glutReshapeFunc(window_resize)
+    glutIdleFunc(idle_func)
+    glutVisibilityFunc(visibility_func)
+    glutMainLoop()
 
-glClearColor(0.3, 0.3, 0.3, 0)
-gluOrtho2D(0, src.models.constants.WINDOW_WIDTH, src.models.constants.WINDOW_HEIGHT, 0)
+    # The window was closed or the player quit
+    if args.record:
+        inputs.close()  # Writes the end state, the recording cannot be replayed without it
+    if args.capture:
+        renderer.stop_capture()  # Waits for the writer thread to write the frames still queued
+    renderer.close()
 
-glutKeyboardFunc(game_controller.handle_keyboard_input_down)
-glutKeyboardUpFunc(game_controller.handle_keyboard_input_up)
-glutDisplayFunc(renderer.display)
-glutReshapeFunc(window_resize)
-glutIdleFunc(idle_func)
-glutMainLoop()
+    if game_controller.quit_requested:
+        sys.exit("Exiting")
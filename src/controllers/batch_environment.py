@@ -0,0 +1,128 @@
+# /src/controllers/batch_environment.py
+
+from collections import namedtuple
+
+import numpy as np
+
+from src.entities.player_batch import PlayerBatch
+from src.models.settings import get_settings
+from src.renderer.batch_raycaster import cast_rays
+from src.renderer.ray_tables import get_ray_tables
+from src.renderer.raycaster import view_distance
+
+# Action bits, an agent's action is any combination of them
+ACTION_TURN_LEFT = 1
+ACTION_TURN_RIGHT = 2
+ACTION_FORWARD = 4
+ACTION_BACKWARD = 8
+
+# Distance in world units at which a player collides with a wall, as in GameController
+COLLISION_OFFSET = 10
+
+BatchObservation = namedtuple('BatchObservation', ['x', 'y', 'angle', 'distances'])
+
+
+class BatchEnvironment:
+    def __init__(self, world, count, tick_rate=None, num_rays=0, fov=None, players=None):
+        """
+        Many agents moving in one shared world, stepped together with array operations.
+
+        Every agent follows the movement and collision rules of GameController, an agent given the actions of the
+        keys held by a player ends up where that player would.
+
+        :param world: The world shared by every agent.
+        :param count: Number of agents, ignored when `players` is given.
+        :param tick_rate: Simulation ticks per second, sets the time step of a step. Defaults to GAME_TICK_RATE.
+        :param num_rays: Number of rays of every agent's first person observation, 0 to skip raycasting.
+        :param fov: Field of view in degrees of the observation rays, defaults to RENDER_FOV.
+        :param players: Optional PlayerBatch holding the agents, a batch of `count` players at the default position
+                        is created when not given.
+        """
+        settings = get_settings()
+        tick_rate = tick_rate if tick_rate is not None else settings.GAME_TICK_RATE
+        fov = fov if fov is not None else settings.RENDER_FOV
+
+        self.world = world
+        self.players = players if players is not None else PlayerBatch(count)
+        self.tick_length = 1 / tick_rate
+        self.num_rays = num_rays
+        self.fov = fov
+        self.max_distance = view_distance(world, settings.RENDER_VIEW_DISTANCE)
+        self.tick = 0
+
+    def step(self, actions):
+        """
+        Apply one tick of actions to every agent.
+
+        :param actions: Array of action bits (ACTION_*), one entry per agent, or a scalar applied to all of them.
+        :return: The BatchObservation after the tick.
+        """
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int64), len(self.players))
+        players = self.players
+        delta_time = self.tick_length
+
+        # Collisions are checked before moving, from the directions the players had at the start of the tick
+        x_forward, y_forward, x_backward, y_backward = self.check_collisions()
+
+        players.update_angle(-0.1 * delta_time, (actions & ACTION_TURN_LEFT) != 0)
+        players.update_angle(0.1 * delta_time, (actions & ACTION_TURN_RIGHT) != 0)
+
+        forward = (actions & ACTION_FORWARD) != 0
+        players.move_y(delta_time, forward & ~y_forward)
+        players.move_x(delta_time, forward & ~x_forward)
+
+        backward = (actions & ACTION_BACKWARD) != 0
+        players.move_y(-delta_time, backward & ~y_backward)
+        players.move_x(-delta_time, backward & ~x_backward)
+
+        self.tick += 1
+        return self.observe()
+
+    def check_collisions(self):
+        """
+        Vectorized GameController.check_player_collision_forward. Points outside the world count as walls.
+
+        :return: (x forward, y forward, x backward, y backward) boolean arrays, True where the player would enter
+                 a wall.
+        """
+        players = self.players
+        tile_size = self.world.map_grid_size
+
+        x_offset = np.where(players.dx < 0, -COLLISION_OFFSET, COLLISION_OFFSET)
+        y_offset = np.where(players.dy < 0, -COLLISION_OFFSET, COLLISION_OFFSET)
+
+        # int() in GameController truncates towards zero
+        tile_x = np.trunc(players.x / tile_size)
+        tile_y = np.trunc(players.y / tile_size)
+        tile_x_forward = np.trunc((players.x + x_offset) / tile_size)
+        tile_y_forward = np.trunc((players.y + y_offset) / tile_size)
+        tile_x_backward = np.trunc((players.x - x_offset) / tile_size)
+        tile_y_backward = np.trunc((players.y - y_offset) / tile_size)
+
+        return (self._is_wall(tile_x_forward, tile_y), self._is_wall(tile_x, tile_y_forward),
+                self._is_wall(tile_x_backward, tile_y), self._is_wall(tile_x, tile_y_backward))
+
+    def observe(self):
+        players = self.players
+
+        distances = None
+        if self.num_rays > 0:
+            # Every agent's rays are the shared tables rotated to its own angle, all cast in a single batch
+            tables = get_ray_tables(self.num_rays, self.fov)
+            cos_a = np.cos(players.angle)[:, np.newaxis]
+            sin_a = np.sin(players.angle)[:, np.newaxis]
+            cos_ra = cos_a * tables.cos_offsets - sin_a * tables.sin_offsets
+            sin_ra = sin_a * tables.cos_offsets + cos_a * tables.sin_offsets
+
+            distances = cast_rays(self.world, players.x[:, np.newaxis], players.y[:, np.newaxis], cos_ra, sin_ra,
+                                  self.max_distance)[0]
+
+        return BatchObservation(players.x.copy(), players.y.copy(), players.angle.copy(), distances)
+
+    def _is_wall(self, tile_x, tile_y):
+        inside = ((tile_x >= 0) & (tile_x < self.world.map_grid_size_x)
+                  & (tile_y >= 0) & (tile_y < self.world.map_grid_size_y))
+
+        walls = np.ones(len(tile_x), dtype=bool)
+        walls[inside] = self.world.walls_at(tile_x[inside].astype(np.int64), tile_y[inside].astype(np.int64)) != 0
+        return walls
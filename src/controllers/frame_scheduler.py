@@ -0,0 +1,105 @@
+# /src/controllers/frame_scheduler.py
+
+import time
+
+from src.models.settings import get_settings
+
+
+class FrameScheduler:
+    def __init__(self, update, render, tick_rate=None, max_catch_up_ticks=None, max_fps=None, clock=time.perf_counter):
+        """
+        Fixed timestep game loop: the simulation advances in ticks of constant length whatever the frame rate, and
+        frames are rendered in between, interpolated between the last two ticks.
+
+        Time elapsed since the last call is added to an accumulator and consumed one tick at a time. When rendering
+        is so slow that more than `max_catch_up_ticks` are due, the extra time is dropped, the game slows down instead
+        of spending every frame catching up.
+
+        :param update: Called with the tick length in seconds for every simulation tick.
+        :param render: Called with the interpolation factor in [0, 1) between the previous tick and the last one.
+        :param tick_rate: Simulation ticks per second, defaults to GAME_TICK_RATE.
+        :param max_catch_up_ticks: Most ticks run by a single call to advance, defaults to GAME_MAX_CATCH_UP_TICKS.
+        :param max_fps: Most frames rendered per second, 0 for no limit. Defaults to RENDER_MAX_FPS.
+        :param clock: Function returning the current time in seconds.
+        """
+        settings = get_settings()
+        tick_rate = tick_rate if tick_rate is not None else settings.GAME_TICK_RATE
+        max_catch_up_ticks = max_catch_up_ticks if max_catch_up_ticks is not None else settings.GAME_MAX_CATCH_UP_TICKS
+        max_fps = max_fps if max_fps is not None else settings.RENDER_MAX_FPS
+
+        self.update = update
+        self.render = render
+        self.tick = 1 / tick_rate
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self.frame_interval = 1 / max_fps if max_fps > 0 else 0
+        self.clock = clock
+
+        # No frame is rendered while the window is hidden or minimized, the simulation keeps running
+        self.visible = True
+
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.frames = 0
+        self.dropped_time = 0.0
+
+        self._last_time = None
+        self._last_frame_time = None
+
+    @property
+    def alpha(self):
+        """Position of the current time between the last two ticks, used to interpolate what is rendered."""
+        return self.accumulator / self.tick
+
+    def advance(self):
+        """
+        Run the ticks due since the last call, then render a frame when one is allowed.
+
+        :return: True if a frame was rendered.
+        """
+        now = self.clock()
+        if self._last_time is None:
+            self._last_time = now
+        self.accumulator += now - self._last_time
+        self._last_time = now
+
+        ticks = 0
+        while self.accumulator >= self.tick and ticks < self.max_catch_up_ticks:
+            self.update(self.tick)
+            self.accumulator -= self.tick
+            ticks += 1
+        self.ticks += ticks
+
+        if self.accumulator >= self.tick:
+            # Too far behind, keep the partial tick and drop the rest
+            dropped = self.accumulator - self.accumulator % self.tick
+            self.dropped_time += dropped
+            self.accumulator -= dropped
+
+        if not self._frame_due(now):
+            return False
+
+        self._last_frame_time = now
+        self.frames += 1
+        self.render(self.alpha)
+        return True
+
+    def idle_time(self):
+        """Seconds the caller can sleep before anything is due, 0 when a frame can be rendered right away."""
+        now = self.clock()
+        elapsed = self.accumulator + (now - self._last_time if self._last_time is not None else 0)
+        until_tick = max(self.tick - elapsed, 0)
+
+        if not self.visible:
+            return until_tick
+
+        if self._last_frame_time is None:
+            return 0
+        until_frame = max(self._last_frame_time + self.frame_interval - now, 0)
+
+        return min(until_tick, until_frame)
+
+    def _frame_due(self, now):
+        if not self.visible:
+            return False
+
+        return self._last_frame_time is None or now - self._last_frame_time >= self.frame_interval
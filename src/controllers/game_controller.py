@@ -1,6 +1,6 @@
-from OpenGL.GLUT import *
-
+from src.entities.entity_manager import EntityManager
 from src.entities.player import Player
+from src.logging.frame_profiler import get_profiler
 from src.models.world import World
 
 
@@ -8,19 +8,28 @@ class GameController:
     def __init__(self):
         self.player = Player()
         self.world = World()
+        self.entities = EntityManager(self.world)  # NPCs, pickups, projectiles...
         self.keys_pressed = set()  # Set to hold the current keys being pressed
         self.keys_just_pressed = set()  # Set to hold the keys that were just pressed
+        self.quit_requested = False  # Set when the player asked to leave, the main loop decides how to exit
+
+        # Stages of an update, timed by the frame profiler when it is enabled
+        self.profiler = get_profiler()
+        self.delta_time = 0
+        self.update_stages = (
+            ('update.movement', lambda: self.update_player_position(self.delta_time)),
+            ('update.entities', lambda: self.entities.update(self.delta_time)),
+            ('update.debug_keys', self.check_debug_keys),
+            ('update.interaction', self.check_interaction_keys),
+        )
 
     def update(self, delta_time):
-        self.update_player_position(delta_time)
-        self.check_debug_keys()
-        self.check_interaction_keys()
+        self.player.store_previous_pose()
+        self.delta_time = delta_time
+        self.profiler.run_stages(self.update_stages, 'update')
 
         if '\x1b' in self.keys_pressed:  # Escape key
-            glutLeaveMainLoop()
-            sys.exit("Exiting")
-
-        glutPostRedisplay()
+            self.quit_requested = True
 
     def handle_keyboard_input_down(self, key, x, y):
         key = key.decode('ascii')
@@ -43,6 +52,9 @@ class GameController:
             self.keys_just_pressed.remove('q')
         if 'v' in self.keys_just_pressed:  # Just pressed
             self.keys_just_pressed.remove('v')
+        if 'p' in self.keys_just_pressed:  # Toggle the frame profiler
+            self.keys_just_pressed.remove('p')
+            self.profiler.enabled = not self.profiler.enabled
 
     def update_player_position(self, delta_time):
         # Check collision
@@ -67,31 +79,30 @@ class GameController:
 
     def open_door(self):
         interact_distance = self.player.interact_distance
+        tile_size = self.world.map_grid_size
 
         xo = -interact_distance if self.player.dx < 0 else (interact_distance if self.player.dx > 0 else 0)
         yo = -interact_distance if self.player.dy < 0 else (interact_distance if self.player.dy > 0 else 0)
-        ipx = self.player.x / 64.0
-        ipy = self.player.y / 64.0
-        ipx_add_offset = int((self.player.x + xo) / 64.0)
-        ipy_add_offset = int((self.player.y + yo) / 64.0)
+        ipx_add_offset = int((self.player.x + xo) / tile_size)
+        ipy_add_offset = int((self.player.y + yo) / tile_size)
 
         if self.world.map_grid_walls[ipy_add_offset * self.world.map_grid_size_x + ipx_add_offset] == 4:
             self.world.update_wall_at_position(ipx_add_offset, ipy_add_offset, 0)
-            self.world.is_updated = True
 
     def check_player_collision_forward(self):
         offset_value = 10
+        tile_size = self.world.map_grid_size
 
         x_offset = -offset_value if self.player.dx < 0 else offset_value
         y_offset = -offset_value if self.player.dy < 0 else offset_value
 
-        player_grid_pos_x = int(self.player.x / 64)
-        player_grid_pos_x_add_offset = int((self.player.x + x_offset) / 64)
-        player_grid_pos_x_sub_offset = int((self.player.x - x_offset) / 64)
+        player_grid_pos_x = int(self.player.x / tile_size)
+        player_grid_pos_x_add_offset = int((self.player.x + x_offset) / tile_size)
+        player_grid_pos_x_sub_offset = int((self.player.x - x_offset) / tile_size)
 
-        player_grid_pos_y = int(self.player.y / 64)
-        player_grid_pos_y_add_offset = int((self.player.y + y_offset) / 64)
-        player_grid_pos_y_sub_offset = int((self.player.y - y_offset) / 64)
+        player_grid_pos_y = int(self.player.y / tile_size)
+        player_grid_pos_y_add_offset = int((self.player.y + y_offset) / tile_size)
+        player_grid_pos_y_sub_offset = int((self.player.y - y_offset) / tile_size)
 
         is_colliding_x_forward = self.world.map_grid_walls[
                                      player_grid_pos_y * self.world.map_grid_size_x + player_grid_pos_x_add_offset] != 0
@@ -0,0 +1,102 @@
+# /src/controllers/headless_runtime.py
+
+from collections import namedtuple
+
+from src.controllers.game_controller import GameController
+from src.models.settings import get_settings
+from src.renderer.batch_raycaster import raycast_columns
+from src.renderer.raycaster import view_distance
+
+# Named actions and the keys they hold down, raw keys are accepted as well
+ACTION_KEYS = {
+    'turn_left': 'a',
+    'turn_right': 'd',
+    'forward': 'w',
+    'backward': 's',
+    'interact': 'e',
+    'quit': '\x1b',
+}
+
+Observation = namedtuple('Observation', ['tick', 'x', 'y', 'angle', 'world_version', 'distances', 'done'])
+
+
+class HeadlessRuntime:
+    def __init__(self, game_controller=None, tick_rate=None, num_rays=0, fov=None):
+        """
+        Step the game without a window: actions in, observations out, one fixed simulation tick per step.
+
+        Nothing here imports OpenGL, so bots, replay validation and load tests can run the game logic as fast as
+        the CPU allows.
+
+        :param game_controller: The game to drive, a new GameController when not given.
+        :param tick_rate: Simulation ticks per second, sets the time step passed to the controller. Defaults to
+                          GAME_TICK_RATE.
+        :param num_rays: Number of rays cast for the observation distances, 0 to skip raycasting.
+        :param fov: Field of view in degrees of the observation rays, defaults to RENDER_FOV.
+        """
+        settings = get_settings()
+        tick_rate = tick_rate if tick_rate is not None else settings.GAME_TICK_RATE
+        fov = fov if fov is not None else settings.RENDER_FOV
+
+        self.controller = game_controller if game_controller is not None else GameController()
+        self.tick_length = 1 / tick_rate
+        self.num_rays = num_rays
+        self.fov = fov
+        self.view_distance_tiles = settings.RENDER_VIEW_DISTANCE  # The controller's world may be replaced
+        self.tick = 0
+
+        self._held_keys = set()
+
+    @property
+    def done(self):
+        return self.controller.quit_requested
+
+    def step(self, actions=()):
+        """
+        Hold the keys of `actions` for one tick and run it. Keys held on the previous step and missing from
+        `actions` are released, keys new to this step count as just pressed.
+
+        :param actions: Iterable of action names (see ACTION_KEYS) or raw keys.
+        :return: The Observation after the tick.
+        """
+        keys = {ACTION_KEYS.get(action, action) for action in actions}
+
+        for key in self._held_keys - keys:
+            self.controller.handle_keyboard_input_up(key.encode('ascii'), 0, 0)
+        for key in keys - self._held_keys:
+            self.controller.handle_keyboard_input_down(key.encode('ascii'), 0, 0)
+        self._held_keys = keys
+
+        self.controller.update(self.tick_length)
+        self.tick += 1
+
+        return self.observe()
+
+    def run(self, ticks, policy=None):
+        """
+        Step up to `ticks` times, stopping early when the game asks to quit.
+
+        :param policy: Called with the last Observation (None on the first tick), returns the actions of the next
+                       tick. No action is taken when not given.
+        :return: The last Observation.
+        """
+        observation = None
+        for _ in range(ticks):
+            actions = policy(observation) if policy is not None else ()
+            observation = self.step(actions)
+            if observation.done:
+                break
+
+        return observation
+
+    def observe(self):
+        player = self.controller.player
+        world = self.controller.world
+
+        distances = None
+        if self.num_rays > 0:
+            distances = raycast_columns(player.angle, player.x, player.y, world, num_columns=self.num_rays,
+                                        fov=self.fov,
+                                        max_distance=view_distance(world, self.view_distance_tiles)).distance
+
+        return Observation(self.tick, player.x, player.y, player.angle, world.version, distances, self.done)
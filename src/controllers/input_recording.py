@@ -0,0 +1,230 @@
+# /src/controllers/input_recording.py
+
+import argparse
+import hashlib
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from src.controllers.game_controller import GameController
+from src.exceptions.recording_exceptions import RecordingFormatError
+
+# Stream header: magic, format version
+RECORDING_MAGIC = b'RCREC\x00'
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct('<6sH')
+
+# Every event starts with its type and the time it happened at, in seconds since the recording started
+EVENT_HEADER = struct.Struct('<Bd')
+EVENT_KEY_DOWN = 1  # Payload: key byte
+EVENT_KEY_UP = 2  # Payload: key byte
+EVENT_TICK = 3  # Payload: delta time of the tick in seconds
+EVENT_END = 4  # Payload: sha256 of the game state at the end of the recording
+
+EVENT_PAYLOADS = {
+    EVENT_KEY_DOWN: struct.Struct('<c'),
+    EVENT_KEY_UP: struct.Struct('<c'),
+    EVENT_TICK: struct.Struct('<d'),
+    EVENT_END: struct.Struct('<32s'),
+}
+
+InputEvent = namedtuple('InputEvent', ['type', 'time', 'value'])
+ReplayResult = namedtuple('ReplayResult', ['ticks', 'events', 'elapsed', 'tick_times', 'state_hash',
+                                           'expected_hash'])
+
+
+def state_hash(game_controller):
+    """sha256 of the player pose, the world tiles and the entities, equal for two games in the same state."""
+    digest = hashlib.sha256()
+    player = game_controller.player
+    world = game_controller.world
+
+    digest.update(struct.pack('<ddd', player.x, player.y, player.angle))
+    digest.update(struct.pack('<III', world.map_grid_size_x, world.map_grid_size_y, world.map_grid_size))
+    digest.update(np.ascontiguousarray(world.map_grid_walls.to_array()).tobytes())
+
+    entities = getattr(game_controller, 'entities', None)
+    if entities is not None:
+        for entity in sorted(entities, key=lambda entity: entity.id):
+            digest.update(struct.pack('<qdddd', entity.id, entity.x, entity.y, entity.vx, entity.vy))
+
+    return digest.digest()
+
+
+class InputRecorder:
+    def __init__(self, game_controller, stream, clock=time.perf_counter):
+        """
+        Log the input of a game and the length of its ticks to a binary stream, so the session can be replayed.
+
+        Use the methods of the recorder in place of those of the controller: key_down and key_up as the keyboard
+        callbacks, update as the tick callback. Every call is forwarded to the controller and recorded.
+
+        :param game_controller: The recorded game.
+        :param stream: Writable binary file object, the recorder does not close it.
+        :param clock: Function returning the current time in seconds, event times are relative to its first value.
+        """
+        self.controller = game_controller
+        self.stream = stream
+        self.clock = clock
+        self.start_time = clock()
+        self.ticks = 0
+        self.closed = False
+        self.owns_stream = False
+
+        stream.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION))
+
+    @classmethod
+    def to_file(cls, game_controller, file_path, clock=time.perf_counter):
+        """Recorder writing to a new file, closed along with the recorder."""
+        recorder = cls(game_controller, open(file_path, 'wb'), clock)
+        recorder.owns_stream = True
+        return recorder
+
+    def key_down(self, key, x, y):
+        self._write(EVENT_KEY_DOWN, key[:1])
+        self.controller.handle_keyboard_input_down(key, x, y)
+
+    def key_up(self, key, x, y):
+        self._write(EVENT_KEY_UP, key[:1])
+        self.controller.handle_keyboard_input_up(key, x, y)
+
+    def update(self, delta_time):
+        self._write(EVENT_TICK, delta_time)
+        self.controller.update(delta_time)
+        self.ticks += 1
+
+    def close(self):
+        """Write the hash of the final game state and end the recording."""
+        if self.closed:
+            return
+
+        self._write(EVENT_END, state_hash(self.controller))
+        self.stream.flush()
+        if self.owns_stream:
+            self.stream.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, event_type, value):
+        self.stream.write(EVENT_HEADER.pack(event_type, self.clock() - self.start_time)
+                          + EVENT_PAYLOADS[event_type].pack(value))
+
+
+def read_events(stream):
+    """Decode the InputEvents of a recording, the END event included."""
+    header = stream.read(RECORDING_HEADER.size)
+    if len(header) < RECORDING_HEADER.size:
+        raise RecordingFormatError("Not an input recording, the stream is too short")
+
+    magic, version = RECORDING_HEADER.unpack(header)
+    if magic != RECORDING_MAGIC:
+        raise RecordingFormatError("Not an input recording")
+    if version != RECORDING_VERSION:
+        raise RecordingFormatError(f"Unsupported input recording version {version}")
+
+    events = []
+    while True:
+        # A recording cut short, by a crash for instance, ends at its last complete event
+        event_header = stream.read(EVENT_HEADER.size)
+        if len(event_header) < EVENT_HEADER.size:
+            break
+
+        event_type, event_time = EVENT_HEADER.unpack(event_header)
+        payload = EVENT_PAYLOADS.get(event_type)
+        if payload is None:
+            raise RecordingFormatError(f"Unknown event type {event_type} in input recording")
+
+        data = stream.read(payload.size)
+        if len(data) < payload.size:
+            break
+
+        value, = payload.unpack(data)
+        events.append(InputEvent(event_type, event_time, value))
+
+    return events
+
+
+class InputReplayer:
+    def __init__(self, events):
+        """
+        Feed a recorded session back through a GameController, tick for tick.
+
+        :param events: InputEvents of a recording, see read_events and from_file.
+        """
+        self.events = events
+        self.expected_hash = next((event.value for event in events if event.type == EVENT_END), None)
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, 'rb') as f:
+            return cls(read_events(f))
+
+    def replay(self, game_controller=None, realtime=False, clock=time.perf_counter, sleep=time.sleep):
+        """
+        Replay the session.
+
+        :param game_controller: Game to replay into, a new GameController when not given. It must start in the state
+                                the recorded game started in.
+        :param realtime: Wait for the recorded time of every event instead of replaying as fast as possible.
+        :return: A ReplayResult with the duration of every tick, and the final state hash next to the recorded one.
+        """
+        controller = game_controller if game_controller is not None else GameController()
+        tick_times = []
+        events = 0
+
+        start_time = clock()
+        for event in self.events:
+            if realtime:
+                delay = event.time - (clock() - start_time)
+                if delay > 0:
+                    sleep(delay)
+
+            if event.type == EVENT_KEY_DOWN:
+                controller.handle_keyboard_input_down(event.value, 0, 0)
+            elif event.type == EVENT_KEY_UP:
+                controller.handle_keyboard_input_up(event.value, 0, 0)
+            elif event.type == EVENT_TICK:
+                tick_start = clock()
+                controller.update(event.value)
+                tick_times.append(clock() - tick_start)
+            events += 1
+        elapsed = clock() - start_time
+
+        return ReplayResult(len(tick_times), events, elapsed, tick_times, state_hash(controller), self.expected_hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay an input recording and check the final game state')
+    parser.add_argument('recording', help='File written by InputRecorder, see main.py --record')
+    parser.add_argument('--realtime', action='store_true', help='Replay at the recorded speed')
+    parser.add_argument('--runs', type=int, default=1, help='Number of replays, each in a new game')
+    args = parser.parse_args()
+
+    replayer = InputReplayer.from_file(args.recording)
+    mismatch = False
+    for run in range(args.runs):
+        result = replayer.replay(realtime=args.realtime)
+        tick_ms = np.asarray(result.tick_times) * 1000 if result.tick_times else np.zeros(1)
+        matches = result.expected_hash is None or result.state_hash == result.expected_hash
+        mismatch |= not matches
+
+        print(f"run {run + 1}: {result.ticks} ticks in {result.elapsed * 1000:.1f} ms, tick mean "
+              f"{tick_ms.mean():.4f} ms, p99 {np.percentile(tick_ms, 99):.4f} ms, max {tick_ms.max():.4f} ms, "
+              f"state {'matches' if matches else 'DIFFERS from'} the recording")
+
+    if replayer.expected_hash is None:
+        print("The recording has no end state, it was not closed")
+    if mismatch:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
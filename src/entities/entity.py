@@ -0,0 +1,32 @@
+from src.exceptions.entity_exceptions import EntityRadiusError
+
+
+class Entity:
+    def __init__(self, x, y, radius=8, kind=None, vx=0.0, vy=0.0, solid=True, sprite=None):
+        """
+        A dynamic object of the world (NPC, pickup, projectile...), positioned by EntityManager.
+
+        :param x: X position in world units.
+        :param y: Y position in world units.
+        :param radius: Half the width of the bounding box of the entity, in world units.
+        :param kind: Free form tag of the entity, for game logic and queries.
+        :param vx: Velocity on the X axis in world units per second.
+        :param vy: Velocity on the Y axis in world units per second.
+        :param solid: Solid entities are stopped by walls and reported by colliding_pairs.
+        :param sprite: Texture index of the billboard drawn for the entity, None for an invisible entity.
+        """
+        if radius < 0:
+            raise EntityRadiusError(f"The radius of an entity cannot be negative, got {radius}")
+
+        self.id = None  # Assigned by EntityManager.spawn
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.kind = kind
+        self.vx = vx
+        self.vy = vy
+        self.solid = solid
+        self.sprite = sprite
+
+    def __repr__(self):
+        return f"Entity(id={self.id}, kind={self.kind!r}, x={self.x:.1f}, y={self.y:.1f})"
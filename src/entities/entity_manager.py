@@ -0,0 +1,221 @@
+import itertools
+import math
+
+import numpy as np
+
+from src.exceptions.entity_exceptions import EntityNotFoundError
+from src.models.spatial_hash import SpatialHash
+
+
+class EntityManager:
+    def __init__(self, world):
+        """
+        Owns the dynamic entities of a world and keeps them in a spatial hash aligned to its tile grid.
+
+        Proximity and collision queries only compare entities sharing nearby cells, so their cost grows with the
+        number of entities rather than with its square.
+
+        :param world: The world the entities live in, its tile size is the cell size of the spatial hash.
+        """
+        self.world = world
+        self.spatial_hash = SpatialHash(world.map_grid_size)
+
+        self._entities = {}
+        self._next_id = itertools.count(1)
+        self._max_radius = 0
+
+        # Bumped whenever an entity is added, removed or moved, so views of the entities know when to redraw
+        self.version = 0
+
+    def __len__(self):
+        return len(self._entities)
+
+    def __iter__(self):
+        return iter(list(self._entities.values()))
+
+    def __contains__(self, entity_id):
+        return entity_id in self._entities
+
+    @property
+    def max_radius(self):
+        """Radius of the largest entity ever spawned, an upper bound for the reach of proximity queries."""
+        return self._max_radius
+
+    def get(self, entity_id):
+        try:
+            return self._entities[entity_id]
+        except KeyError:
+            raise EntityNotFoundError(f"No entity with id {entity_id}") from None
+
+    def spawn(self, entity):
+        """Add an entity to the world and return its new id."""
+        entity.id = next(self._next_id)
+        self._entities[entity.id] = entity
+        self._max_radius = max(self._max_radius, entity.radius)
+        self.spatial_hash.insert(entity.id, entity.x, entity.y)
+        self.version += 1
+        return entity.id
+
+    def despawn(self, entity_id):
+        entity = self.get(entity_id)
+        del self._entities[entity_id]
+        self.spatial_hash.remove(entity_id)
+        entity.id = None
+        self.version += 1
+        return entity
+
+    def move(self, entity_id, x, y):
+        """Teleport an entity, entities must be moved through here to stay in sync with the spatial hash."""
+        entity = self.get(entity_id)
+        entity.x = x
+        entity.y = y
+        self.spatial_hash.move(entity_id, x, y)
+        self.version += 1
+
+    def in_tile(self, tile_x, tile_y):
+        """Entities whose position is in a tile."""
+        return [self._entities[entity_id] for entity_id in self.spatial_hash.query_tile(tile_x, tile_y)]
+
+    def in_radius(self, x, y, radius, kind=None):
+        """Entities whose position is within `radius` of (x, y), optionally only those of a kind."""
+        entities = (self._entities[entity_id] for entity_id in self.spatial_hash.query_radius(x, y, radius))
+        return [entity for entity in entities if kind is None or entity.kind == kind]
+
+    def in_radius_batch(self, xs, ys, radius, kind=None):
+        """in_radius for many positions at once, one list of entities per position."""
+        entities = self._entities
+        return [[entities[entity_id] for entity_id in ids if kind is None or entities[entity_id].kind == kind]
+                for ids in self.spatial_hash.query_radius_batch(xs, ys, radius)]
+
+    def nearest(self, x, y, max_distance=math.inf, kind=None):
+        """
+        Closest entity to (x, y), optionally only of a kind.
+
+        :return: (entity, distance), or None when no entity is within `max_distance`.
+        """
+        found = self.spatial_hash.nearest(x, y, max_distance, self._kind_filter(kind))
+        return None if found is None else (self._entities[found[0]], found[1])
+
+    def nearest_batch(self, xs, ys, max_distance=math.inf, kind=None):
+        """nearest for many positions at once, one (entity, distance) or None per position."""
+        found = self.spatial_hash.nearest_batch(xs, ys, max_distance, self._kind_filter(kind))
+        return [None if item is None else (self._entities[item[0]], item[1]) for item in found]
+
+    def colliding_pairs(self):
+        """
+        Pairs of solid entities whose bounding circles overlap, each pair once as (entity, entity).
+
+        Candidates come from the spatial hash within twice the largest radius, then the exact radii are checked.
+        """
+        entities = self._entities
+        found = []
+        for id_a, id_b in self.spatial_hash.pairs(2 * self._max_radius):
+            a = entities[id_a]
+            b = entities[id_b]
+            if not (a.solid and b.solid):
+                continue
+            reach = a.radius + b.radius
+            if (a.x - b.x) * (a.x - b.x) + (a.y - b.y) * (a.y - b.y) < reach * reach:
+                found.append((a, b))
+
+        return found
+
+    def wall_collisions(self, entities=None):
+        """
+        Entities whose bounding box touches a wall or leaves the world, checked for every entity in one batch.
+
+        :param entities: Entities to check, every solid entity when not given.
+        """
+        if entities is None:
+            entities = [entity for entity in self._entities.values() if entity.solid]
+        if not entities:
+            return []
+
+        xs = np.fromiter((entity.x for entity in entities), dtype=np.float64, count=len(entities))
+        ys = np.fromiter((entity.y for entity in entities), dtype=np.float64, count=len(entities))
+        radii = np.fromiter((entity.radius for entity in entities), dtype=np.float64, count=len(entities))
+
+        colliding = self._boxes_hit_walls(xs, ys, radii)
+        return [entity for entity, hit in zip(entities, colliding) if hit]
+
+    def update(self, delta_time):
+        """
+        Move every entity by its velocity. Solid entities are stopped by walls one axis at a time, like the player,
+        so they slide along walls instead of sticking to them.
+
+        :param delta_time: Length of the tick in seconds.
+        """
+        moving = [entity for entity in self._entities.values() if entity.vx or entity.vy]
+        if not moving:
+            return
+
+        xs = np.fromiter((entity.x for entity in moving), dtype=np.float64, count=len(moving))
+        ys = np.fromiter((entity.y for entity in moving), dtype=np.float64, count=len(moving))
+        vxs = np.fromiter((entity.vx for entity in moving), dtype=np.float64, count=len(moving))
+        vys = np.fromiter((entity.vy for entity in moving), dtype=np.float64, count=len(moving))
+        radii = np.fromiter((entity.radius for entity in moving), dtype=np.float64, count=len(moving))
+        solid = np.fromiter((entity.solid for entity in moving), dtype=bool, count=len(moving))
+
+        new_xs = xs + vxs * delta_time
+        blocked = solid & self._boxes_hit_walls(new_xs, ys, radii)
+        new_xs = np.where(blocked, xs, new_xs)
+
+        new_ys = ys + vys * delta_time
+        blocked = solid & self._boxes_hit_walls(new_xs, new_ys, radii)
+        new_ys = np.where(blocked, ys, new_ys)
+
+        move = self.spatial_hash.move
+        for entity, x, y in zip(moving, new_xs.tolist(), new_ys.tolist()):
+            entity.x = x
+            entity.y = y
+            move(entity.id, x, y)
+        self.version += 1
+
+    def _boxes_hit_walls(self, xs, ys, radii):
+        # Every tile a box spans is looked up in a single call. Boxes are grouped by the number of tiles they span so
+        # each box only gets its own tiles, a large entity does not make the small ones check more tiles
+        if not len(xs):
+            return np.zeros(0, dtype=bool)
+
+        world = self.world
+        tile_size = world.map_grid_size
+        first_x = ((xs - radii) // tile_size).astype(np.int64)
+        first_y = ((ys - radii) // tile_size).astype(np.int64)
+        span_x = ((xs + radii) // tile_size).astype(np.int64) - first_x + 1
+        span_y = ((ys + radii) // tile_size).astype(np.int64) - first_y + 1
+
+        rows = int(span_y.max()) + 1
+        spans, group = np.unique(span_x * rows + span_y, return_inverse=True)
+        order = np.argsort(group, kind='stable')
+        group_stops = np.cumsum(np.bincount(group, minlength=len(spans)))
+
+        tiles_x = []
+        tiles_y = []
+        owners = []
+        start = 0
+        for span, stop in zip(spans.tolist(), group_stops.tolist()):
+            width, height = divmod(span, rows)
+            boxes = order[start:stop]
+            start = stop
+            tile_x = first_x[boxes, None, None] + np.arange(width)[None, None, :]
+            tile_y = first_y[boxes, None, None] + np.arange(height)[None, :, None]
+            tile_x, tile_y = np.broadcast_arrays(tile_x, tile_y)
+            tiles_x.append(tile_x.ravel())
+            tiles_y.append(tile_y.ravel())
+            owners.append(np.repeat(boxes, width * height))
+
+        tile_x = np.concatenate(tiles_x)
+        tile_y = np.concatenate(tiles_y)
+        owners = np.concatenate(owners)
+        inside = (tile_x >= 0) & (tile_x < world.map_grid_size_x) & (tile_y >= 0) & (tile_y < world.map_grid_size_y)
+
+        # Outside the world counts as a wall
+        hit = ~inside
+        hit[inside] = world.walls_at(tile_x[inside], tile_y[inside]) != 0
+        return np.bincount(owners[hit], minlength=len(xs)) > 0
+
+    def _kind_filter(self, kind):
+        if kind is None:
+            return None
+        entities = self._entities
+        return lambda entity_id: entities[entity_id].kind == kind
@@ -1,20 +1,45 @@
 import math
-from src.models.constants import (PLAYER_INITIAL_X, PLAYER_INITIAL_Y, PLAYER_INITIAL_ANGLE, PLAYER_ROTATION_SPEED,
-                                  PLAYER_MOVE_SPEED, PLAYER_COLOR, RENDER_FOV)
+from src.models.settings import get_settings
 
 
 class Player:
-    def __init__(self, x=PLAYER_INITIAL_X, y=PLAYER_INITIAL_Y, angle=PLAYER_INITIAL_ANGLE):
-        self.x = x
-        self.y = y
-        self.angle = math.radians(angle)
-        self.rotation_scale = PLAYER_ROTATION_SPEED
-        self.move_speed = PLAYER_MOVE_SPEED
+    def __init__(self, x=None, y=None, angle=None):
+        # Defaults come from the settings, read when a player is created rather than when this module is imported
+        settings = get_settings()
+        self.x = x if x is not None else settings.PLAYER_INITIAL_X
+        self.y = y if y is not None else settings.PLAYER_INITIAL_Y
+        self.angle = math.radians(angle if angle is not None else settings.PLAYER_INITIAL_ANGLE)
+        self.rotation_scale = settings.PLAYER_ROTATION_SPEED
+        self.move_speed = settings.PLAYER_MOVE_SPEED
         self.dx, self.dy = math.cos(self.angle) * 5, math.sin(self.angle) * 5
-        self.color = PLAYER_COLOR
-        self.FOV = RENDER_FOV
+        self.color = settings.PLAYER_COLOR
+        self.FOV = settings.RENDER_FOV
         self.interact_distance = 25
 
+        # Pose at the start of the current simulation tick, frames are interpolated from it to the current pose
+        self.previous_x = self.x
+        self.previous_y = self.y
+        self.previous_angle = self.angle
+
+    def store_previous_pose(self):
+        self.previous_x = self.x
+        self.previous_y = self.y
+        self.previous_angle = self.angle
+
+    def interpolated_pose(self, alpha):
+        """(angle, x, y) between the previous pose (alpha = 0) and the current one (alpha = 1)."""
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+        y = self.previous_y + (self.y - self.previous_y) * alpha
+
+        # Turn the short way round, an unchanged angle is returned exactly
+        angle = self.previous_angle + math.remainder(self.angle - self.previous_angle, 2 * math.pi) * alpha
+        if angle < 0:
+            angle += 2 * math.pi
+        elif angle >= 2 * math.pi:
+            angle -= 2 * math.pi
+
+        return angle, x, y
+
     def update_angle(self, delta_angle):
         self.angle += delta_angle * self.rotation_scale
         self.angle = math.fmod(self.angle + 2 * math.pi, 2 * math.pi)
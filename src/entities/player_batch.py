@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.models.settings import get_settings
+
+
+class PlayerBatch:
+    def __init__(self, count, x=None, y=None, angle=None):
+        """
+        Many players stored as one NumPy array per attribute, every update applies to all of them at once.
+
+        Movement follows the same rules as Player, player i of the batch moves exactly like a Player would.
+
+        :param count: Number of players.
+        :param x: Initial X position, a scalar or one value per player. Defaults to PLAYER_INITIAL_X.
+        :param y: Initial Y position, a scalar or one value per player. Defaults to PLAYER_INITIAL_Y.
+        :param angle: Initial angle in degrees, a scalar or one value per player. Defaults to PLAYER_INITIAL_ANGLE.
+        """
+        settings = get_settings()
+        x = x if x is not None else settings.PLAYER_INITIAL_X
+        y = y if y is not None else settings.PLAYER_INITIAL_Y
+        angle = angle if angle is not None else settings.PLAYER_INITIAL_ANGLE
+
+        self.count = count
+        self.x = np.array(np.broadcast_to(np.asarray(x, dtype=np.float64), count))
+        self.y = np.array(np.broadcast_to(np.asarray(y, dtype=np.float64), count))
+        self.angle = np.radians(np.broadcast_to(np.asarray(angle, dtype=np.float64), count))
+        self.rotation_scale = settings.PLAYER_ROTATION_SPEED
+        self.move_speed = settings.PLAYER_MOVE_SPEED
+
+        self.dx = np.cos(self.angle) * 5
+        self.dy = np.sin(self.angle) * 5
+
+    @classmethod
+    def from_players(cls, players):
+        """Batch holding a copy of the pose of every Player."""
+        batch = cls(len(players))
+        batch.x[:] = [player.x for player in players]
+        batch.y[:] = [player.y for player in players]
+        batch.angle[:] = [player.angle for player in players]
+        batch.dx[:] = [player.dx for player in players]
+        batch.dy[:] = [player.dy for player in players]
+        return batch
+
+    def __len__(self):
+        return self.count
+
+    def update_angle(self, delta_angle, mask=None):
+        """Turn the players, `delta_angle` is a scalar or one value per player. Only the masked players turn."""
+        angle = np.fmod(self.angle + delta_angle * self.rotation_scale + 2 * np.pi, 2 * np.pi)
+        if mask is not None:
+            angle = np.where(mask, angle, self.angle)
+
+        self.angle = angle
+        self.dx = np.cos(angle) * 5
+        self.dy = np.sin(angle) * 5
+
+    def move_x(self, delta_time, mask):
+        """Move the masked players along their direction on the X axis, a negative delta_time moves backward."""
+        self.x += np.where(mask, self.dx * self.move_speed * delta_time, 0.0)
+
+    def move_y(self, delta_time, mask):
+        """Move the masked players along their direction on the Y axis, a negative delta_time moves backward."""
+        self.y += np.where(mask, self.dy * self.move_speed * delta_time, 0.0)
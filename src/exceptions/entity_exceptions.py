@@ -0,0 +1,8 @@
+class EntityNotFoundError(Exception):
+    """Raised when an entity id is not known"""
+    pass
+
+
+class EntityRadiusError(Exception):
+    """Raised when the radius of an entity is not valid"""
+    pass
@@ -0,0 +1,3 @@
+class ImageFormatError(Exception):
+    """Raised when an image file is not in a supported format"""
+    pass
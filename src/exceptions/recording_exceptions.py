@@ -0,0 +1,3 @@
+class RecordingFormatError(Exception):
+    """Raised when an input recording is not valid"""
+    pass
@@ -0,0 +1,3 @@
+class RenderWorkerError(Exception):
+    """Raised when a render worker process stopped responding"""
+    pass
@@ -0,0 +1,94 @@
+# /src/logging/frame_profiler.py
+
+import time
+from collections import deque
+
+import numpy as np
+
+PROFILER_HISTORY = 240  # Samples kept per stage, 4 seconds at 60 FPS
+
+
+class FrameProfiler:
+    def __init__(self, history=PROFILER_HISTORY, enabled=False):
+        """
+        Duration of the stages of every frame, kept in fixed size ring buffers.
+
+        Callers check `enabled` once per frame and skip timing entirely when it is off, so a disabled profiler costs
+        a single attribute read per frame.
+
+        :param history: Number of samples kept per stage, older samples are dropped.
+        :param enabled: Whether stages are timed from the start.
+        """
+        self.history = history
+        self.enabled = enabled
+
+        self._samples = {}
+
+    def record(self, stage, seconds):
+        """Add a duration in seconds to a stage."""
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.history)
+        samples.append(seconds)
+
+    def run_stages(self, stages, frame_stage=None):
+        """
+        Call every (name, function) of `stages` in order, timing each one when the profiler is enabled.
+
+        :param stages: Sequence of (stage name, callable without arguments).
+        :param frame_stage: Optional name under which the duration of the whole sequence is recorded.
+        """
+        if not self.enabled:
+            for _, stage in stages:
+                stage()
+            return
+
+        perf_counter = time.perf_counter
+        frame_start = perf_counter()
+        for name, stage in stages:
+            start = perf_counter()
+            stage()
+            self.record(name, perf_counter() - start)
+
+        if frame_stage is not None:
+            self.record(frame_stage, perf_counter() - frame_start)
+
+    def stages(self):
+        return list(self._samples)
+
+    def stats(self, stage):
+        """
+        Statistics of the samples of a stage in milliseconds, None if the stage was never recorded.
+
+        :return: A dict with count, last, min, mean, p95, p99 and max.
+        """
+        samples = self._samples.get(stage)
+        if not samples:
+            return None
+
+        values = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1000
+        p95, p99 = np.percentile(values, (95, 99))
+        return {
+            'count': len(values),
+            'last': float(values[-1]),
+            'min': float(values.min()),
+            'mean': float(values.mean()),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(values.max()),
+        }
+
+    def snapshot(self):
+        """Statistics of every stage, a plain dict that can be serialized to JSON."""
+        return {stage: self.stats(stage) for stage in self._samples}
+
+    def reset(self):
+        self._samples.clear()
+
+
+_profiler = FrameProfiler()
+
+
+def get_profiler():
+    """The profiler shared by the game loop and the renderer, for tools that poll it."""
+    return _profiler
@@ -0,0 +1,218 @@
+# /src/models/settings.py
+
+import os
+import sys
+import warnings
+from collections import namedtuple
+
+from src.exceptions.constant_exceptions import SettingKeyValueError
+
+VERSION = '0.0.1'
+
+# Environment variable pointing to another config file, used instead of the one of the project
+CONFIG_PATH_ENV = 'RAYCASTER_CONFIG'
+
+Setting = namedtuple('Setting', ['name', 'type', 'default'])
+
+# Every setting of the game with its type and default value, a config file only lists the values it overrides
+SETTINGS = (
+    # Window size
+    Setting('WINDOW_WIDTH', 'int', 1024),
+    Setting('WINDOW_HEIGHT', 'int', 512),
+    Setting('WINDOW_TITLE', 'str', 'Raycaster ' + VERSION),
+
+    # World Settings
+    Setting('MAP_GRID_X', 'int', 8),  # Number of tiles in X axis of the world
+    Setting('MAP_GRID_Y', 'int', 8),  # Number of tiles in Y axis of the world
+    Setting('MAP_TILE_SIZE', 'int', 64),  # Width and height of a tile in world units
+
+    # Player Settings
+    Setting('PLAYER_INITIAL_X', 'float', 300.0),
+    Setting('PLAYER_INITIAL_Y', 'float', 300.0),
+    Setting('PLAYER_INITIAL_ANGLE', 'int', 180),
+    Setting('PLAYER_ROTATION_SPEED', 'int', 35),
+    Setting('PLAYER_MOVE_SPEED', 'int', 25),
+    Setting('PLAYER_COLOR', 'tuple', (1, 1, 0)),
+
+    # Game loop Settings
+    Setting('GAME_TICK_RATE', 'int', 60),  # Simulation ticks per second
+    Setting('GAME_MAX_CATCH_UP_TICKS', 'int', 5),  # Most ticks run between two frames, the game slows down past that
+
+    # Render Settings
+    Setting('RENDER_FOV', 'int', 60),
+    Setting('RENDER_MODE', 'str', 'immediate'),  # 'immediate' or 'batched'
+    Setting('RENDER_VIEW_DISTANCE', 'int', 0),  # Maximum distance a ray travels in tiles, 0 for unlimited
+    Setting('RENDER_WORKERS', 'int', 0),  # Processes casting the batched view in parallel, 0 for the main process
+    Setting('RENDER_MAX_FPS', 'int', 0),  # Most frames rendered per second, 0 for no limit
+
+    # Debug Settings
+    Setting('DEBUG_LOG_TO_CONSOLE', 'bool', True),
+)
+SETTINGS_BY_NAME = {setting.name: setting for setting in SETTINGS}
+
+TRUE_STRINGS = ('true', '1', 'yes', 'on')
+FALSE_STRINGS = ('false', '0', 'no', 'off')
+
+# Parsed config files, keyed by path, with the modification time and size they were parsed at
+_cache = {}
+
+
+class Settings:
+    def __init__(self, values, source=None):
+        """
+        Typed, read-only values of every setting, read as attributes (settings.RENDER_FOV).
+
+        :param values: Dictionary of setting name to value, settings missing from it keep their default.
+        :param source: Path of the config file the values were read from, None for the defaults.
+        """
+        self._values = {setting.name: setting.default for setting in SETTINGS}
+        self._values.update(values)
+        self.source = source
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_values'][name]
+        except KeyError:
+            raise AttributeError(f"There is no setting named {name}") from None
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(self._values)
+
+    def as_dict(self):
+        return dict(self._values)
+
+
+def default_config_path():
+    """config/config.xml next to the game, the executable for a frozen build or the project root otherwise."""
+    if getattr(sys, 'frozen', False):
+        root = os.path.dirname(sys.executable)
+    else:
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    return os.path.join(root, 'config', 'config.xml')
+
+
+def get_settings(file_path=None):
+    """
+    The settings of the game, the config file is parsed on first use and the result is cached.
+
+    The file is only parsed again once its modification time or size changed. Nothing is written or printed: a
+    missing file gives the defaults, a malformed file gives the defaults with a warning, and invalid entries are
+    skipped with a warning.
+
+    :param file_path: Config file to read, defaults to the one named by the RAYCASTER_CONFIG environment variable,
+                      then to default_config_path().
+    """
+    if file_path is None:
+        file_path = os.environ.get(CONFIG_PATH_ENV) or default_config_path()
+
+    try:
+        status = os.stat(file_path)
+        stamp = (status.st_mtime_ns, status.st_size)
+    except OSError:
+        stamp = None
+
+    cached = _cache.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    if stamp is None:
+        settings = Settings({})
+    else:
+        settings = Settings(read_config(file_path), file_path)
+
+    _cache[file_path] = (stamp, settings)
+    return settings
+
+
+def clear_settings_cache():
+    """Forget every parsed config file, the next get_settings parses its file again."""
+    _cache.clear()
+
+
+def read_config(file_path):
+    """Typed values of the valid entries of a config file, as a dictionary of setting name to value."""
+    import xml.etree.ElementTree as ET  # Only paid for when a config file exists
+
+    try:
+        root = ET.parse(file_path).getroot()
+    except ET.ParseError as e:
+        warnings.warn(f"{file_path}: Could not parse the config file, using the default settings ({e})", stacklevel=2)
+        return {}
+
+    values = {}
+    for variable in root.iter('variable'):
+        name = variable.get('name')
+        try:
+            values[name] = parse_entry(name, variable.findtext('value'), variable.findtext('type'))
+        except SettingKeyValueError as e:
+            warnings.warn(f"{file_path}: {e}", stacklevel=2)
+
+    return values
+
+
+def parse_entry(name, value_text, value_type):
+    setting = SETTINGS_BY_NAME.get(name)
+    if setting is None:
+        raise SettingKeyValueError(f"Could not set {name}, there is no setting with this name")
+
+    if value_type is not None and value_type != setting.type:
+        raise SettingKeyValueError(f"Could not set {name} to {value_text}, {name} is a {setting.type}, not a "
+                                   f"{value_type}")
+
+    try:
+        return parse_value(value_text if value_text is not None else '', setting.type)
+    except ValueError as e:
+        raise SettingKeyValueError(f"Could not set {name} to {value_text}, {e}") from None
+
+
+def parse_value(text, value_type):
+    if value_type == 'int':
+        return int(text)
+    if value_type == 'float':
+        return float(text)
+    if value_type == 'str':
+        return text
+    if value_type == 'bool':
+        lowered = text.strip().lower()
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+        raise ValueError(f"'{text}' is not a boolean")
+    if value_type == 'tuple':
+        return tuple(int(item) for item in text.strip().strip('()').split(',') if item.strip())
+
+    raise ValueError(f"unsupported type '{value_type}'")
+
+
+def write_config(file_path=None, settings=None):
+    """
+    Write a config file holding every setting. Only called on request, never when the game starts.
+
+    :param file_path: Path of the file, defaults to default_config_path(). Missing directories are created.
+    :param settings: Settings to write, the defaults when not given.
+    """
+    import xml.etree.ElementTree as ET
+
+    if file_path is None:
+        file_path = default_config_path()
+    values = settings.as_dict() if settings is not None else {setting.name: setting.default for setting in SETTINGS}
+
+    config = ET.Element('config')
+    for setting in SETTINGS:
+        variable = ET.SubElement(config, 'variable', name=setting.name)
+        ET.SubElement(variable, 'value').text = str(values[setting.name])
+        ET.SubElement(variable, 'type').text = setting.type
+    ET.indent(config)
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    ET.ElementTree(config).write(file_path)
+    clear_settings_cache()
+
+
+if __name__ == '__main__':
+    # python -m src.models.settings [path], writes a config file with the default settings
+    write_config(sys.argv[1] if len(sys.argv) > 1 else None)
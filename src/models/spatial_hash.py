@@ -0,0 +1,436 @@
+# /src/models/spatial_hash.py
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from src.exceptions.entity_exceptions import EntityNotFoundError
+
+# Most (position, point) pairs compared at once when the batch queries compare positions to every point
+BATCH_PAIRS = 1 << 20
+
+_PackedPoints = namedtuple('_PackedPoints', ['ids', 'xs', 'ys', 'cell_keys', 'cell_starts', 'cell_counts'])
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        """
+        Uniform grid of buckets holding the ids of points, for proximity queries that only look at nearby buckets.
+
+        With the cell size of the world tiles, a cell is a tile and tile queries read a single bucket. Only cells
+        holding at least one point are stored, so memory depends on the number of points and not on the map size.
+
+        :param cell_size: Width and height of a cell in world units.
+        """
+        self.cell_size = cell_size
+
+        self._cells = {}  # (cell x, cell y) -> set of ids
+        self._positions = {}  # id -> (x, y)
+        self._cell_of = {}  # id -> (cell x, cell y)
+
+        # Box holding every stored cell, only ever grown so it stays a valid bound after removals
+        self._bounds = None  # (min cell x, min cell y, max cell x, max cell y)
+
+        # Points packed into arrays sorted by cell for the batch queries, rebuilt after any change
+        self._version = 0
+        self._packed = None
+        self._packed_version = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def cell(self, x, y):
+        """Cell containing a world position."""
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def position(self, item_id):
+        try:
+            return self._positions[item_id]
+        except KeyError:
+            raise EntityNotFoundError(f"No entity with id {item_id}") from None
+
+    def insert(self, item_id, x, y):
+        if item_id in self._positions:
+            self.move(item_id, x, y)
+            return
+
+        cell = self.cell(x, y)
+        self._positions[item_id] = (x, y)
+        self._cell_of[item_id] = cell
+        self._add_to_cell(item_id, cell)
+        self._version += 1
+
+    def move(self, item_id, x, y):
+        """Update a position, the buckets are only touched when the point changes cell."""
+        old_cell = self._cell_of.get(item_id)
+        if old_cell is None:
+            raise EntityNotFoundError(f"Cannot move entity {item_id}, it is not in the spatial hash")
+
+        self._positions[item_id] = (x, y)
+        self._version += 1
+        cell = self.cell(x, y)
+        if cell != old_cell:
+            self._discard_from_cell(item_id, old_cell)
+            self._cell_of[item_id] = cell
+            self._add_to_cell(item_id, cell)
+
+    def remove(self, item_id):
+        cell = self._cell_of.pop(item_id, None)
+        if cell is None:
+            raise EntityNotFoundError(f"Cannot remove entity {item_id}, it is not in the spatial hash")
+
+        del self._positions[item_id]
+        self._discard_from_cell(item_id, cell)
+        self._version += 1
+
+    def query_tile(self, cell_x, cell_y):
+        """Ids of the points in a cell, a world tile when the cell size is the tile size."""
+        return list(self._cells.get((cell_x, cell_y), ()))
+
+    def query_tiles(self, cells_x, cells_y):
+        """query_tile for several cells, one list of ids per cell."""
+        return [self.query_tile(cell_x, cell_y) for cell_x, cell_y in zip(cells_x, cells_y)]
+
+    def query_radius(self, x, y, radius):
+        """Ids of the points within `radius` of (x, y)."""
+        radius_squared = radius * radius
+        positions = self._positions
+        found = []
+        for item_id in self._candidates(x, y, radius):
+            item_x, item_y = positions[item_id]
+            if (item_x - x) * (item_x - x) + (item_y - y) * (item_y - y) <= radius_squared:
+                found.append(item_id)
+
+        return found
+
+    def query_radius_batch(self, xs, ys, radius):
+        """
+        query_radius for many positions at once, one list of ids per position. Ids must be integers.
+
+        The candidate cells of every position are looked up together in the points packed by cell, and the distances
+        of every candidate are checked in one array operation.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if not self._positions or radius < 0 or not len(xs):
+            return [[] for _ in range(len(xs))]
+
+        packed = self._pack()
+        cell_size = self.cell_size
+        first_x = ((xs - radius) // cell_size).astype(np.int64)
+        first_y = ((ys - radius) // cell_size).astype(np.int64)
+        span = int(max(((xs + radius) // cell_size - first_x).max(initial=0),
+                       ((ys + radius) // cell_size - first_y).max(initial=0))) + 1
+
+        if span * span <= len(packed.cell_keys):
+            # Every cell of the square around every position, a position with a smaller square filters the extra
+            # cells out with the distance check
+            offsets = np.arange(span)
+            cells_x = first_x[:, None, None] + offsets[None, None, :]
+            cells_y = first_y[:, None, None] + offsets[None, :, None]
+            cells_x, cells_y = np.broadcast_arrays(cells_x, cells_y)
+            starts, stops = self._cell_ranges(packed, cells_x.ravel(), cells_y.ravel())
+            owners, points = _expand_ranges(starts, stops)
+            candidates = [(owners // (span * span), points)]
+        else:
+            # Few points spread over many cells, every point is a candidate of every position
+            candidates = _all_pairs(np.arange(len(xs)), len(packed.ids))
+
+        found_owners = []
+        found_ids = []
+        for owners, points in candidates:
+            dx = packed.xs[points] - xs[owners]
+            dy = packed.ys[points] - ys[owners]
+            within = dx * dx + dy * dy <= radius * radius
+            found_owners.append(owners[within])
+            found_ids.append(packed.ids[points[within]])
+        owners = np.concatenate(found_owners)
+        found = np.concatenate(found_ids).tolist()
+
+        # Owners are in increasing order, the ids of a position are contiguous
+        bounds = np.searchsorted(owners, np.arange(len(xs) + 1)).tolist()
+        return [found[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def nearest(self, x, y, max_distance=math.inf, predicate=None):
+        """
+        Closest point to (x, y), searching rings of cells outwards until no closer point can exist.
+
+        :param max_distance: Points further than this are ignored.
+        :param predicate: Optional callable taking an id, only ids for which it returns True are considered.
+        :return: (id, distance), or None if no point was found.
+        """
+        if not self._positions:
+            return None
+
+        center_x, center_y = self.cell(x, y)
+        cell_size = self.cell_size
+
+        # No stored cell is further than this ring, and no point within max_distance either
+        min_x, min_y, max_x, max_y = self._bounds
+        last_ring = max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y, 0)
+        if not math.isinf(max_distance):
+            last_ring = min(last_ring, int(max_distance // cell_size) + 1)
+
+        best_id = None
+        best_distance = max_distance
+        for ring in range(last_ring + 1):
+            # Every point of this ring is at least (ring - 1) cells away, the search can stop
+            if best_id is not None and (ring - 1) * cell_size > best_distance:
+                break
+
+            # Once a ring holds more cells than are stored, checking every point is cheaper than the remaining rings
+            last_search = 8 * ring > len(self._cells)
+            if last_search:
+                candidates = self._positions
+            else:
+                candidates = (item_id for cell in _ring_cells(center_x, center_y, ring)
+                              for item_id in self._cells.get(cell, ()))
+
+            for item_id in candidates:
+                if predicate is not None and not predicate(item_id):
+                    continue
+                item_x, item_y = self._positions[item_id]
+                distance = math.hypot(item_x - x, item_y - y)
+                # Ties go to the smallest id so the result does not depend on the bucket order
+                if distance < best_distance or (distance == best_distance
+                                                and (best_id is None or item_id < best_id)):
+                    best_id = item_id
+                    best_distance = distance
+
+            if last_search:
+                break
+
+        return None if best_id is None else (best_id, best_distance)
+
+    def nearest_batch(self, xs, ys, max_distance=math.inf, predicate=None):
+        """
+        nearest for many positions at once, one (id, distance) or None per position. Ids must be integers.
+
+        Rings of cells are searched outwards as in nearest, one ring of every position still searching at a time. Once
+        a ring holds more cells than there are stored cells, the remaining positions compare every point instead.
+
+        :param predicate: Optional callable taking an id, called once per stored point rather than per position.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if not self._positions:
+            return [None] * len(xs)
+
+        packed = self._pack()
+        eligible = None
+        if predicate is not None:
+            eligible = np.fromiter((bool(predicate(item_id)) for item_id in packed.ids.tolist()), dtype=bool,
+                                   count=len(packed.ids))
+
+        cell_size = self.cell_size
+        center_x = (xs // cell_size).astype(np.int64)
+        center_y = (ys // cell_size).astype(np.int64)
+
+        # No stored cell is further than this ring, and no point within max_distance either
+        min_x, min_y, max_x, max_y = self._bounds
+        last_ring = np.maximum.reduce([center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y,
+                                       np.zeros_like(center_x)])
+        if not math.isinf(max_distance):
+            last_ring = np.minimum(last_ring, int(max_distance // cell_size) + 1)
+
+        best = np.full(len(xs), -1, dtype=np.int64)  # Index of the closest point in the packed arrays
+        best_distance = np.full(len(xs), max_distance, dtype=np.float64)
+
+        searching = np.arange(len(xs))
+        ring = 0
+        while searching.size:
+            # Every point of this ring is at least (ring - 1) cells away, the search of a position can stop
+            done = (ring > last_ring[searching]) | ((best[searching] >= 0)
+                                                    & ((ring - 1) * cell_size > best_distance[searching]))
+            searching = searching[~done]
+            if not searching.size:
+                break
+
+            if (2 * ring + 1) ** 2 > len(packed.cell_keys):
+                for owners, points in _all_pairs(searching, len(packed.ids)):
+                    self._keep_nearest(packed, xs, ys, owners, points, eligible, best, best_distance)
+                break
+
+            ring_x, ring_y = _ring_offsets(ring)
+            cells_x = (center_x[searching, None] + ring_x).ravel()
+            cells_y = (center_y[searching, None] + ring_y).ravel()
+            starts, stops = self._cell_ranges(packed, cells_x, cells_y)
+            owners, points = _expand_ranges(starts, stops)
+            self._keep_nearest(packed, xs, ys, searching[owners // len(ring_x)], points, eligible, best,
+                               best_distance)
+            ring += 1
+
+        ids = packed.ids[np.maximum(best, 0)].tolist()
+        return [(item_id, distance) if index >= 0 else None
+                for item_id, distance, index in zip(ids, best_distance.tolist(), best.tolist())]
+
+    def pairs(self, max_distance):
+        """
+        Every pair of ids closer than or equal to `max_distance`, each pair once with the smaller id first.
+
+        Each cell is only compared with itself and half of its neighbours, so the cost grows with the number of
+        points and their local density, not with the square of the number of points.
+        """
+        span = max(1, math.ceil(max_distance / self.cell_size))
+        offsets = [(dx, dy) for dy in range(0, span + 1) for dx in range(-span, span + 1) if dy > 0 or dx > 0]
+        max_distance_squared = max_distance * max_distance
+        positions = self._positions
+
+        found = []
+        for (cell_x, cell_y), ids in self._cells.items():
+            ids = sorted(ids)
+            points = [(item_id, positions[item_id]) for item_id in ids]
+
+            # Pairs inside the cell
+            for i, (id_a, (ax, ay)) in enumerate(points):
+                for id_b, (bx, by) in points[i + 1:]:
+                    if (ax - bx) * (ax - bx) + (ay - by) * (ay - by) <= max_distance_squared:
+                        found.append((id_a, id_b))
+
+            # Pairs with the forward half of the neighbourhood, the other half finds this cell
+            for dx, dy in offsets:
+                neighbours = self._cells.get((cell_x + dx, cell_y + dy))
+                if not neighbours:
+                    continue
+                for id_b in neighbours:
+                    bx, by = positions[id_b]
+                    for id_a, (ax, ay) in points:
+                        if (ax - bx) * (ax - bx) + (ay - by) * (ay - by) <= max_distance_squared:
+                            found.append((id_a, id_b) if id_a < id_b else (id_b, id_a))
+
+        return found
+
+    def _pack(self):
+        # Every point in arrays sorted by cell, with the sorted keys of the stored cells and where their points start
+        if self._packed is not None and self._packed_version == self._version:
+            return self._packed
+
+        count = len(self._positions)
+        ids = np.fromiter(self._positions.keys(), dtype=np.int64, count=count)
+        positions = np.array(list(self._positions.values()), dtype=np.float64).reshape(count, 2)
+
+        keys = self._cell_keys((positions[:, 0] // self.cell_size).astype(np.int64),
+                               (positions[:, 1] // self.cell_size).astype(np.int64))
+        order = np.argsort(keys, kind='stable')
+        cell_keys, cell_starts, cell_counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+        self._packed = _PackedPoints(ids[order], positions[order, 0], positions[order, 1], cell_keys, cell_starts,
+                                     cell_counts)
+        self._packed_version = self._version
+        return self._packed
+
+    def _cell_keys(self, cells_x, cells_y):
+        # Row major index of cells within the bounds, cells outside of them get -1
+        min_x, min_y, max_x, max_y = self._bounds
+        inside = (cells_x >= min_x) & (cells_x <= max_x) & (cells_y >= min_y) & (cells_y <= max_y)
+        return np.where(inside, (cells_y - min_y) * (max_x - min_x + 1) + (cells_x - min_x), -1)
+
+    def _cell_ranges(self, packed, cells_x, cells_y):
+        # Range of the points of every cell in the packed arrays, empty for cells holding no point
+        keys = self._cell_keys(cells_x, cells_y)
+        index = np.minimum(np.searchsorted(packed.cell_keys, keys), len(packed.cell_keys) - 1)
+        stored = (keys >= 0) & (packed.cell_keys[index] == keys)
+        starts = np.where(stored, packed.cell_starts[index], 0)
+        return starts, starts + np.where(stored, packed.cell_counts[index], 0)
+
+    @staticmethod
+    def _keep_nearest(packed, xs, ys, owners, points, eligible, best, best_distance):
+        # Update the closest point of every owner with the candidate points, ties go to the smallest id
+        if eligible is not None:
+            keep = eligible[points]
+            owners = owners[keep]
+            points = points[keep]
+
+        distances = np.hypot(packed.xs[points] - xs[owners], packed.ys[points] - ys[owners])
+        ids = packed.ids[points]
+        order = np.lexsort((ids, distances, owners))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = owners[order[1:]] != owners[order[:-1]]
+        order = order[first]
+
+        owners = owners[order]
+        points = points[order]
+        distances = distances[order]
+        current = best[owners]
+        current_ids = packed.ids[np.maximum(current, 0)]
+        better = ((current < 0) & (distances <= best_distance[owners])) | (distances < best_distance[owners]) | (
+                (distances == best_distance[owners]) & (current >= 0) & (ids[order] < current_ids))
+
+        best[owners[better]] = points[better]
+        best_distance[owners[better]] = distances[better]
+
+    def _candidates(self, x, y, radius):
+        min_x, min_y = self.cell(x - radius, y - radius)
+        max_x, max_y = self.cell(x + radius, y + radius)
+        cells = self._cells
+
+        # Few points spread over many cells, scanning the stored cells is cheaper than visiting every cell
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            for (cell_x, cell_y), ids in cells.items():
+                if min_x <= cell_x <= max_x and min_y <= cell_y <= max_y:
+                    yield from ids
+            return
+
+        for cell_y in range(min_y, max_y + 1):
+            for cell_x in range(min_x, max_x + 1):
+                yield from cells.get((cell_x, cell_y), ())
+
+    def _add_to_cell(self, item_id, cell):
+        ids = self._cells.get(cell)
+        if ids is None:
+            ids = self._cells[cell] = set()
+            cell_x, cell_y = cell
+            if self._bounds is None:
+                self._bounds = (cell_x, cell_y, cell_x, cell_y)
+            else:
+                min_x, min_y, max_x, max_y = self._bounds
+                self._bounds = (min(min_x, cell_x), min(min_y, cell_y), max(max_x, cell_x), max(max_y, cell_y))
+        ids.add(item_id)
+
+    def _discard_from_cell(self, item_id, cell):
+        ids = self._cells[cell]
+        ids.discard(item_id)
+        if not ids:
+            del self._cells[cell]
+            if not self._cells:
+                self._bounds = None
+
+
+def _ring_offsets(ring):
+    """(dx, dy) arrays of the cells of _ring_cells around (0, 0)."""
+    cells = np.array(list(_ring_cells(0, 0, ring)), dtype=np.int64).reshape(-1, 2)
+    return cells[:, 0], cells[:, 1]
+
+
+def _all_pairs(queries, count):
+    """(queries, point indices) of every query with each of `count` points, in chunks of at most BATCH_PAIRS."""
+    step = max(1, BATCH_PAIRS // count)
+    for start in range(0, len(queries), step):
+        chunk = queries[start:start + step]
+        yield np.repeat(chunk, count), np.tile(np.arange(count), len(chunk))
+
+
+def _expand_ranges(starts, stops):
+    """Concatenate the ranges [start, stop), returns the index of the range of every value and the values."""
+    lengths = np.maximum(stops - starts, 0)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    return owner, np.arange(len(owner)) - offsets[owner] + starts[owner]
+
+
+def _ring_cells(center_x, center_y, ring):
+    # Cells on the border of the square of half width `ring` around the center
+    if ring == 0:
+        yield center_x, center_y
+        return
+
+    for cell_x in range(center_x - ring, center_x + ring + 1):
+        yield cell_x, center_y - ring
+        yield cell_x, center_y + ring
+    for cell_y in range(center_y - ring + 1, center_y + ring):
+        yield center_x - ring, cell_y
+        yield center_x + ring, cell_y
@@ -1,24 +1,81 @@
-from src.models.constants import MAP_GRID_SIZE, MAP_GRID_X, MAP_GRID_Y
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+from src.models.settings import get_settings
+from src.models.world_storage import ChunkedGrid, grid_from_values, open_map_file
 from src.exceptions.world_exceptions import *
 
+DEFAULT_MAP = [
+    2, 2, 2, 2, 2, 2, 2, 2,
+    2, 0, 1, 0, 0, 2, 0, 1,
+    2, 0, 1, 0, 0, 0, 0, 1,
+    2, 0, 4, 0, 0, 2, 0, 1,
+    2, 0, 1, 0, 0, 0, 0, 1,
+    2, 0, 4, 0, 0, 1, 0, 1,
+    2, 0, 1, 0, 0, 1, 0, 1,
+    2, 1, 1, 1, 1, 1, 1, 1,
+]
+DEFAULT_MAP_X = 8
+DEFAULT_MAP_Y = 8
+
+# Number of tile changes kept for consumers that poll with changes_since
+JOURNAL_SIZE = 4096
+
+TileChange = namedtuple('TileChange', ['x', 'y', 'old_value', 'new_value', 'version'])
+
 
 class World:
-    def __init__(self):
-        self.__x = MAP_GRID_X
-        self.__y = MAP_GRID_Y
-        self.__scale = MAP_GRID_SIZE
-        self.__map_grid_walls = [
-            2, 2, 2, 2, 2, 2, 2, 2,
-            2, 0, 1, 0, 0, 2, 0, 1,
-            2, 0, 1, 0, 0, 0, 0, 1,
-            2, 0, 4, 0, 0, 2, 0, 1,
-            2, 0, 1, 0, 0, 0, 0, 1,
-            2, 0, 4, 0, 0, 1, 0, 1,
-            2, 0, 1, 0, 0, 1, 0, 1,
-            2, 1, 1, 1, 1, 1, 1, 1,
-        ]
+    def __init__(self, size_x=None, size_y=None, tile_size=None, walls=None):
+        """
+        A grid of tiles, a tile value of 0 is empty and anything greater is a wall (value - 1 is its texture).
+
+        :param size_x: Number of tiles in the X axis, defaults to MAP_GRID_X.
+        :param size_y: Number of tiles in the Y axis, defaults to MAP_GRID_Y.
+        :param tile_size: Width and height of a tile in world units, defaults to MAP_TILE_SIZE.
+        :param walls: Row major list or array of tile values, or a ChunkedGrid. Defaults to the built-in map, or to
+                      an empty map enclosed by walls when the size differs from the built-in one.
+        """
+        if size_x is None or size_y is None or tile_size is None:
+            settings = get_settings()
+            size_x = size_x if size_x is not None else settings.MAP_GRID_X
+            size_y = size_y if size_y is not None else settings.MAP_GRID_Y
+            tile_size = tile_size if tile_size is not None else settings.MAP_TILE_SIZE
+
+        if size_x <= 0 or size_y <= 0:
+            raise WorldSizeError(f"The world size must be positive, got ({size_x}, {size_y})")
+
+        if tile_size <= 0:
+            raise WorldScaleError(f"The tile size must be positive, got {tile_size}")
+
+        self.__x = size_x
+        self.__y = size_y
+        self.__scale = tile_size
+
+        if walls is None:
+            if (size_x, size_y) == (DEFAULT_MAP_X, DEFAULT_MAP_Y):
+                walls = list(DEFAULT_MAP)
+            else:
+                walls = enclosed_map(size_x, size_y)
+
+        # Change journal, every edit bumps the version and is pushed to the listeners
+        self.__version = 0
+        self.__journal = deque(maxlen=JOURNAL_SIZE)
+        self.__listeners = []
+        self.__pending_changes = None
+
+        self.__map_grid_walls = None
+        self.map_grid_walls = walls
         self.__is_updated = False
 
+    @classmethod
+    def from_map_file(cls, file_path, mode='c'):
+        """
+        Open a binary map file (see world_storage.create_map_file) without reading it, tiles are paged in from disk
+        as they are used. With the default copy on write mode, edits stay in memory and the file is left untouched.
+        """
+        grid, tile_size = open_map_file(file_path, mode)
+        return cls(grid.size_x, grid.size_y, tile_size, grid)
+
     @property
     def map_grid_size_x(self):
         return self.__x
@@ -29,6 +86,7 @@ class World:
 
     @property
     def map_grid_size(self):
+        """Width and height of a tile in world units."""
         return self.__scale
 
     @property
@@ -41,17 +99,33 @@ class World:
         if len(new_map) == 0:
             raise WorldMapError("The map cannot be empty")
 
-        # Check that the map is an array of integers and throw a new error if not
-        if not all(isinstance(item, int) for item in new_map):
-            raise WorldMapError("The map must be an array of integers")
+        if isinstance(new_map, ChunkedGrid):
+            # Typed storage, checking the dtype validates every tile at once
+            if new_map.dtype.kind != 'u':
+                raise WorldMapError("The map must be an array of integers")
 
-        # Check that the world map conforms to the world size
-        if len(new_map) != self.map_grid_size_x * self.map_grid_size_y:
-            raise WorldMapError("The map must be the same size as the world, have you checked that the world map is "
-                                "coherent with WORLD_SIZE_X and WORLD_SIZE_Y?")
+            if (new_map.size_x, new_map.size_y) != (self.map_grid_size_x, self.map_grid_size_y):
+                raise WorldMapError("The map must be the same size as the world, have you checked that the world map "
+                                    "is coherent with MAP_GRID_X and MAP_GRID_Y?")
+        else:
+            # Lists and arrays are validated by dtype while being copied into chunked storage
+            new_map = grid_from_values(new_map, self.map_grid_size_x, self.map_grid_size_y)
 
+        replaced = self.__map_grid_walls is not None
         self.__map_grid_walls = new_map
 
+        if replaced:
+            # Every tile may have changed, the journal can no longer describe the edits
+            self.__version += 1
+            self.__journal.clear()
+            self.__is_updated = True
+            self._notify(None)
+
+    @property
+    def version(self):
+        """Incremented on every edit, consumers can compare it to know whether the world changed."""
+        return self.__version
+
     @property
     def is_updated(self):
         update_return = self.__is_updated
@@ -65,14 +139,91 @@ class World:
     def is_updated(self, value):
         self.__is_updated = value
 
+    def walls_at(self, xs, ys):
+        """Tile values at arrays of tile coordinates, the coordinates must be within the world."""
+        return self.__map_grid_walls.lookup(xs, ys)
+
     def update_wall_at_position(self, x, y, new_value):
         # Check that the x and y values are within the world bounds
-        if x < 0 or x > self.map_grid_size_x or y < 0 or y > self.map_grid_size_y:
+        if x < 0 or x >= self.map_grid_size_x or y < 0 or y >= self.map_grid_size_y:
             raise WorldMapError(f"Cannot update wall at position ({x}, {y}), the position is out of bounds")
 
         # Check that the new value is an integer
         if not isinstance(new_value, int):
             raise WorldMapError(f"Cannot update wall at position ({x}, {y}), the new value must be an integer")
 
+        old_value = self.__map_grid_walls.get(x, y)
+        if old_value == new_value:
+            return
+
         # Update the value
-        self.__map_grid_walls[y * self.map_grid_size_x + x] = new_value
+        self.__map_grid_walls.set(x, y, new_value)
+
+        self.__version += 1
+        change = TileChange(x, y, old_value, new_value, self.__version)
+        self.__journal.append(change)
+        self.__is_updated = True
+
+        if self.__pending_changes is not None:
+            self.__pending_changes.append(change)
+        else:
+            self._notify([change])
+
+    def add_change_listener(self, listener):
+        """
+        Register a callable notified on the same frame the world is edited.
+
+        The listener receives a list of TileChange, or None when the whole map was replaced and every tile must be
+        considered changed. Each listener gets its own notification, so consumers never consume each other's changes.
+        """
+        self.__listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        self.__listeners.remove(listener)
+
+    def changes_since(self, version):
+        """
+        Tile changes made after `version`, for consumers that poll instead of listening.
+
+        :return: A list of TileChange, or None when the changes are no longer in the journal and the consumer has to
+                 rebuild from the whole map.
+        """
+        if version == self.__version:
+            return []
+
+        if not self.__journal or self.__journal[0].version > version + 1:
+            return None
+
+        return [change for change in self.__journal if change.version > version]
+
+    @contextmanager
+    def batched_changes(self):
+        """Group the edits made inside the block into a single notification sent when the block exits."""
+        if self.__pending_changes is not None:
+            yield
+            return
+
+        self.__pending_changes = []
+        try:
+            yield
+        finally:
+            changes, self.__pending_changes = self.__pending_changes, None
+            if changes:
+                self._notify(changes)
+
+    def _notify(self, changes):
+        for listener in list(self.__listeners):
+            listener(changes)
+
+
+def enclosed_map(size_x, size_y, wall=1):
+    """Row major map of empty tiles surrounded by a border of walls."""
+    walls = [0] * (size_x * size_y)
+    for x in range(size_x):
+        walls[x] = wall
+        walls[(size_y - 1) * size_x + x] = wall
+    for y in range(size_y):
+        walls[y * size_x] = wall
+        walls[y * size_x + size_x - 1] = wall
+
+    return walls
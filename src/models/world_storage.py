@@ -0,0 +1,228 @@
+# /src/models/world_storage.py
+
+import math
+import struct
+
+import numpy as np
+
+from src.exceptions.world_exceptions import WorldMapError, WorldSizeError
+
+MAP_FILE_MAGIC = b'RCMAP\x00'
+MAP_FILE_VERSION = 1
+
+# magic, version, dtype code, chunk size, size x, size y, tile size
+MAP_FILE_HEADER = struct.Struct('<6sHBHIII')
+MAP_FILE_HEADER_SIZE = 64  # The header is padded so the chunk data stays aligned
+
+DTYPE_CODES = {1: np.uint8, 2: np.uint16}
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+class ChunkedGrid:
+    def __init__(self, size_x, size_y, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.uint8, buffer=None, offset=0):
+        """
+        Typed tile storage split into square chunks, every chunk is contiguous in memory.
+
+        Reading a region of the map only touches the chunks that cover it, which keeps memory mapped maps cheap to
+        open: pages are only loaded from disk once a chunk is read.
+
+        :param size_x: Number of tiles in the X axis.
+        :param size_y: Number of tiles in the Y axis.
+        :param chunk_size: Width and height of a chunk in tiles, must be a power of two.
+        :param dtype: Unsigned integer type of a tile.
+        :param buffer: Object exposing the buffer protocol holding the chunks (bytearray, mmap, shared memory...),
+                       a new zeroed buffer is allocated when not given.
+        :param offset: Byte offset of the first chunk in the buffer.
+        """
+        if size_x <= 0 or size_y <= 0:
+            raise WorldSizeError(f"The world size must be positive, got ({size_x}, {size_y})")
+
+        if chunk_size <= 0 or chunk_size & (chunk_size - 1):
+            raise WorldMapError(f"The chunk size must be a power of two, got {chunk_size}")
+
+        self.size_x = size_x
+        self.size_y = size_y
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+
+        self.chunks_x = math.ceil(size_x / chunk_size)
+        self.chunks_y = math.ceil(size_y / chunk_size)
+
+        self._shift = chunk_size.bit_length() - 1
+        self._mask = chunk_size - 1
+
+        shape = (self.chunks_y, self.chunks_x, chunk_size, chunk_size)
+        if buffer is None:
+            buffer = bytearray(self.chunks_y * self.chunks_x * chunk_size * chunk_size * self.dtype.itemsize)
+
+        self.buffer = buffer
+        self.chunks = np.ndarray(shape, dtype=self.dtype, buffer=buffer, offset=offset)
+
+        # Flat view of the chunks, indexing a memoryview is much faster than indexing NumPy for single tiles
+        self._cells = memoryview(self.chunks.reshape(-1)).cast(self.dtype.char)
+
+    @property
+    def nbytes(self):
+        return self.chunks.nbytes
+
+    def __len__(self):
+        return self.size_x * self.size_y
+
+    def __getitem__(self, index):
+        # Row major index, like the map lists used by World
+        return self._cells[self._offset(*self._position(index))]
+
+    def __setitem__(self, index, value):
+        self._cells[self._offset(*self._position(index))] = value
+
+    def __iter__(self):
+        for y in range(self.size_y):
+            yield from self.row(y).tolist()
+
+    def get(self, x, y):
+        self._check_tile(x, y)
+        return self._cells[self._offset(x, y)]
+
+    def set(self, x, y, value):
+        self._check_tile(x, y)
+        self._cells[self._offset(x, y)] = value
+
+    def lookup(self, xs, ys):
+        """Tile values at arrays of coordinates, the coordinates must be within the grid."""
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        return self.chunks[ys >> self._shift, xs >> self._shift, ys & self._mask, xs & self._mask]
+
+    def row(self, y):
+        chunk_row = self.chunks[y >> self._shift, :, y & self._mask, :]
+        return chunk_row.reshape(-1)[:self.size_x]
+
+    def to_array(self):
+        """Copy of the whole grid as a (size_y, size_x) array."""
+        grid = self.chunks.transpose(0, 2, 1, 3).reshape(self.chunks_y * self.chunk_size, -1)
+        return np.ascontiguousarray(grid[:self.size_y, :self.size_x])
+
+    def fill(self, values):
+        """
+        Copy a row major sequence or a (size_y, size_x) array of tile values into the grid.
+
+        Validation is done once on the whole array rather than per tile.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind not in 'iub':
+            raise WorldMapError("The map must be an array of integers")
+
+        if values.size != self.size_x * self.size_y:
+            raise WorldMapError("The map must be the same size as the world, have you checked that the world map is "
+                                "coherent with MAP_GRID_X and MAP_GRID_Y?")
+
+        if values.size and (values.min() < 0 or values.max() > np.iinfo(self.dtype).max):
+            raise WorldMapError(f"The map values must fit in {self.dtype.name}")
+
+        values = values.reshape(self.size_y, self.size_x)
+        for chunk_y in range(self.chunks_y):
+            y0 = chunk_y * self.chunk_size
+            rows = values[y0:y0 + self.chunk_size]
+            for chunk_x in range(self.chunks_x):
+                x0 = chunk_x * self.chunk_size
+                block = rows[:, x0:x0 + self.chunk_size]
+                self.chunks[chunk_y, chunk_x, :block.shape[0], :block.shape[1]] = block
+
+    def flush(self):
+        """Write changes back to the file when the grid is memory mapped with mode 'r+'."""
+        if hasattr(self.buffer, 'flush'):
+            self.buffer.flush()
+
+    def _position(self, index):
+        # Negative indices count from the end and anything else outside the grid raises, like indexing a list. The
+        # chunks are padded to whole chunks, so an unchecked index would read padding instead of failing
+        size = self.size_x * self.size_y
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"Tile index out of range for a {self.size_x}x{self.size_y} grid")
+
+        y, x = divmod(index, self.size_x)
+        return x, y
+
+    def _check_tile(self, x, y):
+        if not (0 <= x < self.size_x and 0 <= y < self.size_y):
+            raise IndexError(f"Tile ({x}, {y}) is outside the {self.size_x}x{self.size_y} grid")
+
+    def _offset(self, x, y):
+        chunk = (y >> self._shift) * self.chunks_x + (x >> self._shift)
+        row = (chunk << self._shift) + (y & self._mask)
+        return (row << self._shift) + (x & self._mask)
+
+
+def grid_from_values(values, size_x, size_y, chunk_size=DEFAULT_CHUNK_SIZE):
+    """In memory ChunkedGrid holding a row major sequence of tile values."""
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iub':
+        raise WorldMapError("The map must be an array of integers")
+
+    dtype = np.uint8 if values.size == 0 or values.max() <= np.iinfo(np.uint8).max else np.uint16
+    grid = ChunkedGrid(size_x, size_y, chunk_size, dtype)
+    grid.fill(values)
+
+    return grid
+
+
+def create_map_file(file_path, size_x, size_y, tile_size, values=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    dtype=np.uint8):
+    """
+    Write a binary map file. Without values the file is created sparse, every tile being empty.
+
+    :param values: Optional row major sequence or (size_y, size_x) array of tile values.
+    """
+    dtype = np.dtype(dtype)
+    dtype_code = next((code for code, code_dtype in DTYPE_CODES.items() if np.dtype(code_dtype) == dtype), None)
+    if dtype_code is None:
+        raise WorldMapError(f"Unsupported map dtype {dtype.name}")
+
+    header = MAP_FILE_HEADER.pack(MAP_FILE_MAGIC, MAP_FILE_VERSION, dtype_code, chunk_size, size_x, size_y,
+                                  tile_size)
+    grid_size = math.ceil(size_x / chunk_size) * math.ceil(size_y / chunk_size) * chunk_size * chunk_size
+
+    with open(file_path, 'wb') as f:
+        f.write(header.ljust(MAP_FILE_HEADER_SIZE, b'\x00'))
+        f.truncate(MAP_FILE_HEADER_SIZE + grid_size * dtype.itemsize)
+
+    if values is not None:
+        grid, _ = open_map_file(file_path, mode='r+')
+        grid.fill(values)
+        grid.flush()
+
+
+def open_map_file(file_path, mode='c'):
+    """
+    Memory map a binary map file, only the header is read up front.
+
+    :param mode: 'r' for read only, 'r+' to write changes back to the file, 'c' (default) for private copy on write
+                 pages, so edits such as opening doors work without touching the file.
+    :return: (ChunkedGrid, tile size)
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(MAP_FILE_HEADER_SIZE)
+
+    if len(header) < MAP_FILE_HEADER.size:
+        raise WorldMapError(f"{file_path} is not a map file")
+
+    magic, version, dtype_code, chunk_size, size_x, size_y, tile_size = MAP_FILE_HEADER.unpack_from(header)
+    if magic != MAP_FILE_MAGIC:
+        raise WorldMapError(f"{file_path} is not a map file")
+
+    if version != MAP_FILE_VERSION:
+        raise WorldMapError(f"Unsupported map file version {version} in {file_path}")
+
+    if dtype_code not in DTYPE_CODES:
+        raise WorldMapError(f"Unsupported map dtype code {dtype_code} in {file_path}")
+
+    dtype = np.dtype(DTYPE_CODES[dtype_code])
+    chunks_x = math.ceil(size_x / chunk_size)
+    chunks_y = math.ceil(size_y / chunk_size)
+    data = np.memmap(file_path, dtype=dtype, mode=mode, offset=MAP_FILE_HEADER_SIZE,
+                     shape=(chunks_y * chunks_x * chunk_size * chunk_size,))
+
+    return ChunkedGrid(size_x, size_y, chunk_size, dtype, buffer=data), tile_size
@@ -0,0 +1,28 @@
+# /src/renderer/__init__.py
+#
+# The windowed renderer needs PyOpenGL. It is only imported the first time one of its names is used, so the
+# raycasters, the software renderer and the textures of this package load without any graphics dependency.
+
+import importlib
+
+# Names of this package served by modules importing OpenGL
+_GL_EXPORTS = {
+    'Renderer': 'src.renderer.renderer',
+    'RENDER_MODE_IMMEDIATE': 'src.renderer.renderer',
+    'RENDER_MODE_BATCHED': 'src.renderer.renderer',
+    'Minimap': 'src.renderer.minimap',
+}
+
+
+def __getattr__(name):
+    module_name = _GL_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Later lookups skip this function
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_GL_EXPORTS))
@@ -0,0 +1,213 @@
+# /src/renderer/batch_raycaster.py
+
+import math
+
+import numpy as np
+
+from src.renderer.ray_tables import get_ray_tables, EPSILON
+from src.renderer.raycaster import view_distance, SIDE_HORIZONTAL, SIDE_VERTICAL  # noqa
+
+TEXTURE_SIZE = 32
+
+
+class RaycastResult:
+    def __init__(self, ray_angle, distance, hit_x, hit_y, wall_id, side, texture_u):
+        """
+        Per-column results of a batch raycast. Every attribute is an array with one entry per screen column.
+
+        :param ray_angle: Angle of each ray in radians, in the range [0, 2 * pi).
+        :param distance: Euclidean distance from the origin to the hit, math.inf if the ray hit nothing.
+        :param hit_x: X coordinate of the hit.
+        :param hit_y: Y coordinate of the hit.
+        :param wall_id: Texture index of the wall that was hit (map value - 1).
+        :param side: SIDE_HORIZONTAL or SIDE_VERTICAL.
+        :param texture_u: Texture column to sample for the hit.
+        """
+        self.ray_angle = ray_angle
+        self.distance = distance
+        self.hit_x = hit_x
+        self.hit_y = hit_y
+        self.wall_id = wall_id
+        self.side = side
+        self.texture_u = texture_u
+
+    def __len__(self):
+        return len(self.distance)
+
+    @property
+    def shade(self):
+        """Shade multiplier matching the values yielded by raycaster_2d."""
+        return np.where(self.side == SIDE_VERTICAL, 0.5, 1.0)
+
+
+def raycast_columns(obj_angle, obj_x, obj_y, world, num_columns=60, fov=60, texture_size=TEXTURE_SIZE,
+                    max_distance=None, pyramid=None, columns=None):
+    """
+    Cast one ray per screen column in a single call.
+
+    The rays sweep `fov` degrees centered on `obj_angle`, so with num_columns == fov the rays are one degree apart
+    and the results match the ones yielded by raycaster_2d. Rays are processed together with NumPy, the Python
+    loop only runs once per tile crossed by the longest ray, not once per ray.
+
+    :param obj_angle: Viewing angle in radians.
+    :param obj_x: X position of the viewer.
+    :param obj_y: Y position of the viewer.
+    :param world: The world to cast against.
+    :param num_columns: Number of rays to cast.
+    :param fov: Field of view in degrees.
+    :param texture_size: Width of the wall textures, used to compute the texture column of every hit.
+    :param max_distance: Maximum distance a ray travels, defaults to the configured view distance.
+    :param pyramid: Optional OccupancyPyramid of the world, used to skip empty space.
+    :param columns: Optional slice or index array, only these columns are cast. Every column gives the same result
+                    whether it is cast alone or with the others.
+    :return: A RaycastResult.
+    """
+    tables = get_ray_tables(num_columns, fov)
+    ra = tables.ray_angles(obj_angle)
+    cos_ra, sin_ra = tables.directions(obj_angle)
+
+    if columns is not None:
+        ra, cos_ra, sin_ra = ra[columns], cos_ra[columns], sin_ra[columns]
+
+    if max_distance is None:
+        max_distance = view_distance(world)
+
+    distance, hit_x, hit_y, wall_id, side = cast_rays(world, obj_x, obj_y, cos_ra, sin_ra, max_distance, pyramid)
+    texture_u = texture_columns(ra, hit_x, hit_y, side, world.map_grid_size, texture_size)
+
+    return RaycastResult(ra, distance, hit_x, hit_y, wall_id, side, texture_u)
+
+
+def cast_rays(world, obj_x, obj_y, cos_ra, sin_ra, max_distance=math.inf, pyramid=None):
+    """
+    Vectorized version of raycaster.cast_ray, every ray advances one tile per iteration (DDA).
+
+    The origins can be scalars or arrays matching the directions, so rays from many viewers can be cast together.
+    Rays that stop are dropped from the working set, later iterations only process the rays still travelling.
+    With an OccupancyPyramid, rays in empty regions jump a whole empty block per iteration instead of one tile.
+
+    :return: (distance, hit x, hit y, texture index, side) arrays. The distance is math.inf where no wall was hit
+             within max_distance, the hit point is then where the ray stopped.
+    """
+    cos_ra = np.asarray(cos_ra, dtype=np.float64)
+    sin_ra = np.asarray(sin_ra, dtype=np.float64)
+    shape = np.broadcast(cos_ra, sin_ra, obj_x, obj_y).shape
+
+    cos_ra = np.broadcast_to(cos_ra, shape).ravel()
+    sin_ra = np.broadcast_to(sin_ra, shape).ravel()
+    origin_x = np.broadcast_to(np.asarray(obj_x, dtype=np.float64), shape).ravel()
+    origin_y = np.broadcast_to(np.asarray(obj_y, dtype=np.float64), shape).ravel()
+    count = cos_ra.size
+
+    tile_size = world.map_grid_size
+    size_x = world.map_grid_size_x
+    size_y = world.map_grid_size_y
+
+    # Axis aligned rays get a tiny direction component, they reach the parallel grid lines only at a huge distance
+    cos_ra = np.where(np.abs(cos_ra) < EPSILON, np.copysign(EPSILON, cos_ra), cos_ra)
+    sin_ra = np.where(np.abs(sin_ra) < EPSILON, np.copysign(EPSILON, sin_ra), sin_ra)
+
+    distance = np.full(count, math.inf)
+    travelled = np.zeros(count)
+    wall_id = np.zeros(count, dtype=np.int64)
+    side = np.full(count, SIDE_HORIZONTAL, dtype=np.int64)
+
+    # Working set of the rays still travelling
+    ray = np.arange(count)
+    ox, oy = origin_x, origin_y
+    dx, dy = cos_ra, sin_ra
+    inv_cos, inv_sin = 1 / cos_ra, 1 / sin_ra
+    step_x = np.where(cos_ra > 0, 1, -1)
+    step_y = np.where(sin_ra > 0, 1, -1)
+    edge_x = (step_x > 0).astype(np.int64)
+    edge_y = (step_y > 0).astype(np.int64)
+    map_x = np.floor(ox / tile_size).astype(np.int64)
+    map_y = np.floor(oy / tile_size).astype(np.int64)
+
+    keep = (0 <= map_x) & (map_x < size_x) & (0 <= map_y) & (map_y < size_y)
+
+    while True:
+        if not keep.all():
+            ray, ox, oy, dx, dy = ray[keep], ox[keep], oy[keep], dx[keep], dy[keep]
+            inv_cos, inv_sin = inv_cos[keep], inv_sin[keep]
+            step_x, step_y, edge_x, edge_y = step_x[keep], step_y[keep], edge_x[keep], edge_y[keep]
+            map_x, map_y = map_x[keep], map_y[keep]
+
+        if len(ray) == 0:
+            break
+
+        if pyramid is None:
+            next_x = ((map_x + edge_x) * tile_size - ox) * inv_cos
+            next_y = ((map_y + edge_y) * tile_size - oy) * inv_sin
+
+            crossing_x = next_x < next_y
+            step_distance = np.where(crossing_x, next_x, next_y)
+            map_x = np.where(crossing_x, map_x + step_x, map_x)
+            map_y = np.where(crossing_x, map_y, map_y + step_y)
+        else:
+            # Leave the largest empty block around the tile, level 0 blocks are single tiles
+            level = pyramid.empty_levels(map_x, map_y)
+            low_x = (map_x >> level) << level
+            low_y = (map_y >> level) << level
+            high_x = np.minimum(low_x + (1 << level), size_x) - 1
+            high_y = np.minimum(low_y + (1 << level), size_y) - 1
+
+            next_x = ((np.where(step_x > 0, high_x, low_x) + edge_x) * tile_size - ox) * inv_cos
+            next_y = ((np.where(step_y > 0, high_y, low_y) + edge_y) * tile_size - oy) * inv_sin
+
+            crossing_x = next_x < next_y
+            step_distance = np.where(crossing_x, next_x, next_y)
+
+            # The tile on the other axis is the one the tile by tile traversal would be in when leaving the block
+            cell_x = _cell_at(step_distance, ox, dx, inv_cos, tile_size, step_x, edge_x, tie_steps=False)
+            cell_y = _cell_at(step_distance, oy, dy, inv_sin, tile_size, step_y, edge_y, tie_steps=True)
+
+            map_x = np.where(crossing_x, np.where(step_x > 0, high_x + 1, low_x - 1), np.clip(cell_x, low_x, high_x))
+            map_y = np.where(crossing_x, np.clip(cell_y, low_y, high_y), np.where(step_y > 0, high_y + 1, low_y - 1))
+
+        beyond = step_distance > max_distance
+        travelled[ray] = np.minimum(step_distance, max_distance)
+
+        in_bounds = (0 <= map_x) & (map_x < size_x) & (0 <= map_y) & (map_y < size_y)
+        value = world.walls_at(np.where(in_bounds, map_x, 0), np.where(in_bounds, map_y, 0)).astype(np.int64)
+        hit = in_bounds & ~beyond & (value > 0)
+
+        hit_ray = ray[hit]
+        distance[hit_ray] = step_distance[hit]
+        wall_id[hit_ray] = value[hit] - 1
+        side[ray] = np.where(crossing_x, SIDE_VERTICAL, SIDE_HORIZONTAL)
+
+        # Rays that hit a wall, left the world or went past the view distance stop
+        keep = in_bounds & ~beyond & ~hit
+
+    hit_x = origin_x + travelled * cos_ra
+    hit_y = origin_y + travelled * sin_ra
+
+    return (distance.reshape(shape), hit_x.reshape(shape), hit_y.reshape(shape), wall_id.reshape(shape),
+            side.reshape(shape))
+
+
+def _cell_at(t, origin, direction, inv_direction, tile_size, step, edge, tie_steps):
+    # Tile a ray is in at distance t along one axis. The estimate is corrected with the same grid line distances the
+    # tile by tile traversal compares, so both agree even when t lands on a grid line. On a tie the traversal crosses
+    # horizontal grid lines first (tie_steps for the Y axis).
+    cell = np.floor((origin + t * direction) / tile_size).astype(np.int64)
+
+    line = ((cell + edge) * tile_size - origin) * inv_direction
+    cell = np.where(line <= t if tie_steps else line < t, cell + step, cell)
+
+    previous_line = ((cell - step + edge) * tile_size - origin) * inv_direction
+    cell = np.where(previous_line > t if tie_steps else previous_line >= t, cell - step, cell)
+
+    return cell
+
+
+def texture_columns(ra, hit_x, hit_y, side, tile_size, texture_size=TEXTURE_SIZE):
+    """Texture column for every hit, flipped so textures read left to right from every direction."""
+    texel_scale = tile_size / texture_size
+    u_horizontal = np.trunc(hit_x / texel_scale).astype(np.int64) % texture_size
+    u_horizontal = np.where(ra < math.pi, texture_size - 1 - u_horizontal, u_horizontal)
+    u_vertical = np.trunc(hit_y / texel_scale).astype(np.int64) % texture_size
+    u_vertical = np.where((math.pi / 2 < ra) & (ra < 3 * math.pi / 2), texture_size - 1 - u_vertical, u_vertical)
+
+    return np.where(side == SIDE_VERTICAL, u_vertical, u_horizontal)
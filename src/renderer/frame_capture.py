@@ -0,0 +1,156 @@
+# /src/renderer/frame_capture.py
+
+import os
+import queue
+import threading
+
+import numpy as np
+
+from src.utils.image_io import encode_png, encode_ppm
+
+CAPTURE_FORMAT_RAW = 'raw'  # One file of packed RGB rows per frame, top row first
+CAPTURE_FORMAT_PNG = 'png'  # One PNG file per frame
+CAPTURE_FORMAT_PPM_STREAM = 'ppm_stream'  # Every frame appended to a single file of binary PPM images
+CAPTURE_FORMATS = (CAPTURE_FORMAT_RAW, CAPTURE_FORMAT_PNG, CAPTURE_FORMAT_PPM_STREAM)
+
+CAPTURE_POLICY_DROP = 'drop'  # A frame arriving while every buffer is in use is skipped, the game never waits
+CAPTURE_POLICY_BLOCK = 'block'  # The render thread waits for a buffer, no frame is lost
+CAPTURE_POLICIES = (CAPTURE_POLICY_DROP, CAPTURE_POLICY_BLOCK)
+
+CAPTURE_POOL_SIZE = 8
+CAPTURE_PNG_COMPRESSION = 1  # zlib level, fast compression keeps the writer ahead of the game
+
+PPM_STREAM_FILE = 'capture.ppm'
+
+
+class FrameCapture:
+    def __init__(self, path, width, height, capture_format=CAPTURE_FORMAT_PNG, policy=CAPTURE_POLICY_DROP,
+                 pool_size=CAPTURE_POOL_SIZE, png_compression=CAPTURE_PNG_COMPRESSION):
+        """
+        Stream frames to disk from a background thread. The caller only copies every frame into a buffer taken from a
+        pool allocated up front, encoding and writing happen on the writer thread.
+
+        The pool bounds the frames waiting to be written. When it is empty, the policy decides whether the frame is
+        dropped or the caller waits for the writer.
+
+        :param path: Directory the frames are written to, created if needed.
+        :param width: Width of the frames in pixels.
+        :param height: Height of the frames in pixels.
+        :param capture_format: One of CAPTURE_FORMATS.
+        :param policy: One of CAPTURE_POLICIES.
+        :param pool_size: Number of frame buffers, the most frames waiting to be written.
+        :param png_compression: zlib compression level of PNG frames.
+        """
+        if capture_format not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format {capture_format}, expected one of {CAPTURE_FORMATS}")
+        if policy not in CAPTURE_POLICIES:
+            raise ValueError(f"Unknown capture policy {policy}, expected one of {CAPTURE_POLICIES}")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.capture_format = capture_format
+        self.policy = policy
+        self.png_compression = png_compression
+
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+
+        os.makedirs(path, exist_ok=True)
+        self._stream = None
+        if capture_format == CAPTURE_FORMAT_PPM_STREAM:
+            self._stream = open(os.path.join(path, PPM_STREAM_FILE), 'wb')
+
+        # Buffers go from the free queue to the pending queue when filled, and back once written
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(pool_size)]
+        self._free = queue.Queue()
+        for index in range(pool_size):
+            self._free.put(index)
+        self._pending = queue.Queue()
+        self._error = None
+
+        self._writer = threading.Thread(target=self._write_frames, name='frame-capture-writer', daemon=True)
+        self._writer.start()
+
+    def capture(self, frame=None, read_into=None, flipped=False):
+        """
+        Queue a frame for writing.
+
+        :param frame: H x W x 3 uint8 array holding the frame, copied into a pool buffer.
+        :param read_into: Instead of `frame`, a function filling the H x W x 3 uint8 buffer it is given, such as a
+                          read of the GL back buffer. Avoids an intermediate copy.
+        :param flipped: The frame is stored bottom row first, as OpenGL reads it. It is flipped on the writer thread.
+        :return: True if the frame was queued, False if it was dropped.
+        """
+        if self.closed:
+            raise RuntimeError("Cannot capture a frame after the capture was closed")
+        if self._error is not None:
+            raise self._error
+
+        try:
+            index = self._free.get(block=self.policy == CAPTURE_POLICY_BLOCK)
+        except queue.Empty:
+            self.dropped += 1
+            return False
+
+        buffer = self._buffers[index]
+        if read_into is not None:
+            read_into(buffer)
+        else:
+            np.copyto(buffer, frame)
+
+        self._pending.put((index, self.captured, flipped))
+        self.captured += 1
+        return True
+
+    def close(self):
+        """Write the frames still queued, stop the writer thread and close the files."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self._pending.put(None)
+        self._writer.join()
+        if self._stream is not None:
+            self._stream.close()
+
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_frames(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+
+            index, number, flipped = item
+            try:
+                if self._error is None:
+                    frame = self._buffers[index]
+                    self._write_frame(frame[::-1] if flipped else frame, number)
+                    self.written += 1
+            except Exception as e:  # Reported to the render thread by the next capture or close
+                self._error = e
+            finally:
+                self._free.put(index)
+
+    def _write_frame(self, frame, number):
+        if self.capture_format == CAPTURE_FORMAT_PPM_STREAM:
+            self._stream.write(encode_ppm(frame))
+            return
+
+        if self.capture_format == CAPTURE_FORMAT_PNG:
+            data, extension = encode_png(frame, self.png_compression), 'png'
+        else:
+            data, extension = np.ascontiguousarray(frame).tobytes(), 'rgb'
+
+        with open(os.path.join(self.path, f'frame_{number:06d}.{extension}'), 'wb') as f:
+            f.write(data)
@@ -0,0 +1,132 @@
+# /src/renderer/minimap.py
+
+import math
+
+import numpy as np
+
+from OpenGL.GL import *
+
+WALL_COLOR = (1.0, 1.0, 1.0)
+EMPTY_COLOR = (0.0, 0.0, 0.0)
+
+
+class Minimap:
+    def __init__(self, world, panel_width, panel_height, border_thickness=1):
+        """
+        Top down view of the tiles around the player, kept in vertex and color arrays drawn with one call.
+
+        Only a window of tiles the size of the panel is stored, so memory and per frame cost do not depend on the
+        size of the map. When the map is larger than the panel the window follows the player one tile at a time.
+
+        :param world: The world to draw.
+        :param panel_width: Width in pixels of the area the minimap is drawn in.
+        :param panel_height: Height in pixels of the area the minimap is drawn in.
+        :param border_thickness: Gap in pixels between neighbouring tiles.
+        """
+        self.world = world
+        self.panel_width = panel_width
+        self.panel_height = panel_height
+
+        tile_size = world.map_grid_size
+        self.tiles_x = max(1, min(world.map_grid_size_x, panel_width // tile_size))
+        self.tiles_y = max(1, min(world.map_grid_size_y, panel_height // tile_size))
+
+        # Top left tile of the window
+        self.origin_x = 0
+        self.origin_y = 0
+
+        # Four vertices per tile, positions are relative to the window and never change
+        x = np.arange(self.tiles_x) * tile_size
+        y = np.arange(self.tiles_y) * tile_size
+        left = np.tile(x, self.tiles_y) + border_thickness
+        top = np.repeat(y, self.tiles_x) + border_thickness
+        right = left + tile_size - 2 * border_thickness
+        bottom = top + tile_size - 2 * border_thickness
+
+        self.vertices = np.empty((self.tiles_x * self.tiles_y, 4, 2), dtype=np.float32)
+        self.vertices[:, 0] = np.stack((left, top), axis=1)
+        self.vertices[:, 1] = np.stack((left, bottom), axis=1)
+        self.vertices[:, 2] = np.stack((right, bottom), axis=1)
+        self.vertices[:, 3] = np.stack((right, top), axis=1)
+
+        self.colors = np.empty((self.tiles_x * self.tiles_y, 4, 3), dtype=np.float32)
+        self.refresh()
+
+        world.add_change_listener(self.on_world_changed)
+        self._closed = False
+
+    def close(self):
+        """Stop following the world changes, the minimap can be discarded afterwards."""
+        if self._closed:
+            return
+        self._closed = True
+        self.world.remove_change_listener(self.on_world_changed)
+
+    @property
+    def offset(self):
+        """World position of the top left corner of the panel, subtract it to draw world positions on the minimap."""
+        tile_size = self.world.map_grid_size
+        return self.origin_x * tile_size, self.origin_y * tile_size
+
+    def follow(self, x, y):
+        """Center the window on a world position, the tile colors are only refreshed when the window moves."""
+        tile_size = self.world.map_grid_size
+        origin_x = _clamp(math.floor(x / tile_size) - self.tiles_x // 2, 0,
+                          self.world.map_grid_size_x - self.tiles_x)
+        origin_y = _clamp(math.floor(y / tile_size) - self.tiles_y // 2, 0,
+                          self.world.map_grid_size_y - self.tiles_y)
+
+        if (origin_x, origin_y) != (self.origin_x, self.origin_y):
+            self.origin_x = origin_x
+            self.origin_y = origin_y
+            self.refresh()
+
+    def refresh(self):
+        """Reload the color of every tile in the window from the world."""
+        xs = np.tile(np.arange(self.tiles_x) + self.origin_x, self.tiles_y)
+        ys = np.repeat(np.arange(self.tiles_y) + self.origin_y, self.tiles_x)
+        is_wall = self.world.walls_at(xs, ys) > 0
+
+        self.colors[:] = np.where(is_wall[:, np.newaxis, np.newaxis], WALL_COLOR, EMPTY_COLOR)
+
+    def on_world_changed(self, changes):
+        if changes is None:
+            self.refresh()
+            return
+
+        # Only patch the tiles inside the window, the others are loaded when the window reaches them
+        for change in changes:
+            local_x = change.x - self.origin_x
+            local_y = change.y - self.origin_y
+            if 0 <= local_x < self.tiles_x and 0 <= local_y < self.tiles_y:
+                self.colors[local_y * self.tiles_x + local_x] = WALL_COLOR if change.new_value > 0 else EMPTY_COLOR
+
+    def draw(self):
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, self.vertices)
+        glColorPointer(3, GL_FLOAT, 0, self.colors)
+        glDrawArrays(GL_QUADS, 0, self.tiles_x * self.tiles_y * 4)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def clip_segment(self, x0, y0, x1, y1):
+        """Shorten a segment starting inside the panel so it ends on the panel border, in panel coordinates."""
+        t = 1.0
+        dx = x1 - x0
+        dy = y1 - y0
+        if dx > 0:
+            t = min(t, (self.panel_width - x0) / dx)
+        elif dx < 0:
+            t = min(t, -x0 / dx)
+        if dy > 0:
+            t = min(t, (self.panel_height - y0) / dy)
+        elif dy < 0:
+            t = min(t, -y0 / dy)
+
+        t = max(t, 0.0)
+        return x0 + dx * t, y0 + dy * t
+
+
+def _clamp(value, low, high):
+    return max(low, min(value, high))
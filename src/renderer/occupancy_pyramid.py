@@ -0,0 +1,143 @@
+# /src/renderer/occupancy_pyramid.py
+
+import numpy as np
+
+# When empty space skipping pays off, from benchmarks of raycast_columns with and without a pyramid on generated maps
+# of 32 to 4096 tiles at 60 and 960 columns. What decides is how far rays travel, so how much of the map is walls: at
+# 8% walls the pyramid is 20 to 90% slower on every map size, at 1% it is up to 4 times faster from 256 tiles. The
+# column count moves both by the same amount and does not change the outcome. Maps under 64 tiles never gained much.
+PYRAMID_MIN_MAP_SIZE = 64
+PYRAMID_MAX_WALL_FRACTION = 0.03
+
+
+class OccupancyPyramid:
+    def __init__(self, world, max_level=None):
+        """
+        Occupancy mip pyramid of the world: level k holds one flag per 2^k x 2^k block of tiles, set when any tile
+        of the block is a wall. A ray inside an empty block can jump straight to the block's exit.
+
+        Level 0 is the world itself, so only the coarser levels are stored. The pyramid listens to the world and
+        updates the blocks containing a changed tile, one cell per level.
+
+        :param world: The world to accelerate.
+        :param max_level: Coarsest level to build, defaults to the level where the whole map is a single block.
+        """
+        self.world = world
+
+        size = max(world.map_grid_size_x, world.map_grid_size_y)
+        if max_level is None:
+            max_level = max(1, (size - 1).bit_length())
+        self.max_level = max_level
+
+        # levels[k - 1] is level k
+        self.levels = []
+        self.rebuild()
+
+        world.add_change_listener(self.on_world_changed)
+        self._closed = False
+
+    def close(self):
+        """Stop following the world changes, the pyramid can be discarded afterwards."""
+        if self._closed:
+            return
+        self._closed = True
+        self.world.remove_change_listener(self.on_world_changed)
+
+    def rebuild(self):
+        """Build every level from the whole map."""
+        grid = self.world.map_grid_walls
+        size_x = self.world.map_grid_size_x
+        size_y = self.world.map_grid_size_y
+
+        # Level 1 is built a row of blocks at a time to keep the temporary arrays small on huge maps
+        level = np.zeros(((size_y + 1) // 2, (size_x + 1) // 2), dtype=np.uint8)
+        for block_y in range(level.shape[0]):
+            rows = grid.row(2 * block_y) > 0
+            if 2 * block_y + 1 < size_y:
+                rows = rows | (grid.row(2 * block_y + 1) > 0)
+            level[block_y] = _pool_row(rows)
+
+        self.levels = [level]
+        for _ in range(2, self.max_level + 1):
+            self.levels.append(_pool(self.levels[-1]))
+
+    def empty_level(self, x, y):
+        """Coarsest level whose block containing the empty tile (x, y) is empty, 0 if only the tile is."""
+        level = 0
+        for k, occupancy in enumerate(self.levels, start=1):
+            if occupancy[y >> k, x >> k]:
+                break
+            level = k
+
+        return level
+
+    def empty_levels(self, xs, ys):
+        """Vectorized empty_level for arrays of empty tiles."""
+        levels = np.zeros(len(xs), dtype=np.int64)
+        candidates = np.arange(len(xs))
+
+        for k, occupancy in enumerate(self.levels, start=1):
+            empty = occupancy[ys[candidates] >> k, xs[candidates] >> k] == 0
+            candidates = candidates[empty]
+            if len(candidates) == 0:
+                break
+            levels[candidates] = k
+
+        return levels
+
+    def on_world_changed(self, changes):
+        if changes is None:
+            self.rebuild()
+            return
+
+        for change in changes:
+            self._update_tile(change.x, change.y)
+
+    def _update_tile(self, x, y):
+        grid = self.world.map_grid_walls
+        size_x = self.world.map_grid_size_x
+        size_y = self.world.map_grid_size_y
+
+        # Level 1 from the world tiles
+        block_x = x >> 1
+        block_y = y >> 1
+        occupied = False
+        for tile_y in range(2 * block_y, min(2 * block_y + 2, size_y)):
+            for tile_x in range(2 * block_x, min(2 * block_x + 2, size_x)):
+                occupied = occupied or grid.get(tile_x, tile_y) > 0
+        self.levels[0][block_y, block_x] = occupied
+
+        # Coarser levels from the level below
+        for k in range(1, len(self.levels)):
+            block_x >>= 1
+            block_y >>= 1
+            children = self.levels[k - 1][2 * block_y:2 * block_y + 2, 2 * block_x:2 * block_x + 2]
+            self.levels[k][block_y, block_x] = children.any()
+
+
+def _pool_row(row):
+    # Merge pairs of flags, an odd length row is padded with an empty tile
+    if len(row) % 2:
+        row = np.append(row, False)
+    return row[0::2] | row[1::2]
+
+
+def _pool(level):
+    height, width = level.shape
+    padded = np.zeros((height + height % 2, width + width % 2), dtype=np.uint8)
+    padded[:height, :width] = level
+    return padded[0::2, 0::2] | padded[0::2, 1::2] | padded[1::2, 0::2] | padded[1::2, 1::2]
+
+
+def pyramid_for(world):
+    """An OccupancyPyramid for large and open enough worlds to benefit from it, None otherwise."""
+    if max(world.map_grid_size_x, world.map_grid_size_y) < PYRAMID_MIN_MAP_SIZE:
+        return None
+
+    # Counted a row of chunks at a time, padding tiles are 0 and never counted
+    chunks = world.map_grid_walls.chunks
+    walls = sum(int(np.count_nonzero(chunk_row)) for chunk_row in chunks)
+    if walls > PYRAMID_MAX_WALL_FRACTION * world.map_grid_size_x * world.map_grid_size_y:
+        return None
+
+    return OccupancyPyramid(world)
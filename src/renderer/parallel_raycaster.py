@@ -0,0 +1,287 @@
+# /src/renderer/parallel_raycaster.py
+
+import atexit
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.exceptions.renderer_exceptions import RenderWorkerError
+from src.models.world import World
+from src.models.world_storage import ChunkedGrid
+from src.renderer.batch_raycaster import RaycastResult
+from src.renderer.occupancy_pyramid import pyramid_for
+from src.renderer.ray_tables import get_ray_tables
+from src.renderer.raycaster import view_distance
+from src.renderer.software_renderer import SoftwareRenderer
+from src.renderer.texture_atlas import TextureAtlas, load_wall_atlas
+
+# Rows of the shared result buffer, one column per ray
+RESULT_FIELDS = ('distance', 'hit_x', 'hit_y', 'wall_id', 'side', 'texture_u')
+
+# Slots of the shared pose block written by the main process before every frame
+POSE_ANGLE, POSE_X, POSE_Y, POSE_STOP, POSE_CHANGES = range(5)
+POSE_SIZE = 5
+
+# Seconds to wait for the workers before considering the pool broken
+WORKER_TIMEOUT = 10
+
+
+class ParallelRaycaster:
+    def __init__(self, world, num_columns=60, fov=60, workers=None, height=400, column_width=8, atlas=None,
+                 max_distance=None):
+        """
+        Cast and shade the columns of the 3D view on several cores.
+
+        The view is split into one strip of columns per worker process. The workers are started once and read the
+        world and the textures from shared memory, every frame only the player pose is written to shared memory and
+        the workers write their rays and pixels straight into shared output buffers. Nothing is pickled per frame.
+
+        Every column is computed by the same code as the serial SoftwareRenderer, so the output is identical to it.
+
+        :param world: The world to render. Its tiles are copied to shared memory once and kept up to date with the
+                      world change notifications.
+        :param num_columns: Number of rays cast per frame.
+        :param fov: Field of view in degrees.
+        :param workers: Number of worker processes, defaults to the number of cores.
+        :param height: Height of the frame in pixels.
+        :param column_width: Width in pixels of every column.
+        :param atlas: TextureAtlas holding the wall textures, defaults to the built-in textures.
+        :param max_distance: Maximum distance a ray travels, defaults to the configured view distance. It is read
+                             once here and passed to the workers.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = max(1, min(workers, num_columns))
+
+        self.world = world
+        self.num_columns = num_columns
+        self.fov = fov
+        self.height = height
+        self.column_width = column_width
+        self.ray_tables = get_ray_tables(num_columns, fov)
+
+        atlas = atlas if atlas is not None else load_wall_atlas()
+        grid = world.map_grid_walls
+
+        self._blocks = []
+        self._closed = False
+
+        # Inputs, written by this process only
+        world_block = self._allocate(grid.nbytes)
+        self._grid = ChunkedGrid(grid.size_x, grid.size_y, grid.chunk_size, grid.dtype, buffer=world_block.buf)
+        self._grid.chunks[...] = grid.chunks
+
+        atlas_block = self._allocate(atlas.colors.nbytes)
+        np.ndarray(atlas.colors.shape, np.uint8, buffer=atlas_block.buf)[...] = atlas.colors
+
+        pose_block = self._allocate(POSE_SIZE * 8)
+        self._pose = np.ndarray(POSE_SIZE, np.float64, buffer=pose_block.buf)
+
+        # Outputs, every worker writes its own columns
+        result_block = self._allocate(len(RESULT_FIELDS) * num_columns * 8)
+        self._results = np.ndarray((len(RESULT_FIELDS), num_columns), np.float64, buffer=result_block.buf)
+
+        frame_block = self._allocate(height * num_columns * column_width * 3)
+        self.frame = np.ndarray((height, num_columns * column_width, 3), np.uint8, buffer=frame_block.buf)
+
+        spec = {
+            'world': (world_block.name, grid.size_x, grid.size_y, grid.chunk_size, grid.dtype.str,
+                      world.map_grid_size),
+            'atlas': (atlas_block.name, atlas.colors.shape, atlas.shades),
+            'pose': pose_block.name,
+            'results': result_block.name,
+            'frame': frame_block.name,
+            'num_columns': num_columns,
+            'fov': fov,
+            'height': height,
+            'column_width': column_width,
+            'max_distance': max_distance if max_distance is not None else view_distance(world),
+        }
+
+        # Edits made since the last frame, forwarded to the workers so their occupancy pyramids stay exact
+        self._pending_changes = []
+        world.add_change_listener(self.on_world_changed)
+
+        context = _start_context()
+        # Two barriers per frame: the pose is ready, then every strip is done. Only this process waits with a
+        # timeout, the workers may sit idle for as long as no frame is requested.
+        self._start_barrier = context.Barrier(self.workers + 1)
+        self._done_barrier = context.Barrier(self.workers + 1)
+
+        self.strips = [((i * num_columns) // self.workers, ((i + 1) * num_columns) // self.workers)
+                       for i in range(self.workers)]
+        self._connections = []
+        self._processes = []
+        for strip in self.strips:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_worker_main,
+                                      args=(spec, strip, self._start_barrier, self._done_barrier, receiver),
+                                      daemon=True)
+            process.start()
+            receiver.close()
+            self._connections.append(sender)
+            self._processes.append(process)
+
+        atexit.register(self.close)
+
+    def render(self, obj_angle, obj_x, obj_y):
+        """
+        Cast and shade every column for a player pose.
+
+        :return: (RaycastResult, frame). The frame is the shared H x W x 3 uint8 buffer and is overwritten by the
+                 next call, copy it to keep it.
+        :raises RenderWorkerError: A worker died or did not answer in time, the raycaster is closed.
+        """
+        if self._closed:
+            raise RuntimeError("The parallel raycaster is closed")
+
+        changes, self._pending_changes = self._pending_changes, []
+        if None in changes:
+            changes = None
+
+        self._pose[POSE_ANGLE] = obj_angle
+        self._pose[POSE_X] = obj_x
+        self._pose[POSE_Y] = obj_y
+        self._pose[POSE_CHANGES] = changes is None or len(changes) > 0
+
+        try:
+            self._start_barrier.wait(WORKER_TIMEOUT)
+
+            # Sent once the workers are running so a large batch of edits cannot fill the pipes and block this process
+            if self._pose[POSE_CHANGES]:
+                for connection in self._connections:
+                    connection.send(changes)
+
+            self._done_barrier.wait(WORKER_TIMEOUT)
+        except (threading.BrokenBarrierError, OSError) as e:
+            self.close()
+            raise RenderWorkerError("A render worker stopped responding, the parallel raycaster was closed") from e
+
+        distance, hit_x, hit_y, wall_id, side, texture_u = self._results
+        result = RaycastResult(self.ray_tables.ray_angles(obj_angle), distance.copy(), hit_x.copy(), hit_y.copy(),
+                               wall_id.astype(np.int64), side.astype(np.int64), texture_u.astype(np.int64))
+
+        return result, self.frame
+
+    def on_world_changed(self, changes):
+        if changes is None:
+            self._grid.fill(self.world.map_grid_walls.to_array())
+            self._pending_changes.append(None)
+            return
+
+        for change in changes:
+            self._grid.set(change.x, change.y, change.new_value)
+        self._pending_changes.extend(changes)
+
+    def close(self):
+        """Stop the workers and release the shared memory, the raycaster cannot be used afterwards."""
+        if self._closed:
+            return
+        self._closed = True
+
+        atexit.unregister(self.close)
+        self.world.remove_change_listener(self.on_world_changed)
+
+        self._pose[POSE_STOP] = 1
+        try:
+            self._start_barrier.wait(WORKER_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+
+        for process in self._processes:
+            process.join(WORKER_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+
+        # The arrays viewing the blocks must go before the blocks can be closed
+        self._grid = self._pose = self._results = self.frame = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _allocate(self, size):
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._blocks.append(block)
+        return block
+
+
+def _start_context():
+    # The pool is started once the window exists, a forked worker would inherit the GL context and the threads of the
+    # graphics driver. Workers start from a clean process instead, the forkserver where available, spawn otherwise
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+
+    return multiprocessing.get_context('spawn')
+
+
+def _worker_main(spec, strip, start_barrier, done_barrier, connection):
+    start, stop = strip
+    blocks = []
+
+    def attach(name):
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        return block
+
+    world_name, size_x, size_y, chunk_size, dtype, tile_size = spec['world']
+    grid = ChunkedGrid(size_x, size_y, chunk_size, np.dtype(dtype), buffer=attach(world_name).buf)
+    world = World(size_x, size_y, tile_size, grid)
+    pyramid = pyramid_for(world)
+
+    atlas_name, atlas_shape, shades = spec['atlas']
+    atlas = TextureAtlas.from_colors(np.ndarray(atlas_shape, np.uint8, buffer=attach(atlas_name).buf), shades)
+
+    num_columns = spec['num_columns']
+    height = spec['height']
+    column_width = spec['column_width']
+    pose = np.ndarray(POSE_SIZE, np.float64, buffer=attach(spec['pose']).buf)
+    results = np.ndarray((len(RESULT_FIELDS), num_columns), np.float64, buffer=attach(spec['results']).buf)
+    frame = np.ndarray((height, num_columns * column_width, 3), np.uint8, buffer=attach(spec['frame']).buf)
+
+    # The renderer only needs a player pose and a world, it renders straight into this worker's strip of the frame
+    player = SimpleNamespace(FOV=spec['fov'], angle=0.0, x=0.0, y=0.0)
+    renderer = SoftwareRenderer(SimpleNamespace(player=player, world=world), height=height,
+                                column_width=column_width, num_columns=num_columns, atlas=atlas, pyramid=pyramid,
+                                columns=strip, frame=frame[:, start * column_width:stop * column_width],
+                                max_distance=spec['max_distance'])
+
+    try:
+        while True:
+            start_barrier.wait()
+            if pose[POSE_STOP]:
+                break
+
+            if pose[POSE_CHANGES]:
+                changes = connection.recv()
+                if pyramid is not None:
+                    pyramid.on_world_changed(changes)
+
+            player.angle = float(pose[POSE_ANGLE])
+            player.x = float(pose[POSE_X])
+            player.y = float(pose[POSE_Y])
+
+            result = renderer.cast_rays()
+            renderer.render(result)
+            for row, field in enumerate(RESULT_FIELDS):
+                results[row, start:stop] = getattr(result, field)
+
+            done_barrier.wait()
+    except threading.BrokenBarrierError:
+        pass  # The main process gave up on the pool after another worker died
+    finally:
+        del grid, atlas, pose, results, frame, renderer, world, pyramid
+        for block in blocks:
+            block.close()
@@ -0,0 +1,155 @@
+# /src/renderer/ray_cache.py
+
+import math
+
+import numpy as np
+
+from src.renderer.batch_raycaster import RaycastResult, raycast_columns, TEXTURE_SIZE
+from src.renderer.raycaster import view_distance
+
+CACHE_MISS = 'miss'  # Every column was cast
+CACHE_HIT = 'hit'  # Nothing changed, the previous result was returned
+CACHE_ROTATED = 'rotated'  # The camera only turned, the overlapping columns were reused
+
+# Largest difference in radians between a rotation and a whole number of columns for the columns to be reused
+ROTATION_TOLERANCE = 1e-9
+
+RESULT_FIELDS = ('ray_angle', 'distance', 'hit_x', 'hit_y', 'wall_id', 'side', 'texture_u')
+
+
+class RayCache:
+    def __init__(self, world, num_columns=60, fov=60, texture_size=TEXTURE_SIZE, pyramid=None, max_distance=None,
+                 rotation_tolerance=ROTATION_TOLERANCE):
+        """
+        Frame coherent raycasting, the result of the last frame is kept and reused while the view allows it.
+
+        The result is keyed on the viewer position, angle and world version. A frame from the same pose in the same
+        world returns the previous result without casting. A frame that only turned the camera by a whole number of
+        columns shifts the previous columns and only casts the newly exposed ones. Any world edit bumps the world
+        version and invalidates the cache.
+
+        :param world: The world to cast against.
+        :param num_columns: Number of rays cast per frame.
+        :param fov: Field of view in degrees.
+        :param texture_size: Width of the wall textures.
+        :param pyramid: Optional OccupancyPyramid of the world.
+        :param max_distance: Maximum distance a ray travels, defaults to the configured view distance read once here.
+        :param rotation_tolerance: Largest gap in radians between a rotation and a whole number of columns for the
+                                   columns to be reused. The view is then cast at the nearest whole column, so a
+                                   tolerance of half a column snaps turning to column steps and always reuses.
+        """
+        self.world = world
+        self.num_columns = num_columns
+        self.fov = fov
+        self.texture_size = texture_size
+        self.pyramid = pyramid
+        self.max_distance = max_distance if max_distance is not None else view_distance(world)
+        self.rotation_tolerance = rotation_tolerance
+
+        self.column_step = math.radians(fov) / num_columns
+
+        self.result = None
+        self.status = CACHE_MISS
+        self.hits = 0
+        self.rotations = 0
+        self.misses = 0
+
+        self._pose = None
+        self._version = None
+        self._cast_angle = None  # Angle the cached columns were cast at, snapped to a whole column after a rotation
+
+    @property
+    def cast_angle(self):
+        """
+        Angle the cached columns were cast at, None before the first cast.
+
+        After a rotation within the tolerance this is the pose angle snapped to a whole column, anything drawn along
+        with the result, such as the floor and the sprites, must use it rather than the pose angle to line up.
+        """
+        return self._cast_angle
+
+    def invalidate(self):
+        self.result = None
+        self._pose = None
+
+    def matches(self, obj_angle, obj_x, obj_y):
+        """True when the cached result is the one of this pose in the current world."""
+        return (self.result is not None and self._version == self.world.version
+                and self._pose == (obj_angle, obj_x, obj_y))
+
+    def store(self, result, obj_angle, obj_x, obj_y, cast_angle=None):
+        """Keep a result cast elsewhere, such as by a ParallelRaycaster, for the next frames."""
+        self.result = result
+        self._pose = (obj_angle, obj_x, obj_y)
+        self._version = self.world.version
+        self._cast_angle = cast_angle if cast_angle is not None else obj_angle
+
+    def cast(self, obj_angle, obj_x, obj_y):
+        """
+        Raycast result of a pose, reusing as much of the previous frame as possible. `status` tells what was reused.
+
+        :return: A RaycastResult. It may be the same object as the previous frame, it must not be modified.
+        """
+        if self.matches(obj_angle, obj_x, obj_y):
+            self.status = CACHE_HIT
+            self.hits += 1
+            return self.result
+
+        shift = self._rotation_shift(obj_angle, obj_x, obj_y)
+        if shift == 0:
+            # Turned by less than the tolerance, the view snaps to the columns already cast
+            self.status = CACHE_HIT
+            self.hits += 1
+            self._pose = (obj_angle, obj_x, obj_y)
+            return self.result
+
+        if shift is None:
+            self.status = CACHE_MISS
+            self.misses += 1
+            self.store(self._cast(obj_angle, obj_x, obj_y), obj_angle, obj_x, obj_y)
+            return self.result
+
+        # Cast the view at the nearest whole column so the kept columns line up exactly with the new ones
+        snapped_angle = math.fmod(self._cast_angle + shift * self.column_step + 2 * math.pi, 2 * math.pi)
+        self.status = CACHE_ROTATED
+        self.rotations += 1
+        self.store(self._shift(shift, snapped_angle, obj_x, obj_y), obj_angle, obj_x, obj_y, snapped_angle)
+
+        return self.result
+
+    def _rotation_shift(self, obj_angle, obj_x, obj_y):
+        # Number of columns the view turned by, 0 when it stays on the cached columns, None when the previous columns
+        # cannot be reused
+        if self.result is None or self._version != self.world.version or self._pose[1:] != (obj_x, obj_y):
+            return None
+
+        delta = math.remainder(obj_angle - self._cast_angle, 2 * math.pi)
+        shift = round(delta / self.column_step)
+        if abs(shift) >= self.num_columns or abs(delta - shift * self.column_step) > self.rotation_tolerance:
+            return None
+
+        return shift
+
+    def _shift(self, shift, obj_angle, obj_x, obj_y):
+        # Turning right by `shift` columns moves column i + shift of the previous frame to column i
+        if shift > 0:
+            kept, source, exposed = slice(0, self.num_columns - shift), slice(shift, None), slice(-shift, None)
+        else:
+            kept, source, exposed = slice(-shift, None), slice(0, self.num_columns + shift), slice(0, -shift)
+
+        fresh = self._cast(obj_angle, obj_x, obj_y, exposed)
+
+        fields = []
+        for field in RESULT_FIELDS:
+            previous = getattr(self.result, field)
+            values = np.empty_like(previous)
+            values[kept] = previous[source]
+            values[exposed] = getattr(fresh, field)
+            fields.append(values)
+
+        return RaycastResult(*fields)
+
+    def _cast(self, obj_angle, obj_x, obj_y, columns=None):
+        return raycast_columns(obj_angle, obj_x, obj_y, self.world, num_columns=self.num_columns, fov=self.fov,
+                               texture_size=self.texture_size, max_distance=self.max_distance,
+                               pyramid=self.pyramid, columns=columns)
@@ -0,0 +1,65 @@
+# /src/renderer/ray_tables.py
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Smallest magnitude allowed for a ray direction component, keeps tangents of axis aligned rays finite
+EPSILON = 1e-12
+
+
+class RayTables:
+    def __init__(self, num_columns, fov):
+        """
+        Per-column lookup tables, only depend on the number of columns and the field of view.
+
+        :param num_columns: Number of rays cast per frame.
+        :param fov: Field of view in degrees.
+        """
+        self.num_columns = num_columns
+        self.fov = fov
+
+        step = math.radians(fov) / num_columns
+
+        # Angle of every ray relative to the viewing angle
+        self.angle_offsets = -math.radians(fov / 2) + np.arange(num_columns) * step
+        self.cos_offsets = np.cos(self.angle_offsets)
+        self.sin_offsets = np.sin(self.angle_offsets)
+
+        # Fisheye effect fix (see: https://lodev.org/cgtutor/raycasting.html), cos(player_angle - ray_angle)
+        self.fisheye = self.cos_offsets.copy()
+
+    def ray_angles(self, obj_angle):
+        """Angle of every ray in the range [0, 2 * pi)."""
+        return (obj_angle + 2 * math.pi + self.angle_offsets) % (2 * math.pi)
+
+    def directions(self, obj_angle):
+        """Cosine and sine of every ray angle, rotated from the tables with only two trig calls per frame."""
+        cos_a = math.cos(obj_angle)
+        sin_a = math.sin(obj_angle)
+
+        cos_ra = cos_a * self.cos_offsets - sin_a * self.sin_offsets
+        sin_ra = sin_a * self.cos_offsets + cos_a * self.sin_offsets
+
+        return cos_ra, sin_ra
+
+    def tangents(self, obj_angle):
+        """
+        Tangent and inverse tangent of every ray angle.
+
+        Rays parallel to an axis get a tiny direction component instead of zero, so neither value is ever infinite.
+
+        :return: (tan, inverse tan) arrays.
+        """
+        cos_ra, sin_ra = self.directions(obj_angle)
+        cos_ra = np.where(np.abs(cos_ra) < EPSILON, np.copysign(EPSILON, cos_ra), cos_ra)
+        sin_ra = np.where(np.abs(sin_ra) < EPSILON, np.copysign(EPSILON, sin_ra), sin_ra)
+
+        return sin_ra / cos_ra, cos_ra / sin_ra
+
+
+@lru_cache(maxsize=8)
+def get_ray_tables(num_columns, fov):
+    """Shared RayTables for a resolution and field of view, built on first use."""
+    return RayTables(num_columns, fov)
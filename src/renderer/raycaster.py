@@ -2,156 +2,147 @@
 
 import math
 
-from src.utils import safe_tan, distance_two_points
+from src.models.settings import get_settings
+from src.renderer.ray_tables import get_ray_tables, EPSILON
 
+SIDE_HORIZONTAL = 0  # Hit a horizontal grid line
+SIDE_VERTICAL = 1  # Hit a vertical grid line
 
-def raycaster_2d(obj_angle, obj_x, obj_y, game_controller, num_rays=60):
-    pi = math.pi
-    bits_to_shift = 0
+# Shade and debug color of a hit, by side. Vertical walls are darker
+SIDE_SHADES = {SIDE_HORIZONTAL: 1.0, SIDE_VERTICAL: 0.5}
+SIDE_COLORS = {SIDE_HORIZONTAL: (0.52, 0.115, 0.931), SIDE_VERTICAL: (0.62, 0.125, 0.941)}
 
-    color = (0, 1.0, 0)
-    distance = 0
-    rx = ry = xo = yo = 0.0
-    ra = (obj_angle - math.radians(num_rays / 2) + 2 * pi) % (2 * pi)
 
-    # Total size of the world (i.e. total number of 'squares' in the world)
-    world_size = game_controller.world.map_grid_size
+def view_distance(world, view_distance_tiles=None):
+    """
+    Maximum distance a ray travels in world units, math.inf when the view distance is unlimited (0).
 
-    # Calcualte shift value based on world scale
-    if bits_to_shift == 0:
-        shift_value = int(math.log2(world_size))
-    else:
-        shift_value = bits_to_shift
+    :param view_distance_tiles: View distance in tiles, defaults to RENDER_VIEW_DISTANCE.
+    """
+    if view_distance_tiles is None:
+        view_distance_tiles = get_settings().RENDER_VIEW_DISTANCE
+    if view_distance_tiles <= 0:
+        return math.inf
 
-    for r in range(num_rays):
+    return view_distance_tiles * world.map_grid_size
 
-        map_texture_vert = map_texture_horz = 0  # Vertical and horizontal map textures
-
-        # --------------------------------------------
-        # -------- Check Horizontal Lines ------------
-        # --------------------------------------------
-        dof = 0  # Depth of field (sight range)
-        distance_h = math.inf
-        hx, hy = obj_x, obj_y
-
-        a_tan = -1 / math.tan(safe_tan(ra))
-
-        e = 0.000001
-
-        if ra > pi:  # Ray is looking up
-            ry = ((int(obj_y) >> shift_value) << shift_value) - e
-            rx = (obj_y - ry) * a_tan + obj_x
-            yo = -64
-            xo = -yo * a_tan
-
-        if ra < pi:  # Ray is looking down
-            ry = ((int(obj_y) >> shift_value) << shift_value) + 64
-            rx = (obj_y - ry) * a_tan + obj_x
-            yo = 64
-            xo = -yo * a_tan
-
-        if ra == 0 or ra == pi:  # Ray is looking parallel left or right (impossible to hit a horizontal wall)
-            rx = obj_x
-            ry = obj_y
-            dof = 8
-
-        while dof < 8:
-            map_x = int(rx) >> shift_value
-            map_y = int(ry) >> shift_value
-
-            # Check if mx and my are within the bounds of the world
-            if 0 <= map_x < game_controller.world.map_grid_size_x and 0 <= map_y < game_controller.world.map_grid_size_y:
-                world_grid_index = map_y * game_controller.world.map_grid_size_x + map_x
-
-                # Hit a wall
-                if 0 < world_grid_index < world_size * game_controller.world.map_grid_size_y and \
-                        game_controller.world.map_grid_walls[
-                            world_grid_index] > 0:  # noqa
-                    hx, hy = rx, ry
-                    distance_h = distance_two_points(obj_x, obj_y, hx, hy)
-                    map_texture_horz = game_controller.world.map_grid_walls[world_grid_index] - 1
-                    dof = 8  # End the loop, we hit a wall
-                else:  # Next line to check
-                    rx += xo
-                    ry += yo
-                    dof += 1
-            else:
-                dof = 8
-
-        # --------------------------------------------
-        # -------- Check Vertical Lines --------------
-        # --------------------------------------------
-        dof = 0
-
-        distance_v = math.inf
-        vx, vy = obj_x, obj_y
-
-        n_tan = -math.tan(safe_tan(ra))
-
-        if (pi / 2) < ra < (3 * pi / 2):  # Ray is looking left
-            rx = ((int(obj_x) >> shift_value) << shift_value) - e
-            ry = (obj_x - rx) * n_tan + obj_y
-            xo = -64
-            yo = -xo * n_tan
-
-        if ra < pi / 2 or ra > (3 * pi / 2):  # Ray is looking right
-            rx = ((int(obj_x) >> shift_value) << shift_value) + 64
-            ry = (obj_x - rx) * n_tan + obj_y
-            xo = 64
-            yo = -xo * n_tan
-
-        if ra == 0 or ra == pi:  # Ray is looking straight up or down
-            rx = obj_x
-            ry = obj_y
-            dof = 8
-
-        while dof < 8:
-            map_x = int(rx) >> shift_value
-            map_y = int(ry) >> shift_value
-
-            # Check if mx and my are within the bounds of the world
-            if 0 <= map_x < game_controller.world.map_grid_size_x and 0 <= map_y < game_controller.world.map_grid_size_y:
-                world_grid_index = map_y * game_controller.world.map_grid_size_x + map_x
-
-                # Hit a wall
-                if 0 < world_grid_index < world_size and game_controller.world.map_grid_walls[world_grid_index] > 0:
-                    vx = rx
-                    vy = ry
-                    distance_v = distance_two_points(obj_x, obj_y, vx, vy)
-                    map_texture_vert = game_controller.world.map_grid_walls[world_grid_index] - 1
-                    break
-
-                else:
-                    rx += xo
-                    ry += yo
-                    dof += 1
 
+def raycaster_2d(obj_angle, obj_x, obj_y, game_controller, num_rays=60, fov=None, max_distance=None, pyramid=None):
+    world = game_controller.world
+
+    if max_distance is None:
+        max_distance = view_distance(world)
+
+    # Per-column tables are built once per resolution, a frame only rotates them to the viewing angle
+    tables = get_ray_tables(num_rays, fov if fov is not None else num_rays)
+    ray_angles = tables.ray_angles(obj_angle).tolist()
+    cos_ra, sin_ra = (values.tolist() for values in tables.directions(obj_angle))
+
+    for r in range(num_rays):
+        ra = ray_angles[r]
+        distance, rx, ry, map_texture, side = cast_ray(world, obj_x, obj_y, cos_ra[r], sin_ra[r], max_distance,
+                                                       pyramid)
+
+        yield r, ra, rx, ry, distance, SIDE_COLORS[side], SIDE_SHADES[side], map_texture
+
+
+def cast_ray(world, obj_x, obj_y, cos_ra, sin_ra, max_distance=math.inf, pyramid=None):
+    """
+    Walk a single ray through the grid one tile at a time (DDA), stepping across whichever grid line comes first.
+
+    The distance to the next grid line on each axis is always computed from the current tile rather than
+    accumulated, so a traversal that resumes at any tile produces exactly the same hits. This is what lets an
+    OccupancyPyramid jump over whole empty blocks and still hit the same walls.
+
+    :return: (distance, hit x, hit y, texture index, side). The distance is math.inf if no wall was hit within
+             max_distance, the hit point is then where the ray stopped.
+    """
+    tile_size = world.map_grid_size
+    size_x = world.map_grid_size_x
+    size_y = world.map_grid_size_y
+    walls = world.map_grid_walls
+
+    map_x = int(obj_x // tile_size)
+    map_y = int(obj_y // tile_size)
+
+    # Axis aligned rays get a tiny direction component, they reach the parallel grid lines only at a huge distance
+    if abs(cos_ra) < EPSILON:
+        cos_ra = math.copysign(EPSILON, cos_ra)
+    if abs(sin_ra) < EPSILON:
+        sin_ra = math.copysign(EPSILON, sin_ra)
+
+    step_x = 1 if cos_ra > 0 else -1
+    step_y = 1 if sin_ra > 0 else -1
+    inv_cos = 1 / cos_ra
+    inv_sin = 1 / sin_ra
+    edge_x = 1 if step_x > 0 else 0
+    edge_y = 1 if step_y > 0 else 0
+
+    distance = 0.0
+    side = SIDE_HORIZONTAL
+
+    while 0 <= map_x < size_x and 0 <= map_y < size_y:
+        level = pyramid.empty_level(map_x, map_y) if pyramid is not None else 0
+
+        if level == 0:
+            next_x = ((map_x + edge_x) * tile_size - obj_x) * inv_cos
+            next_y = ((map_y + edge_y) * tile_size - obj_y) * inv_sin
+
+            if next_x < next_y:
+                distance = next_x
+                map_x += step_x
+                side = SIDE_VERTICAL
             else:
-                break  # Exit the loop if we are out of bounds
-
-        shade = 1.0
-        # Vertical wall hit
-        if distance_v < distance_h:
-            # Set the color to be darker
-            map_texture_horz = map_texture_vert
-            shade = 0.5
-            color = (0.62, 0.125, 0.941)
-            # color = (0, 1, 0)
-            rx = vx
-            ry = vy
-            distance = distance_v
-        # Horizontal wall hit
-        elif distance_h < distance_v:
-            # Set the color to be lighter
-            color = (0.52, 0.115, 0.931)
-            rx = hx
-            ry = hy
-            distance = distance_h
-
-        yield r, ra, rx, ry, distance, color, shade, map_texture_horz
-
-        ra += math.radians(1)
-        if ra < 0:
-            ra += 2 * pi
-        if ra > 2 * pi:
-            ra -= 2 * pi
+                distance = next_y
+                map_y += step_y
+                side = SIDE_HORIZONTAL
+        else:
+            # Leave the largest empty block around the tile in one step
+            low_x = (map_x >> level) << level
+            low_y = (map_y >> level) << level
+            high_x = min(low_x + (1 << level), size_x) - 1
+            high_y = min(low_y + (1 << level), size_y) - 1
+
+            next_x = (((high_x if step_x > 0 else low_x) + edge_x) * tile_size - obj_x) * inv_cos
+            next_y = (((high_y if step_y > 0 else low_y) + edge_y) * tile_size - obj_y) * inv_sin
+
+            if next_x < next_y:
+                distance = next_x
+                map_x = high_x + 1 if step_x > 0 else low_x - 1
+                map_y = _cell_at(distance, obj_y, sin_ra, inv_sin, tile_size, step_y, edge_y, True)
+                map_y = max(low_y, min(map_y, high_y))
+                side = SIDE_VERTICAL
+            else:
+                distance = next_y
+                map_x = _cell_at(distance, obj_x, cos_ra, inv_cos, tile_size, step_x, edge_x, False)
+                map_x = max(low_x, min(map_x, high_x))
+                map_y = high_y + 1 if step_y > 0 else low_y - 1
+                side = SIDE_HORIZONTAL
+
+        if distance > max_distance:
+            distance = max_distance
+            break
+
+        if 0 <= map_x < size_x and 0 <= map_y < size_y:
+            wall = walls.get(map_x, map_y)
+            if wall > 0:
+                return distance, obj_x + distance * cos_ra, obj_y + distance * sin_ra, wall - 1, side
+
+    return math.inf, obj_x + distance * cos_ra, obj_y + distance * sin_ra, 0, side
+
+
+def _cell_at(t, origin, direction, inv_direction, tile_size, step, edge, tie_steps):
+    # Tile a ray is in at distance t along one axis. The estimate is corrected with the same grid line distances the
+    # tile by tile traversal compares, so both agree even when t lands on a grid line. On a tie the traversal crosses
+    # horizontal grid lines first (tie_steps for the Y axis).
+    cell = math.floor((origin + t * direction) / tile_size)
+
+    line = ((cell + edge) * tile_size - origin) * inv_direction
+    if line <= t if tie_steps else line < t:
+        cell += step
+
+    previous_line = ((cell - step + edge) * tile_size - origin) * inv_direction
+    if previous_line > t if tie_steps else previous_line >= t:
+        cell -= step
+
+    return cell
@@ -2,23 +2,50 @@
 
 import math
 import time
+import warnings
 
 from collections import deque
 
+import numpy as np
+
 from math import pi as PI  # noqa
 
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 
-from src.renderer.textures import ALL_TEXTURES
-from src.renderer.raycaster import raycaster_2d
+from src.exceptions.renderer_exceptions import RenderWorkerError
+from src.logging.frame_profiler import get_profiler
+from src.models.settings import get_settings
+from src.renderer.frame_capture import FrameCapture, CAPTURE_FORMAT_PNG, CAPTURE_POLICY_DROP
+from src.renderer.minimap import Minimap
+from src.renderer.occupancy_pyramid import pyramid_for
+from src.renderer.parallel_raycaster import ParallelRaycaster
+from src.renderer.texture_atlas import load_wall_atlas
+from src.renderer.ray_cache import RayCache, CACHE_HIT
+from src.renderer.raycaster import SIDE_COLORS, SIDE_SHADES
+from src.renderer.ray_tables import get_ray_tables
+from src.renderer.software_renderer import SoftwareRenderer
+from src.renderer.sprite_renderer import SpriteRenderer, load_sprite_atlas
+
+RENDER_MODE_IMMEDIATE = 'immediate'  # One GL call per wall pixel, kept as a fallback
+RENDER_MODE_BATCHED = 'batched'  # The 3D view is built on the CPU and drawn as a single textured quad
+
+CAPTURE_SOURCE_WINDOW = 'window'  # The whole window, read back from the GL back buffer
+CAPTURE_SOURCE_VIEW = 'view'  # The 3D view as rendered on the CPU, batched mode only
 
 
 class Renderer:
-    def __init__(self, game_controller, window_width, window_height, fps_callback=None):
+    def __init__(self, game_controller, window_width, window_height, fps_callback=None, render_mode=None,
+                 render_workers=None):
+        # RENDER_MODE and RENDER_WORKERS unless given, read from the settings when the renderer is created
+        settings = get_settings()
+        render_mode = render_mode if render_mode is not None else settings.RENDER_MODE
+        render_workers = render_workers if render_workers is not None else settings.RENDER_WORKERS
+
         self.controller = game_controller
-        self.textures = ALL_TEXTURES
-        self.draw_calls = 0
+        self.render_mode = render_mode
+        self.atlas = load_wall_atlas()
+        self.sprite_atlas = load_sprite_atlas()
         self.ray_width = 8
 
         # FPS display
@@ -43,54 +70,299 @@ class Renderer:
                 (self.window_width // 2) - int(self.world_width)) // 2 + (self.ray_width // 2)
         self.vertical_offset = (self.window_height - self.world_height) // 2
 
-        # Precompute and cache vertices
-        self.cached_vertices = self.precompute_vertices_2d_world()
+        # Fisheye correction of every ray, looked up per column instead of computed per frame
+        self.fisheye = get_ray_tables(self.controller.player.FOV, self.controller.player.FOV).fisheye.tolist()
+
+        # Empty space skipping for large maps, kept up to date by the world change notifications
+        self.pyramid = pyramid_for(self.controller.world)
+
+        # Rays of the last frame, reused while the player stands still or only turns. Turning snaps to whole column
+        # steps, a turn is almost never an exact number of columns. The view is drawn at the snapped angle
+        column_step = math.radians(self.controller.player.FOV) / self.controller.player.FOV
+        self.ray_cache = RayCache(self.controller.world, num_columns=self.controller.player.FOV,
+                                  fov=self.controller.player.FOV, texture_size=self.atlas.texture_size,
+                                  pyramid=self.pyramid, rotation_tolerance=column_step / 2)
+        self.view_uploaded = False
+        self.view_entities_version = None  # Version of the entities drawn in the view texture
+
+        # Minimap in the left half of the window, its tiles are patched as soon as the world changes
+        self.minimap = Minimap(self.controller.world, self.window_width // 2, self.window_height)
+
+        # Batched rendering, the 3D view is rendered on the CPU and uploaded to a texture once per frame
+        self.software_renderer = None
+        self.parallel_raycaster = None
+        self.sprite_renderer = None
+        self.view_texture = None
+        if self.render_mode == RENDER_MODE_BATCHED and render_workers > 0:
+            self.parallel_raycaster = ParallelRaycaster(self.controller.world,
+                                                        num_columns=self.controller.player.FOV,
+                                                        fov=self.controller.player.FOV, workers=render_workers,
+                                                        height=self.world_height, column_width=self.ray_width,
+                                                        atlas=self.atlas)
+            # The workers only draw walls, sprites are drawn over their frame on the main process
+            self.sprite_renderer = SpriteRenderer(self.controller.player.FOV, self.controller.player.FOV,
+                                                  self.world_height, self.ray_width,
+                                                  self.controller.world.map_grid_size, self.sprite_atlas)
+        elif self.render_mode == RENDER_MODE_BATCHED:
+            self.software_renderer = SoftwareRenderer(self.controller, height=self.world_height,
+                                                      column_width=self.ray_width,
+                                                      num_columns=self.controller.player.FOV, atlas=self.atlas,
+                                                      pyramid=self.pyramid, sprite_atlas=self.sprite_atlas)
+
+        # Frames show the player interpolated between the last two simulation ticks, set by the frame scheduler
+        self.interpolation = 1.0
+        self.view_angle = self.controller.player.angle
+        self.view_x = self.controller.player.x
+        self.view_y = self.controller.player.y
+
+        # Results of the current frame, passed from one stage to the next
+        self.view_result = None
+        self.view_frame = None
+        self.last_view_frame = None  # The CPU frame shown in the view texture, kept while the view is not redrawn
+
+        # Frames streamed to disk, see start_capture
+        self.capture = None
+        self.capture_source = None
+
+        # Stages of a frame in drawing order, timed by the frame profiler when it is enabled
+        self.profiler = get_profiler()
+        if self.render_mode == RENDER_MODE_BATCHED:
+            self.display_stages = (
+                ('display.clear', self.clear),
+                ('display.minimap', self.draw_world_2d),
+                ('display.raycast', self.cast_view),
+                ('display.walls', self.shade_view),
+                ('display.rays', self.draw_rays_2d_batched),
+                ('display.view', self.draw_view_texture),
+                ('display.player', self.draw_player),
+                ('display.fps', self.draw_fps),
+                ('display.capture', self.capture_frame),
+                ('display.swap', glutSwapBuffers),
+            )
+        else:
+            self.display_stages = (
+                ('display.clear', self.clear),
+                ('display.background', self.draw_background),
+                ('display.minimap', self.draw_world_2d),
+                ('display.raycast', self.cast_view),
+                ('display.rays', self.draw_rays_2d),
+                ('display.walls', self.draw_walls_3d),
+                ('display.player', self.draw_player),
+                ('display.fps', self.draw_fps),
+                ('display.capture', self.capture_frame),
+                ('display.swap', glutSwapBuffers),
+            )
 
     def display(self):
+        self.view_angle, self.view_x, self.view_y = self.controller.player.interpolated_pose(self.interpolation)
+        self.profiler.run_stages(self.display_stages, 'display')
+
+    def clear(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        self.draw_ceiling()
-        self.draw_floor()
-        self.draw_world_2d()
-        self.draw_rays_2d()
-        self.draw_player()
-        self.draw_fps()
-        glutSwapBuffers()
-
-        self.draw_calls += 1
-        if self.draw_calls >= 75:
-            if self.controller.world.is_updated:
-                self.check_for_world_has_changed()
-                self.draw_calls = 0
 
     def draw_world_2d(self):
-        glBegin(GL_QUADS)
-        for is_wall, v1, v2, v3, v4 in self.cached_vertices:
-            glColor3f(1, 1, 1) if is_wall else glColor3f(0, 0, 0)
-            glVertex2i(*v1)
-            glVertex2i(*v2)
-            glVertex2i(*v3)
-            glVertex2i(*v4)
-        glEnd()
+        self.minimap.follow(self.view_x, self.view_y)
+        self.minimap.draw()
+
+    def cast_view(self):
+        pose = (self.view_angle, self.view_x, self.view_y)
+
+        if self.parallel_raycaster is None:
+            self.view_result = self.ray_cache.cast(*pose)
+            return
+
+        # The workers shade the view while casting, an idle frame reuses the texture of the previous frame
+        if self.view_uploaded and self.ray_cache.matches(*pose) and not self.entities_changed():
+            self.view_result, self.view_frame = self.ray_cache.result, None
+        else:
+            try:
+                self.view_result, self.view_frame = self.parallel_raycaster.render(*pose)
+            except RenderWorkerError as e:
+                warnings.warn(f"{e}, rendering on the main process from now on")
+                self.use_serial_renderer()
+                self.view_result = self.ray_cache.cast(*pose)
+                return
+
+            self.ray_cache.store(self.view_result, *pose)
+
+            frame = self.view_frame
+            column_view = frame.reshape(frame.shape[0], len(self.view_result), self.ray_width, 3)
+            depth = np.maximum(self.view_result.distance * self.sprite_renderer.fisheye, 1e-6)
+            self.sprite_renderer.draw(column_view, depth, self.controller.entities, *pose)
+            self.view_entities_version = self.controller.entities.version
+
+    def use_serial_renderer(self):
+        """Render the batched view on the main process, in place of the worker pool."""
+        if self.parallel_raycaster is not None:
+            self.parallel_raycaster.close()
+        self.parallel_raycaster = None
+        self.sprite_renderer = None
+        self.view_uploaded = False
+        self.software_renderer = SoftwareRenderer(self.controller, height=self.world_height,
+                                                  column_width=self.ray_width,
+                                                  num_columns=self.controller.player.FOV, atlas=self.atlas,
+                                                  pyramid=self.pyramid, sprite_atlas=self.sprite_atlas)
+
+    def close(self):
+        """Stop the render workers and detach everything following the world, before the renderer is discarded."""
+        if self.parallel_raycaster is not None:
+            self.parallel_raycaster.close()
+            self.parallel_raycaster = None
+        if self.software_renderer is not None:
+            self.software_renderer.close()
+        if self.pyramid is not None:
+            self.pyramid.close()
+        self.minimap.close()
+
+    def shade_view(self):
+        if self.parallel_raycaster is not None:
+            return
+
+        # An idle frame reuses the view texture of the previous frame, only the quad is drawn
+        if self.view_uploaded and self.ray_cache.status == CACHE_HIT and not self.entities_changed():
+            self.view_frame = None
+        else:
+            # Cast at the angle the cached columns were snapped to, so the floor and the sprites line up with them
+            self.view_frame = self.software_renderer.render(self.view_result,
+                                                            (self.ray_cache.cast_angle, self.view_x, self.view_y))
+            self.view_entities_version = self.controller.entities.version
+
+    def entities_changed(self):
+        """Whether an entity was added, removed or moved since the view texture was rendered."""
+        return self.controller.entities.version != self.view_entities_version
+
+    def draw_view_texture(self):
+        if self.view_frame is not None:
+            self.last_view_frame = self.view_frame
+        self.draw_frame_texture(self.view_frame)
+
+    def start_capture(self, path, capture_format=CAPTURE_FORMAT_PNG, policy=CAPTURE_POLICY_DROP,
+                      source=CAPTURE_SOURCE_WINDOW):
+        """
+        Write every frame displayed from now on to disk, see FrameCapture.
+
+        :param path: Directory the frames are written to.
+        :param capture_format: One of the CAPTURE_FORMATS of frame_capture.
+        :param policy: CAPTURE_POLICY_DROP to skip frames while the writer is behind, CAPTURE_POLICY_BLOCK to wait.
+        :param source: CAPTURE_SOURCE_WINDOW or CAPTURE_SOURCE_VIEW.
+        """
+        if source == CAPTURE_SOURCE_VIEW and self.render_mode != RENDER_MODE_BATCHED:
+            raise ValueError("Capturing the view needs the batched render mode, capture the window instead")
+
+        self.stop_capture()
+        if source == CAPTURE_SOURCE_VIEW:
+            width, height = self.world_width, self.world_height
+        else:
+            width, height = self.window_width, self.window_height
+
+        self.capture = FrameCapture(path, width, height, capture_format, policy)
+        self.capture_source = source
+
+    def stop_capture(self):
+        """Finish writing the captured frames, returns the FrameCapture with its counters or None."""
+        capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.close()
+        return capture
+
+    def capture_frame(self):
+        # Only a copy into a buffer of the capture pool happens here, encoding runs on the writer thread
+        if self.capture is None:
+            return
+
+        if self.capture_source == CAPTURE_SOURCE_VIEW:
+            if self.last_view_frame is not None:
+                self.capture.capture(self.last_view_frame)
+        else:
+            self.capture.capture(read_into=self.read_back_buffer, flipped=True)
+
+    def read_back_buffer(self, buffer):
+        """Read the window from the back buffer, before it is swapped, into an H x W x 3 uint8 array."""
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadBuffer(GL_BACK)
+        glReadPixels(0, 0, self.window_width, self.window_height, GL_RGB, GL_UNSIGNED_BYTE, buffer)
 
     def draw_rays_2d(self):
-        player_angle = self.controller.player.angle
-        player_x = self.controller.player.x
-        player_y = self.controller.player.y
-
-        for r, ra, rx, ry, distance, color, shade, map_texture_pos in raycaster_2d(player_angle,
-                                                                                   player_x,
-                                                                                   player_y,
-                                                                                   self.controller,
-                                                                                   num_rays=self.controller.player.FOV):
-            # Draw the rays being cast
-            glLineWidth(1)
-            glBegin(GL_LINES)
-            glColor3f(0.8, 0, 0)  # Red
+        # Draw the rays being cast, cut at the edge of the minimap
+        offset_x, offset_y = self.minimap.offset
+        player_x = self.view_x - offset_x
+        player_y = self.view_y - offset_y
+
+        glLineWidth(1)
+        glColor3f(0.8, 0, 0)  # Red
+        glBegin(GL_LINES)
+        for rx, ry in zip(self.view_result.hit_x.tolist(), self.view_result.hit_y.tolist()):
+            end_x, end_y = self.minimap.clip_segment(player_x, player_y, rx - offset_x, ry - offset_y)
             glVertex2i(int(player_x), int(player_y))
-            glVertex2i(int(rx), int(ry))
-            glEnd()
+            glVertex2i(int(end_x), int(end_y))
+        glEnd()
 
-            self.draw_world_3d(distance, r, player_angle, ra, color, shade, map_texture_pos, rx=rx, ry=ry)
+    def draw_walls_3d(self):
+        result = self.view_result
+        player_angle = self.ray_cache.cast_angle  # The rays fan out from the snapped angle they were cast at
+        columns = zip(result.ray_angle.tolist(), result.hit_x.tolist(), result.hit_y.tolist(),
+                      result.distance.tolist(), result.side.tolist(), result.wall_id.tolist())
+
+        for r, (ra, rx, ry, distance, side, map_texture_pos) in enumerate(columns):
+            self.draw_world_3d(distance, r, player_angle, ra, SIDE_COLORS[side], SIDE_SHADES[side], map_texture_pos,
+                               rx=rx, ry=ry)
+
+    def draw_rays_2d_batched(self):
+        # Every ray as one line from the player to its hit, submitted in a single draw call
+        result = self.view_result
+        offset_x, offset_y = self.minimap.offset
+        vertices = np.empty((len(result), 2, 2), dtype=np.float32)
+        vertices[:, 0, 0] = self.view_x - offset_x
+        vertices[:, 0, 1] = self.view_y - offset_y
+        vertices[:, 1, 0] = result.hit_x - offset_x
+        vertices[:, 1, 1] = result.hit_y - offset_y
+
+        # Rays longer than the minimap are cut at its edge
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(0, 0, self.minimap.panel_width, self.minimap.panel_height)
+        glLineWidth(1)
+        glColor3f(0.8, 0, 0)  # Red
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glDrawArrays(GL_LINES, 0, len(result) * 2)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisable(GL_SCISSOR_TEST)
+
+    def draw_frame_texture(self, frame):
+        """Upload the frame to the view texture and draw it, a frame of None draws the texture as it is."""
+        height = self.world_height
+        width = self.world_width
+
+        if self.view_texture is None:
+            self.view_texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self.view_texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, GL_RGB, GL_UNSIGNED_BYTE, None)
+
+        glBindTexture(GL_TEXTURE_2D, self.view_texture)
+        if frame is not None:
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE, frame)
+            self.view_uploaded = True
+
+        # Row 0 of the frame is the top of the view, which is also the top of the window
+        left = self.horizontal_offset - self.ray_width // 2
+        top = self.vertical_offset
+
+        glEnable(GL_TEXTURE_2D)
+        glColor3f(1, 1, 1)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0)
+        glVertex2i(left, top)
+        glTexCoord2f(0, 1)
+        glVertex2i(left, top + height)
+        glTexCoord2f(1, 1)
+        glVertex2i(left + width, top + height)
+        glTexCoord2f(1, 0)
+        glVertex2i(left + width, top)
+        glEnd()
+        glDisable(GL_TEXTURE_2D)
 
     def draw_world_3d(self, ray_distance, ray_n, pa, ra, color, shade, map_texture_pos, rx, ry):
 
@@ -99,17 +371,20 @@ class Renderer:
         horizontal_offset = self.horizontal_offset
         vertical_offset = self.vertical_offset
 
-        cosine_angle = (pa - ra + 2 * PI) % (
-                2 * PI)  # player_angle - ray_angle, also bounds the values between 0 and 2 * PI noqa
+        # Nothing was hit within the view distance
+        if ray_distance == math.inf:
+            return
 
         # Fisheye effect fix (see: https://lodev.org/cgtutor/raycasting.html)
-        ray_distance = ray_distance * math.cos(cosine_angle)
+        ray_distance = ray_distance * self.fisheye[ray_n]
         ray_distance = max(ray_distance, sys.float_info.min)
 
         line_height = (self.controller.world.map_grid_size * world_height) / ray_distance
 
-        texture_step = 32.0 / float(line_height)
+        texture_size = self.atlas.texture_size
+        texture_step = texture_size / float(line_height)
         texture_offset = 0
+        mip_level = int(self.atlas.mip_level(line_height))
 
         # Adjust line height and texture offset for vertical centering within the window
         if line_height > world_height:
@@ -120,17 +395,21 @@ class Renderer:
 
         # Drawing textures
         ra = math.degrees(ra)
+        texel_scale = self.controller.world.map_grid_size / texture_size
         if shade == 1:
             # Horizontal walls
-            texture_x = int(rx / 2.0) % 32
+            texture_x = int(rx / texel_scale) % texture_size
             if ra < 180:
-                texture_x = 31 - texture_x
+                texture_x = texture_size - 1 - texture_x
         else:
             # Vertical walls
-            texture_x = int(ry / 2.0) % 32
+            texture_x = int(ry / texel_scale) % texture_size
             if 90 < ra < 270:
-                texture_x = 31 - texture_x
-        texture_y = texture_offset * texture_step + map_texture_pos * 32
+                texture_x = texture_size - 1 - texture_x
+        texture_y = texture_offset * texture_step
+
+        # Tinted and shaded colors of the texture column, one entry per texel, pre-filtered for short lines
+        column_colors = self.atlas.column_colors(map_texture_pos, 0 if shade == 1 else 1, texture_x, mip_level)
 
         glPointSize(self.ray_width)
         glBegin(GL_POINTS)
@@ -139,17 +418,7 @@ class Renderer:
             if y + line_offset + self.ray_width > world_height + vertical_offset:
                 break
 
-            texture_color = self.textures[int(texture_y) * 32 + int(texture_x)] * shade
-
-            # Draw walls with textures and colors
-            if map_texture_pos == 0:
-                glColor3f(texture_color, texture_color / 2.0, texture_color / 2.0)  # Checkerboard red
-            elif map_texture_pos == 1:
-                glColor3f(texture_color, texture_color, texture_color / 2.0)  # Brick yellow
-            elif map_texture_pos == 2:
-                glColor3f(texture_color / 2.0, texture_color / 2.0, texture_color)  # Window blue
-            elif map_texture_pos == 3:
-                glColor3f(texture_color / 2.0, texture_color, texture_color / 2.0)  # Door green
+            glColor3f(*column_colors[min(int(texture_y), texture_size - 1) >> mip_level])
 
             # The actual width of the 3d world will always be total_ray_n * self.ray_width
             glVertex2i(ray_n * self.ray_width + horizontal_offset, int(y + line_offset))
@@ -157,19 +426,27 @@ class Renderer:
         glEnd()
 
     def draw_player(self):
+        offset_x, offset_y = self.minimap.offset
+        player_x = self.view_x - offset_x
+        player_y = self.view_y - offset_y
+
         glColor3f(*self.controller.player.color)
         glPointSize(8)
         glBegin(GL_POINTS)
-        glVertex2i(int(self.controller.player.x), int(self.controller.player.y))
+        glVertex2i(int(player_x), int(player_y))
         glEnd()
 
         glLineWidth(3)
         glBegin(GL_LINES)
-        glVertex2i(int(self.controller.player.x), int(self.controller.player.y))
-        glVertex2i(int(self.controller.player.x + self.controller.player.dx * 5),
-                   int(self.controller.player.y + self.controller.player.dy * 5))
+        glVertex2i(int(player_x), int(player_y))
+        glVertex2i(int(player_x + math.cos(self.view_angle) * 25),
+                   int(player_y + math.sin(self.view_angle) * 25))
         glEnd()
 
+    def draw_background(self):
+        self.draw_ceiling()
+        self.draw_floor()
+
     def draw_ceiling(self):
         c = (0.05, 0.05, 0.4)
         glColor3f(*c)
@@ -189,32 +466,6 @@ class Renderer:
         glVertex2i(self.window_width - self.padding, self.window_height // 2)
         glEnd()
 
-    def precompute_vertices_2d_world(self):
-        vertices = []
-        border_thickness = 1
-        print(f'\nComputing vertices...')
-
-        for y in range(self.controller.world.map_grid_size_y):
-            for x in range(self.controller.world.map_grid_size_x):
-                is_wall = self.controller.world.map_grid_walls[y * self.controller.world.map_grid_size_x + x] > 0
-
-                x_offset = x * self.controller.world.map_grid_size
-                y_offset = y * self.controller.world.map_grid_size
-
-                # Slightly smaller coordinates for drawing the quad
-                v1 = (x_offset + border_thickness, y_offset + border_thickness)
-                v2 = (
-                    x_offset + border_thickness, y_offset + self.controller.world.map_grid_size - border_thickness)
-                v3 = (x_offset + self.controller.world.map_grid_size - border_thickness,
-                      y_offset + self.controller.world.map_grid_size - border_thickness)
-                v4 = (
-                    x_offset + self.controller.world.map_grid_size - border_thickness, y_offset + border_thickness)
-
-                vertices.append((is_wall, v1, v2, v3, v4))
-
-        print(f'\nVertices computed: {len(vertices)}')
-        return vertices
-
     def draw_fps(self):
         if self.display_fps:
             glColor3f(0, 1, 0)  # Green
@@ -238,33 +489,6 @@ class Renderer:
 
         return average_fps
 
-    def update_cached_world_2d(self, x, y, is_wall):
-        index = y * self.controller.world.map_grid_size_x + x
-        border_thickness = 1
-        x_offset = x * self.controller.world.map_grid_size
-        y_offset = y * self.controller.world.map_grid_size
-
-        v1 = (x_offset + border_thickness, y_offset + border_thickness)
-        v2 = (
-            x_offset + border_thickness, y_offset + self.controller.world.map_grid_size - border_thickness)
-        v3 = (x_offset + self.controller.world.map_grid_size - border_thickness,
-              y_offset + self.controller.world.map_grid_size - border_thickness)
-        v4 = (
-            x_offset + self.controller.world.map_grid_size - border_thickness, y_offset + border_thickness)
-
-        self.cached_vertices[index] = (is_wall, v1, v2, v3, v4)
-
-    def check_for_world_has_changed(self):
-        for y in range(self.controller.world.map_grid_size_y):
-            for x in range(self.controller.world.map_grid_size_x):
-                current_index_is_wall = self.controller.world.map_grid_walls[
-                                            y * self.controller.world.map_grid_size_x + x] > 0
-                cached_is_wall = self.cached_vertices[y * self.controller.world.map_grid_size_x + x][0]
-
-                # Check if there is a difference between the current state and the cached state and update if there is
-                if current_index_is_wall != cached_is_wall:
-                    self.update_cached_world_2d(x, y, current_index_is_wall)
-
     def update_window_dimensions(self, x, y):
         self.window_width = x
         self.window_height = y
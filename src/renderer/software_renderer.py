@@ -0,0 +1,270 @@
+# /src/renderer/software_renderer.py
+
+import numpy as np
+
+from src.renderer.batch_raycaster import raycast_columns
+from src.renderer.occupancy_pyramid import pyramid_for
+from src.renderer.ray_tables import get_ray_tables
+from src.renderer.raycaster import view_distance
+from src.renderer.sprite_renderer import SpriteRenderer, load_sprite_atlas
+from src.renderer.texture_atlas import load_wall_atlas
+
+# The floor and the ceiling reuse wall textures of the atlas, the checkerboard and the brick, drawn with the darker
+# shade so walls stand out
+FLOOR_TEXTURE = 0
+CEILING_TEXTURE = 1
+FLOOR_SHADE = 1
+
+
+class SoftwareRenderer:
+    def __init__(self, game_controller, height=400, column_width=8, num_columns=None, atlas=None, pyramid=None,
+                 columns=None, frame=None, sprite_atlas=None, textured_floor=True, max_distance=None):
+        """
+        Render the 3D view into a NumPy RGB framebuffer, no window or OpenGL context is needed.
+
+        :param game_controller: Anything with a `player` and a `world`, usually a GameController.
+        :param height: Height of the frame in pixels.
+        :param column_width: Width in pixels of every raycast column.
+        :param num_columns: Number of rays cast per frame, defaults to one per degree of the player's FOV.
+        :param atlas: TextureAtlas holding the wall textures, defaults to the built-in textures.
+        :param pyramid: OccupancyPyramid used to skip empty space, built for large worlds when not given.
+        :param columns: Optional (start, stop) range of columns to render, the frame then only holds this strip of
+                        the view. Used to split a view between several renderers.
+        :param frame: Optional H x W x 3 uint8 array to render into, such as a view of a shared buffer. It is
+                      allocated when not given.
+        :param sprite_atlas: TextureAtlas holding the sprites of the entities, defaults to the built-in sprites.
+        :param textured_floor: Cast textured floor and ceiling rows from the FLOOR_TEXTURE and CEILING_TEXTURE wall
+                               textures, flat colors are filled instead when False.
+        :param max_distance: Maximum distance a ray travels, defaults to the configured view distance read once here.
+        """
+        self.controller = game_controller
+        self.fov = self.controller.player.FOV
+        self.num_columns = num_columns if num_columns is not None else self.fov
+        self.column_width = column_width
+        self.ray_tables = get_ray_tables(self.num_columns, self.fov)
+
+        start, stop = columns if columns is not None else (0, self.num_columns)
+        self.columns = slice(start, stop)
+        self.strip_columns = stop - start
+        self.fisheye = self.ray_tables.fisheye[self.columns]
+
+        self.width = self.strip_columns * self.column_width
+        self.height = height
+
+        self.ceiling_color = _to_rgb8((0.05, 0.05, 0.4))
+        self.floor_color = _to_rgb8((0.4, 0.4, 0.4))
+        self.atlas = atlas if atlas is not None else load_wall_atlas()
+        self._owns_pyramid = pyramid is None
+        self.pyramid = pyramid if pyramid is not None else pyramid_for(self.controller.world)
+        self.max_distance = max_distance if max_distance is not None else view_distance(self.controller.world)
+
+        if frame is None:
+            frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        elif frame.shape != (self.height, self.width, 3) or frame.dtype != np.uint8:
+            raise ValueError(f"Cannot render into a frame of shape {frame.shape} and type {frame.dtype}, expected "
+                             f"({self.height}, {self.width}, 3) uint8")
+        self.frame = frame
+
+        # Perpendicular distance to the wall of every column, filled by draw_world_3d and used to clip sprites
+        self.depth = np.full(self.strip_columns, np.inf)
+        self.sprites = SpriteRenderer(self.num_columns, self.fov, self.height, self.column_width,
+                                      self.controller.world.map_grid_size,
+                                      sprite_atlas if sprite_atlas is not None else load_sprite_atlas(),
+                                      columns=columns)
+
+        # The frame seen as (rows, columns, pixels per column, rgb), writing a column writes all of its pixels.
+        # Splitting the width axis never copies, so this stays a view of strided frames too.
+        self._column_view = self.frame.reshape(self.height, self.strip_columns, self.column_width, 3)
+        self._rows = np.arange(self.height)[:, np.newaxis]
+
+        # The same view with every pixel as a single 3 byte value instead of 3 uint8 channels
+        self._pixel_columns = _as_pixels(self.frame).reshape(self.height, self.strip_columns, self.column_width)
+
+        # Floor casting, the perpendicular distance to the floor seen by every row below the horizon. Rows above the
+        # horizon see the ceiling at the same distance as the row mirrored below it.
+        self.textured_floor = textured_floor
+        self.horizon = self.height // 2
+        tile_size = self.controller.world.map_grid_size
+        floor_rows = np.arange(self.height - self.horizon) + 0.5
+        self.row_distance = tile_size * self.height / (2 * floor_rows)
+        self._row_distance32 = self.row_distance.astype(np.float32)[:, np.newaxis]
+
+        # Ray directions divided by the fisheye factor, a floor point is the camera plus its row distance times this
+        self._floor_cos = self.ray_tables.cos_offsets[self.columns] / self.fisheye
+        self._floor_sin = self.ray_tables.sin_offsets[self.columns] / self.fisheye
+
+        self._floor_texels = None
+        self._floor_source = None  # Atlas colors the floor tables were taken from
+
+    def render(self, result=None, pose=None):
+        """
+        Render a frame from the current player position.
+
+        :param result: RaycastResult for the current player position, cast here when not given.
+        :param pose: (angle, x, y) of the camera the result was cast from, for the sprites. Defaults to the pose of
+                     the player.
+        :return: The H x W x 3 uint8 frame. The array is reused by the next call, copy it to keep it.
+        """
+        if result is None:
+            result = self.cast_rays()
+
+        self.draw_background(result, pose)
+        self.draw_world_3d(result)
+        self.draw_sprites(pose)
+
+        return self.frame
+
+    def close(self):
+        """Detach the occupancy pyramid built by this renderer from the world, a pyramid given to it is left as is."""
+        if self._owns_pyramid and self.pyramid is not None:
+            self.pyramid.close()
+        self.pyramid = None
+
+    def cast_rays(self):
+        player = self.controller.player
+        return raycast_columns(player.angle, player.x, player.y, self.controller.world,
+                               num_columns=self.num_columns, fov=self.fov, texture_size=self.atlas.texture_size,
+                               max_distance=self.max_distance, pyramid=self.pyramid, columns=self.columns)
+
+    def draw_background(self, result=None, pose=None):
+        """Draw the floor and the ceiling, textured or flat depending on `textured_floor`."""
+        if self.textured_floor:
+            self.draw_floor_ceiling(result, pose)
+        else:
+            self.draw_ceiling()
+            self.draw_floor()
+
+    def draw_floor_ceiling(self, result=None, pose=None):
+        """
+        Textured floor and ceiling, cast a block of rows at a time from the row distance table.
+
+        :param result: RaycastResult of the frame. Rows further than every wall of it are hidden by the walls and
+                       are not cast, they are left for draw_world_3d to cover.
+        :param pose: (angle, x, y) of the camera, defaults to the pose of the player.
+        """
+        if pose is None:
+            player = self.controller.player
+            pose = (player.angle, player.x, player.y)
+        angle, x, y = pose
+
+        # Rows covered by the wall line of every column are skipped. The rows are taken from the same integer line
+        # bounds as draw_world_3d, with one row to spare, so no skipped row is left uncovered
+        first_row = 0
+        if result is not None:
+            _, _, line_offset, line_stop = self._wall_lines(result)
+            covered = min(self.horizon - int(line_offset.max()), int(line_stop.min()) - self.horizon)
+            first_row = max(covered - 1, 0)
+
+        row_distance = self._row_distance32[first_row:]
+        texture_size = self.atlas.texture_size
+        texel_scale = texture_size / self.controller.world.map_grid_size
+
+        # Ray directions of the strip rotated to the viewing angle, scaled to one unit of perpendicular distance
+        cos_a = np.cos(angle)
+        sin_a = np.sin(angle)
+        step_x = ((cos_a * self._floor_cos - sin_a * self._floor_sin) * texel_scale).astype(np.float32)
+        step_y = ((sin_a * self._floor_cos + cos_a * self._floor_sin) * texel_scale).astype(np.float32)
+
+        # Texel coordinates relative to the texture the camera stands on, small enough for float32 precision
+        origin_x = x * texel_scale
+        origin_y = y * texel_scale
+        base_x = int(origin_x // texture_size) * texture_size
+        base_y = int(origin_y // texture_size) * texture_size
+        texture_x = np.floor(row_distance * step_x + np.float32(origin_x - base_x)).astype(np.int32)
+        texture_y = np.floor(row_distance * step_y + np.float32(origin_y - base_y)).astype(np.int32)
+        texel = ((texture_y % texture_size) * texture_size + texture_x % texture_size).ravel()
+
+        # Texels are read and written as whole 3 byte pixels, which halves the cost of spreading them over the
+        # pixels of their column
+        floor_texels, ceiling_texels = self._floor_tables()
+        floor = floor_texels.take(texel).reshape(texture_x.shape)
+        self._pixel_columns[self.horizon + first_row:] = floor[:, :, np.newaxis]
+
+        ceiling_rows = self.horizon - first_row
+        if ceiling_rows > 0:
+            ceiling = ceiling_texels.take(texel[:ceiling_rows * texture_x.shape[1]])
+            self._pixel_columns[ceiling_rows - 1::-1] = ceiling.reshape(ceiling_rows, -1, 1)
+
+        # Hidden rows still get a color, in case a column has no wall to cover them
+        if first_row > 0:
+            self.frame[self.horizon - first_row:self.horizon] = self.ceiling_color
+            self.frame[self.horizon:self.horizon + first_row] = self.floor_color
+
+    def draw_ceiling(self):
+        self.frame[:self.height // 2] = self.ceiling_color
+
+    def draw_floor(self):
+        self.frame[self.height // 2:] = self.floor_color
+
+    def draw_world_3d(self, result):
+        world_height = self.height
+        ray_distance, line_height, line_offset, line_stop = self._wall_lines(result)
+        self.depth = ray_distance
+
+        texture_size = self.atlas.texture_size
+        texture_step = texture_size / np.maximum(line_height, 1)
+
+        # Lines taller than the view start partway through the texture
+        texture_offset = np.maximum(line_height - world_height, 0) / 2
+
+        # Distant walls are short, only the band of rows holding at least one wall line is shaded
+        band_start = int(line_offset.min())
+        band_stop = int(line_stop.max())
+        if band_start >= band_stop:
+            return
+
+        # Row of every pixel relative to the top of its wall line, one column per ray
+        y = self._rows[band_start:band_stop] - line_offset
+        is_wall = (y >= 0) & (y < line_stop - line_offset)
+
+        texture_y = ((texture_offset + y) * texture_step).astype(np.int64)
+        texture_y = np.clip(texture_y, 0, texture_size - 1)
+
+        # Columns with fewer pixels than texels read a pre-filtered level of the mip chain instead of skipping texels
+        level = self.atlas.mip_level(np.minimum(line_height, world_height))
+        texel = self.atlas.mip_texel(level, texture_y, result.texture_u)
+        colors = self.atlas.mip_colors[result.wall_id, result.side, texel]
+        self._column_view[band_start:band_stop][is_wall] = colors[is_wall][:, np.newaxis, :]
+
+    def draw_sprites(self, pose=None):
+        """Draw the entities of the controller, if it has any, over the walls of the last draw_world_3d."""
+        if pose is None:
+            player = self.controller.player
+            pose = (player.angle, player.x, player.y)
+
+        return self.sprites.draw(self._column_view, self.depth, getattr(self.controller, 'entities', None), *pose)
+
+    def _wall_lines(self, result):
+        """
+        Wall line of every column of a result.
+
+        :return: (perpendicular distance, height in pixels before clipping to the view, first row, row after the last)
+        """
+        # Fisheye effect fix (see: https://lodev.org/cgtutor/raycasting.html)
+        ray_distance = np.maximum(result.distance * self.fisheye, 1e-6)
+        line_height = (self.controller.world.map_grid_size * self.height) / ray_distance
+
+        visible_height = np.minimum(line_height, self.height)
+        line_offset = np.floor((self.height - visible_height) / 2).astype(np.int64)
+        line_stop = line_offset + visible_height.astype(np.int64)
+
+        return ray_distance, line_height, line_offset, line_stop
+
+    def _floor_tables(self):
+        # Flat tables of the floor and ceiling texels as 3 byte pixels, taken again if the atlas changed
+        colors = self.atlas.colors
+        if self._floor_source is not colors:
+            self._floor_texels = (_as_pixels(np.ascontiguousarray(colors[FLOOR_TEXTURE, FLOOR_SHADE])).ravel(),
+                                  _as_pixels(np.ascontiguousarray(colors[CEILING_TEXTURE, FLOOR_SHADE])).ravel())
+            self._floor_source = colors
+
+        return self._floor_texels
+
+
+def _as_pixels(rgb):
+    """View of a (..., 3) uint8 array as (...) 3 byte values, the channel axis must be contiguous."""
+    return rgb.view(np.dtype((np.void, 3)))[..., 0]
+
+
+def _to_rgb8(color):
+    return np.array([int(round(channel * 255)) for channel in color], dtype=np.uint8)
@@ -0,0 +1,250 @@
+# /src/renderer/sprite_renderer.py
+
+import math
+
+import numpy as np
+
+from src.renderer.ray_tables import get_ray_tables
+from src.renderer.texture_atlas import TextureAtlas
+
+# Texels of this color are not drawn, so sprites can have any silhouette
+SPRITE_TRANSPARENT_COLOR = (255, 0, 255)
+
+# Sprites closer than this to the camera, in world units, are not drawn
+SPRITE_NEAR_PLANE = 1.0
+
+SPRITE_SHADES = (1.0,)  # Sprites are not shaded, any other shade would also change the transparent color
+
+
+class SpriteRenderer:
+    def __init__(self, num_columns, fov, height, column_width, tile_size, atlas, columns=None):
+        """
+        Draw entities as billboards over a rendered wall frame, clipped against the per-column depth of the walls.
+
+        Sprites outside the view cone or behind walls in every column they cover are rejected in a batch before
+        any texel is read. The remaining sprites are drawn from far to near, only in the columns where they are in
+        front of the wall.
+
+        :param num_columns: Number of rays cast per frame.
+        :param fov: Field of view in degrees.
+        :param height: Height of the frame in pixels.
+        :param column_width: Width in pixels of every raycast column.
+        :param tile_size: Size of a world tile, the height of a wall.
+        :param atlas: TextureAtlas holding the sprite textures, indexed by Entity.sprite, see load_sprite_atlas.
+        :param columns: Optional (start, stop) range of columns of the frame, as in SoftwareRenderer.
+        """
+        self.num_columns = num_columns
+        self.fov = fov
+        self.height = height
+        self.column_width = column_width
+        self.tile_size = tile_size
+        self.atlas = atlas
+        self.ray_tables = get_ray_tables(num_columns, fov)
+
+        self.start, self.stop = columns if columns is not None else (0, num_columns)
+        self.fisheye = self.ray_tables.fisheye[self.start:self.stop]
+        self.column_step = math.radians(fov) / num_columns
+        self.half_fov = math.radians(fov) / 2
+
+        # Number of sprites drawn by the last call, 0 when every sprite was culled
+        self.drawn = 0
+
+        self._opaque = None
+        self._opaque_colors = None
+        self._sprites = None
+        self._sprites_key = None
+
+    @property
+    def opaque(self):
+        """(sprite, texture_y, texture_x) boolean array, False where a texel is transparent."""
+        colors = self.atlas.colors
+        if self._opaque_colors is not colors:
+            self._opaque = np.any(colors[:, 0] != np.asarray(SPRITE_TRANSPARENT_COLOR, dtype=np.uint8), axis=-1)
+            self._opaque_colors = colors
+
+        return self._opaque
+
+    def draw(self, column_view, depth, entities, angle, x, y):
+        """
+        Draw the sprites of the entities around a camera.
+
+        :param column_view: The frame seen as (rows, columns, pixels per column, rgb), as in SoftwareRenderer.
+        :param depth: Perpendicular distance to the wall of every column of the frame, math.inf where none was hit.
+        :param entities: EntityManager holding the entities, those with a sprite are drawn.
+        :param angle: Viewing angle in radians.
+        :param x: X position of the camera.
+        :param y: Y position of the camera.
+        :return: Number of sprites drawn.
+        """
+        self.drawn = 0
+        if entities is None or len(entities) == 0:
+            return 0
+
+        xs, ys, radii, textures = self._sprite_arrays(entities)
+        if len(xs) == 0:
+            return 0
+
+        # Camera space, forward along the viewing angle and sideways towards increasing ray angles
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        dx = xs - x
+        dy = ys - y
+        forward = dx * cos_a + dy * sin_a
+        sideways = dy * cos_a - dx * sin_a
+
+        in_front = forward > SPRITE_NEAR_PLANE
+        forward = np.where(in_front, forward, SPRITE_NEAR_PLANE)
+
+        # Columns covered by every sprite, rays are evenly spaced in angle
+        center = np.arctan2(sideways, forward)
+        half_width = np.arctan(radii / forward)
+        first_column = (center - half_width + self.half_fov) / self.column_step
+        last_column = (center + half_width + self.half_fov) / self.column_step
+        first = np.clip(np.ceil(first_column), self.start, self.stop).astype(np.int64)
+        last = np.clip(np.ceil(last_column), self.start, self.stop).astype(np.int64)
+
+        # View cone rejection, then occlusion: a sprite behind the wall of every column it covers is skipped
+        visible = in_front & (last > first)
+        visible[visible] = _range_max(depth, first[visible] - self.start, last[visible] - self.start) > \
+            forward[visible]
+
+        # Far to near, nearer sprites are drawn over further ones
+        order = np.flatnonzero(visible)
+        order = order[np.argsort(-forward[order], kind='stable')]
+        if len(order) == 0:
+            return 0
+
+        # Sprites stand on the floor, the floor line is at the bottom of a wall of the same distance
+        height = self.height
+        distance = forward[order]
+        scale = height / distance
+        bottom = height / 2 + self.tile_size * scale / 2
+        size = 2 * radii[order] * scale
+        top = bottom - size
+        row_start = np.maximum(0, np.ceil(top)).astype(np.int64)
+        row_stop = np.minimum(height, np.ceil(bottom)).astype(np.int64)
+
+        # Every sprite column in front of the wall, all sprites concatenated in drawing order
+        sprite, column = _expand_ranges(first[order], last[order])
+        in_front = depth[column - self.start] > distance[sprite]
+        sprite, column = sprite[in_front], column[in_front]
+
+        # Every pixel of those columns, texel coordinates are never negative as covered columns and rows start inside
+        # the sprite
+        texture_size = self.atlas.texture_size
+        span = (last_column - first_column)[order]
+        texture_x = (column - first_column[order][sprite]) / span[sprite] * texture_size
+        texture_x = np.minimum(texture_x.astype(np.int64), texture_size - 1)
+
+        entry, row = _expand_ranges(row_start[sprite], row_stop[sprite])
+        sprite = sprite[entry]
+        texture_y = ((row - top[sprite]) / size[sprite] * texture_size).astype(np.int64)
+        texture_y = np.minimum(texture_y, texture_size - 1)
+        texture_x = texture_x[entry]
+        column = column[entry]
+
+        texture = textures[order][sprite]
+        opaque = self.opaque[texture, texture_y, texture_x]
+        sprite, row, column = sprite[opaque], row[opaque], column[opaque] - self.start
+        texture, texture_y, texture_x = texture[opaque], texture_y[opaque], texture_x[opaque]
+
+        # Where sprites overlap only the nearest one is kept. A repeated index in one assignment does not say which
+        # write wins, so every pixel is written once, by the last sprite drawn over it
+        pixel = row * depth.shape[0] + column
+        index = np.arange(len(pixel))
+        last_write = np.full(height * depth.shape[0], -1, dtype=np.int64)
+        np.maximum.at(last_write, pixel, index)
+        keep = last_write[pixel] == index
+
+        column_view[row[keep], column[keep]] = \
+            self.atlas.colors[texture[keep], 0, texture_y[keep], texture_x[keep]][:, np.newaxis, :]
+        self.drawn = int(np.count_nonzero(np.diff(sprite)) + 1) if len(sprite) else 0
+
+        return self.drawn
+
+    def _sprite_arrays(self, entities):
+        # Positions, radii and textures of the entities with a sprite, gathered again only once an entity changed
+        key = (id(entities), entities.version)
+        if self._sprites_key != key:
+            sprites = [entity for entity in entities if entity.sprite is not None]
+            count = len(sprites)
+            self._sprites = (np.fromiter((entity.x for entity in sprites), dtype=np.float64, count=count),
+                             np.fromiter((entity.y for entity in sprites), dtype=np.float64, count=count),
+                             np.fromiter((entity.radius for entity in sprites), dtype=np.float64, count=count),
+                             np.fromiter((entity.sprite for entity in sprites), dtype=np.int64, count=count))
+            self._sprites_key = key
+
+        return self._sprites
+
+
+def _expand_ranges(starts, stops):
+    """
+    Concatenate the ranges [start, stop), returns the index of the range of every value and the values. Empty and
+    reversed ranges give nothing.
+    """
+    lengths = np.maximum(stops - starts, 0)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    return owner, np.arange(len(owner)) - offsets[owner] + starts[owner]
+
+
+def _range_max(values, starts, stops):
+    """Maximum of values[start:stop] for every range, with a sparse table so all ranges are answered at once."""
+    levels = [values]
+    width = 1
+    while 2 * width <= len(values):
+        previous = levels[-1]
+        levels.append(np.maximum(previous[:-width], previous[width:]))
+        width *= 2
+
+    table = np.full((len(levels), len(values)), -math.inf)
+    for level, maxima in enumerate(levels):
+        table[level, :len(maxima)] = maxima
+
+    lengths = stops - starts
+    level = np.floor(np.log2(lengths)).astype(np.int64)
+    return np.maximum(table[level, starts], table[level, stops - (1 << level)])
+
+
+def load_sprite_atlas(file_paths=None, texture_size=32):
+    """
+    Atlas of the sprites of the entities, texels of SPRITE_TRANSPARENT_COLOR are not drawn.
+
+    :param file_paths: Images of the sprites (see image_io.read_image), indexed by Entity.sprite. The built-in
+                       sprites are used when not given.
+    :param texture_size: Width and height of every sprite in the atlas.
+    """
+    atlas = TextureAtlas(texture_size, SPRITE_SHADES)
+    if file_paths is not None:
+        for file_path in file_paths:
+            atlas.add_image(file_path)
+        return atlas
+
+    for sprite in _builtin_sprites(texture_size):
+        atlas.add_texture(sprite)
+
+    return atlas
+
+
+def _builtin_sprites(size):
+    # Barrel, pillar, lamp and plant, drawn from shapes in texture coordinates in [0, 1)
+    v, u = (np.mgrid[0:size, 0:size] + 0.5) / size
+    du = np.abs(u - 0.5)
+
+    def sprite(*layers):
+        texels = np.empty((size, size, 3), dtype=np.uint8)
+        texels[...] = SPRITE_TRANSPARENT_COLOR
+        for mask, color in layers:
+            texels[mask] = color
+        return texels
+
+    barrel = sprite(((v > 0.3) & (du < 0.3), (140, 90, 40)),
+                    ((v > 0.3) & (du < 0.3) & ((np.abs(v - 0.5) < 0.03) | (np.abs(v - 0.85) < 0.03)), (70, 45, 20)))
+    pillar = sprite(((v > 0.1) & (du < 0.15), (170, 170, 170)),
+                    (((v > 0.05) & (v < 0.15) | (v > 0.92)) & (du < 0.25), (200, 200, 200)))
+    lamp = sprite(((v > 0.45) & (du < 0.04), (80, 80, 80)),
+                  ((u - 0.5) ** 2 + (v - 0.3) ** 2 < 0.2 ** 2, (255, 230, 120)))
+    plant = sprite(((u - 0.5) ** 2 + ((v - 0.45) * 1.3) ** 2 < 0.3 ** 2, (50, 160, 60)),
+                   ((v > 0.7) & (du < 0.2), (180, 90, 50)))
+
+    return barrel, pillar, lamp, plant
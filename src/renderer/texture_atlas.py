@@ -0,0 +1,195 @@
+# /src/renderer/texture_atlas.py
+
+import numpy as np
+
+from src.renderer.textures import ALL_TEXTURES
+from src.utils.image_io import read_image
+
+# Wall tints, indexed by texture (checkerboard red, brick yellow, window blue, door green)
+WALL_TINTS = (
+    (1.0, 0.5, 0.5),
+    (1.0, 1.0, 0.5),
+    (0.5, 0.5, 1.0),
+    (0.5, 1.0, 0.5),
+)
+
+WALL_SHADES = (1.0, 0.5)  # Indexed by the side of the wall that was hit
+
+
+class TextureAtlas:
+    def __init__(self, texture_size=32, shades=WALL_SHADES):
+        """
+        Square textures stored as contiguous uint8 RGB arrays, with every tint and shade precomputed.
+
+        :param texture_size: Width and height of every texture in the atlas, other sizes are resampled on add.
+        :param shades: Brightness multipliers, one variant of every texture is precomputed per shade.
+        """
+        self.texture_size = texture_size
+        self.shades = tuple(shades)
+
+        self._variants = []
+        self._colors = None
+        self._mip_colors = None
+        self._mip_source = None  # The colors the mip chain was built from, it is rebuilt when they change
+        self._column_colors = {}
+
+        # Every level halves the previous one, down to a single texel for power of two sizes
+        self.mip_levels = 1
+        while texture_size % (1 << self.mip_levels) == 0:
+            self.mip_levels += 1
+
+        # Index of the first texel of every level in mip_colors, the levels are packed one after the other
+        level_texels = [(texture_size >> level) ** 2 for level in range(self.mip_levels)]
+        self.mip_offsets = np.concatenate(([0], np.cumsum(level_texels)[:-1])).astype(np.int64)
+
+    @classmethod
+    def from_colors(cls, colors, shades=WALL_SHADES):
+        """
+        Atlas over an existing (texture, shade, texture_y, texture_x, rgb) uint8 array, without copying it. Used to
+        share an atlas between processes through shared memory.
+        """
+        atlas = cls(colors.shape[2], shades)
+        atlas._variants = list(colors)
+        atlas._colors = colors
+        return atlas
+
+    def __len__(self):
+        return len(self._variants)
+
+    @property
+    def colors(self):
+        """All textures as one (texture, shade, texture_y, texture_x, rgb) uint8 array."""
+        if self._colors is None:
+            if self._variants:
+                self._colors = np.ascontiguousarray(np.stack(self._variants))
+            else:
+                size = self.texture_size
+                self._colors = np.zeros((0, len(self.shades), size, size, 3), dtype=np.uint8)
+
+        return self._colors
+
+    @property
+    def mip_colors(self):
+        """
+        Mip chain of all textures as one (texture, shade, texel, rgb) uint8 array.
+
+        Level k averages blocks of 2^k x 2^k texels and is stored at its real size, (texture_size >> k) texels wide.
+        The levels are packed one after the other, mip_texel gives the index of a texel.
+        """
+        colors = self.colors
+        if self._mip_source is not colors:
+            levels = [colors.reshape(colors.shape[:2] + (-1, 3))]
+            size = self.texture_size
+            for level in range(1, self.mip_levels):
+                block = 1 << level
+                shape = colors.shape[:2] + (size // block, block, size // block, block, 3)
+                averages = np.round(colors.reshape(shape).mean(axis=(3, 5))).astype(np.uint8)
+                levels.append(averages.reshape(colors.shape[:2] + (-1, 3)))
+
+            self._mip_colors = np.ascontiguousarray(np.concatenate(levels, axis=2))
+            self._mip_source = colors
+
+        return self._mip_colors
+
+    def mip_texel(self, level, texture_y, texture_x):
+        """
+        Index in mip_colors of the texel of a level covering the level 0 texel (texture_x, texture_y). Scalars or
+        arrays, which broadcast together.
+        """
+        return self.mip_offsets[level] + (texture_y >> level) * (self.texture_size >> level) + (texture_x >> level)
+
+    def mip_level(self, line_height):
+        """
+        Mip level of wall lines `line_height` pixels tall, a scalar or an array. Level 0 is used while a line has
+        at least one pixel per texel, every halving of the height past that moves one level down the chain.
+        """
+        texels_per_pixel = self.texture_size / np.maximum(line_height, 1)
+        level = np.floor(np.log2(np.maximum(texels_per_pixel, 1)))
+        return np.minimum(level, self.mip_levels - 1).astype(np.int64)
+
+    def add_image(self, file_path, tint=(1.0, 1.0, 1.0)):
+        """Add a texture read from a PNG or PPM file, see add_texture."""
+        return self.add_texture(read_image(file_path), tint)
+
+    def add_texture(self, texels, tint=(1.0, 1.0, 1.0)):
+        """
+        Add a texture to the atlas.
+
+        :param texels: A 2D array of intensities in [0, 1] or a H x W x 3 array of uint8 RGB values.
+        :param tint: RGB multiplier applied to the texture.
+        :return: The id of the new texture.
+        """
+        texels = np.asarray(texels)
+        if texels.ndim == 2:
+            rgb = texels.astype(np.float64)[:, :, np.newaxis].repeat(3, axis=2)
+        elif texels.ndim == 3 and texels.shape[2] == 3:
+            rgb = texels.astype(np.float64) / 255.0
+        else:
+            raise ValueError(f"Cannot add a texture of shape {texels.shape}, expected (H, W) or (H, W, 3)")
+
+        rgb = self._resample(rgb) * np.asarray(tint, dtype=np.float64)
+        shades = np.asarray(self.shades, dtype=np.float64)[:, np.newaxis, np.newaxis, np.newaxis]
+        variants = np.clip(np.round(rgb[np.newaxis] * shades * 255), 0, 255).astype(np.uint8)
+
+        self._variants.append(variants)
+        self._colors = None
+        self._column_colors.clear()
+
+        return len(self._variants) - 1
+
+    def column(self, texture_id, shade_index, texture_x):
+        """A texture column as a (texture_y, rgb) uint8 array."""
+        return self.colors[texture_id, shade_index, :, texture_x]
+
+    def column_colors(self, texture_id, shade_index, texture_x, level=0):
+        """
+        A texture column as a list of (r, g, b) floats in [0, 1], ready to be passed to glColor3f.
+
+        :param texture_x: Column in level 0 texels.
+        :param level: Mip level to read the column from, see mip_level. The column then holds texture_size >> level
+                      texels, texel texture_y of level 0 is at texture_y >> level.
+        """
+        key = (texture_id, shade_index, texture_x, level)
+        colors = self._column_colors.get(key)
+        if colors is None:
+            rows = np.arange(self.texture_size >> level) << level
+            column = self.mip_colors[texture_id, shade_index, self.mip_texel(level, rows, texture_x)]
+            colors = [tuple(texel) for texel in (column / 255.0).tolist()]
+            self._column_colors[key] = colors
+
+        return colors
+
+    def _resample(self, rgb):
+        height, width = rgb.shape[:2]
+        size = self.texture_size
+        if height == width == size:
+            return rgb
+
+        # Images a whole number of times larger are box filtered, so detail is averaged instead of skipped
+        if height % size == 0 and width % size == 0:
+            return rgb.reshape(size, height // size, size, width // size, 3).mean(axis=(1, 3))
+
+        # Nearest neighbour resampling to the size of the atlas otherwise
+        rows = (np.arange(self.texture_size) * height) // self.texture_size
+        columns = (np.arange(self.texture_size) * width) // self.texture_size
+        return rgb[rows][:, columns]
+
+
+def load_texture_files(file_paths, tints=WALL_TINTS, texture_size=32):
+    """Build an atlas from image files (see image_io.read_image), texture ids follow the order of the paths."""
+    atlas = TextureAtlas(texture_size)
+    for texture_id, file_path in enumerate(file_paths):
+        atlas.add_image(file_path, tints[texture_id] if texture_id < len(tints) else (1.0, 1.0, 1.0))
+
+    return atlas
+
+
+def load_wall_atlas(textures=ALL_TEXTURES, tints=WALL_TINTS, texture_size=32):
+    """Build an atlas from a flat list of square textures laid out one after the other, such as ALL_TEXTURES."""
+    atlas = TextureAtlas(texture_size)
+    texels = np.asarray(textures, dtype=np.float64).reshape(-1, texture_size, texture_size)
+
+    for texture_id, texture in enumerate(texels):
+        atlas.add_texture(texture, tints[texture_id] if texture_id < len(tints) else (1.0, 1.0, 1.0))
+
+    return atlas
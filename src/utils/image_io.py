@@ -0,0 +1,229 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from src.exceptions.image_exceptions import ImageFormatError
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG color types and their number of channels
+PNG_GRAY = 0
+PNG_RGB = 2
+PNG_GRAY_ALPHA = 4
+PNG_RGBA = 6
+PNG_CHANNELS = {PNG_GRAY: 1, PNG_RGB: 3, PNG_GRAY_ALPHA: 2, PNG_RGBA: 4}
+
+
+def read_image(file_path):
+    """
+    Read a PNG or PPM/PGM image as a H x W x 3 uint8 RGB array, without any imaging library.
+
+    PNG files must be 8 bits per channel and not interlaced, gray and alpha channels are supported (alpha is dropped).
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if data.startswith(PNG_SIGNATURE):
+        return _read_png(data, file_path)
+    if data[:2] in (b'P2', b'P3', b'P5', b'P6'):
+        return _read_pnm(data, file_path)
+
+    raise ImageFormatError(f"{file_path} is not a PNG or PPM image")
+
+
+def write_png(file_path, image, compression=6):
+    """Write a H x W x 3 uint8 RGB array as a PNG file."""
+    with open(file_path, 'wb') as f:
+        f.write(encode_png(image, compression))
+
+
+def encode_png(image, compression=6):
+    """Encode a H x W x 3 uint8 RGB array as the bytes of a PNG file, rows are stored unfiltered."""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ImageFormatError(f"Cannot encode an image of shape {image.shape}, expected (H, W, 3)")
+
+    height, width = image.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # Filter type 0 in front of every row
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, PNG_RGB, 0, 0, 0)
+    return (PNG_SIGNATURE + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(rows.tobytes(), compression)) + _png_chunk(b'IEND', b''))
+
+
+def write_ppm(file_path, image):
+    """Write a H x W x 3 uint8 RGB array as a binary PPM file."""
+    with open(file_path, 'wb') as f:
+        f.write(encode_ppm(image))
+
+
+def encode_ppm(image):
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    return b'P6\n%d %d\n255\n' % (width, height) + image.tobytes()
+
+
+def image_files(directory, extensions=('.png', '.ppm', '.pgm')):
+    """Paths of the images of a directory, sorted by name so texture ids follow the file names."""
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if os.path.splitext(name)[1].lower() in extensions]
+
+
+def _png_chunk(chunk_type, payload):
+    return (struct.pack('>I', len(payload)) + chunk_type + payload
+            + struct.pack('>I', zlib.crc32(chunk_type + payload) & 0xffffffff))
+
+
+def _read_png(data, file_path):
+    position = len(PNG_SIGNATURE)
+    header = None
+    compressed = []
+    while position < len(data):
+        if len(data) - position < 12:
+            raise ImageFormatError(f"{file_path} ends in the middle of a PNG chunk")
+        length, chunk_type = struct.unpack('>I4s', data[position:position + 8])
+        payload = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if position > len(data):
+            raise ImageFormatError(f"{file_path} ends in the middle of its PNG {chunk_type!r} chunk")
+
+        if chunk_type == b'IHDR':
+            if length != 13:
+                raise ImageFormatError(f"{file_path} has a PNG header of {length} bytes, expected 13")
+            header = struct.unpack('>IIBBBBB', payload)
+        elif chunk_type == b'IDAT':
+            compressed.append(payload)
+        elif chunk_type == b'IEND':
+            break
+
+    if header is None:
+        raise ImageFormatError(f"{file_path} has no PNG header")
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in PNG_CHANNELS or interlace != 0:
+        raise ImageFormatError(f"{file_path} must be an 8 bit, non interlaced, non palette PNG (bit depth "
+                               f"{bit_depth}, color type {color_type}, interlace {interlace})")
+
+    channels = PNG_CHANNELS[color_type]
+    stride = width * channels
+    try:
+        decompressed = zlib.decompress(b''.join(compressed))
+    except zlib.error as e:
+        raise ImageFormatError(f"{file_path} has corrupt PNG image data ({e})") from None
+    if len(decompressed) != height * (stride + 1):
+        raise ImageFormatError(f"{file_path} holds {len(decompressed)} bytes of PNG image data, its {width}x{height} "
+                               f"header needs {height * (stride + 1)}")
+
+    raw = np.frombuffer(decompressed, dtype=np.uint8).reshape(height, stride + 1)
+    pixels = _unfilter_png(raw[:, 1:], raw[:, 0], channels)
+
+    return _to_rgb(pixels.reshape(height, width, channels), file_path)
+
+
+def _unfilter_png(filtered, filters, channels):
+    # Reverse the filter of every row, each row depends on the already decoded row above it
+    height, stride = filtered.shape
+    pixels = np.zeros((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.int32)
+    for row, filter_type in enumerate(filters.tolist()):
+        line = filtered[row].astype(np.int32)
+        if filter_type == 0:  # None
+            decoded = line
+        elif filter_type == 2:  # Up
+            decoded = (line + previous) & 0xff
+        elif filter_type in (1, 3, 4):  # Sub, Average and Paeth depend on the pixel on the left, decoded in order
+            decoded = _unfilter_png_row(line.tolist(), previous.tolist(), channels, filter_type)
+        else:
+            raise ImageFormatError(f"Unknown PNG filter type {filter_type}")
+
+        pixels[row] = decoded
+        previous = np.asarray(decoded, dtype=np.int32)
+
+    return pixels
+
+
+def _unfilter_png_row(line, previous, channels, filter_type):
+    decoded = [0] * len(line)
+    for i, value in enumerate(line):
+        left = decoded[i - channels] if i >= channels else 0
+        up = previous[i]
+        if filter_type == 1:
+            predictor = left
+        elif filter_type == 3:
+            predictor = (left + up) // 2
+        else:
+            up_left = previous[i - channels] if i >= channels else 0
+            estimate = left + up - up_left
+            distance_left = abs(estimate - left)
+            distance_up = abs(estimate - up)
+            distance_up_left = abs(estimate - up_left)
+            if distance_left <= distance_up and distance_left <= distance_up_left:
+                predictor = left
+            elif distance_up <= distance_up_left:
+                predictor = up
+            else:
+                predictor = up_left
+        decoded[i] = (value + predictor) & 0xff
+
+    return decoded
+
+
+def _read_pnm(data, file_path):
+    # Header fields are separated by whitespace, comments run from '#' to the end of the line
+    magic = data[:2]
+    fields = []
+    position = 2
+    while len(fields) < 3:
+        while position < len(data) and data[position:position + 1].isspace():
+            position += 1
+        if data[position:position + 1] == b'#':
+            position = data.find(b'\n', position)
+            if position < 0:
+                raise ImageFormatError(f"{file_path} has an incomplete PPM header")
+            continue
+
+        start = position
+        while position < len(data) and not data[position:position + 1].isspace():
+            position += 1
+        if start == position or not data[start:position].isdigit():
+            raise ImageFormatError(f"{file_path} has an incomplete PPM header")
+        fields.append(int(data[start:position]))
+
+    width, height, max_value = fields
+    if max_value == 0:
+        raise ImageFormatError(f"{file_path} has a maximum pixel value of 0")
+    channels = 3 if magic in (b'P3', b'P6') else 1
+    count = width * height * channels
+
+    if magic in (b'P5', b'P6'):
+        # A single whitespace byte separates the header from the pixels
+        dtype = np.dtype(np.uint8 if max_value < 256 else '>u2')
+        if len(data) - (position + 1) < count * dtype.itemsize:
+            raise ImageFormatError(f"{file_path} holds fewer pixels than its {width}x{height} header")
+        pixels = np.frombuffer(data, dtype=dtype, count=count, offset=position + 1)
+    else:
+        values = data[position:].split()[:count]
+        if not all(value.isdigit() for value in values):
+            raise ImageFormatError(f"{file_path} holds pixel values that are not numbers")
+        pixels = np.array(values, dtype=np.int64)
+
+    if pixels.size != count:
+        raise ImageFormatError(f"{file_path} holds fewer pixels than its {width}x{height} header")
+
+    if max_value != 255:
+        pixels = np.round(pixels.astype(np.float64) * 255 / max_value)
+
+    return _to_rgb(pixels.astype(np.uint8).reshape(height, width, channels), file_path)
+
+
+def _to_rgb(pixels, file_path):
+    channels = pixels.shape[2]
+    if channels in (1, 2):
+        return np.repeat(pixels[:, :, :1], 3, axis=2)
+    if channels in (3, 4):
+        return np.ascontiguousarray(pixels[:, :, :3])
+
+    raise ImageFormatError(f"{file_path} has {channels} channels")
@@ -0,0 +1,50 @@
+# /tests/test_entity_manager.py
+
+import numpy as np
+
+from benchmarks.scenarios import generate_world
+from src.entities.entity import Entity
+from src.entities.entity_manager import EntityManager
+
+
+def boxes_hit_walls_reference(world, xs, ys, radii):
+    tile_size = world.map_grid_size
+    hits = []
+    for x, y, radius in zip(xs.tolist(), ys.tolist(), radii.tolist()):
+        hit = False
+        for tile_y in range(int((y - radius) // tile_size), int((y + radius) // tile_size) + 1):
+            for tile_x in range(int((x - radius) // tile_size), int((x + radius) // tile_size) + 1):
+                if not (0 <= tile_x < world.map_grid_size_x and 0 <= tile_y < world.map_grid_size_y):
+                    hit = True
+                elif world.map_grid_walls.get(tile_x, tile_y) != 0:
+                    hit = True
+        hits.append(hit)
+    return np.array(hits)
+
+
+def test_boxes_hit_walls_checks_every_spanned_tile():
+    world = generate_world(32, density=0.2)
+    manager = EntityManager(world)
+    rng = np.random.default_rng(0)
+
+    # Mostly small boxes with a few wider than several tiles
+    xs, ys = rng.uniform(-50, 32 * 64 + 50, (2, 3000))
+    radii = np.where(rng.random(3000) < 0.02, rng.uniform(64, 200, 3000), rng.uniform(0, 30, 3000))
+
+    np.testing.assert_array_equal(manager._boxes_hit_walls(xs, ys, radii),
+                                  boxes_hit_walls_reference(world, xs, ys, radii))
+
+
+def test_batch_queries_match_single_queries():
+    world = generate_world(64)
+    manager = EntityManager(world)
+    rng = np.random.default_rng(1)
+    for i, (x, y) in enumerate(rng.uniform(0, 64 * 64, (400, 2)).tolist()):
+        manager.spawn(Entity(x, y, kind='npc' if i % 2 else 'pickup'))
+
+    xs, ys = rng.uniform(0, 64 * 64, (2, 50))
+    for x, y, found in zip(xs.tolist(), ys.tolist(), manager.in_radius_batch(xs, ys, 300, kind='npc')):
+        assert {entity.id for entity in found} == {entity.id for entity in manager.in_radius(x, y, 300, kind='npc')}
+
+    for x, y, found in zip(xs.tolist(), ys.tolist(), manager.nearest_batch(xs, ys, kind='pickup')):
+        assert found[0] is manager.nearest(x, y, kind='pickup')[0]
@@ -0,0 +1,63 @@
+# /tests/test_image_io.py
+
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from src.exceptions.image_exceptions import ImageFormatError
+from src.utils.image_io import PNG_SIGNATURE, encode_png, encode_ppm, read_image, _png_chunk
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (5, 7, 3), dtype=np.uint8)
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_png_and_ppm_round_trip(tmp_path, image):
+    np.testing.assert_array_equal(read_image(write(tmp_path, 'a.png', encode_png(image))), image)
+    np.testing.assert_array_equal(read_image(write(tmp_path, 'a.ppm', encode_ppm(image))), image)
+
+
+@pytest.mark.parametrize('data', [
+    b'P6\n7 5\n255\n' + bytes(10),  # Fewer pixels than the header
+    b'P6\n7 5',  # Header cut short
+    b'P6\n# comment without an end',
+    b'P6\n7 x\n255\n',
+    b'P6\n7 5\n0\n' + bytes(105),
+    b'P3\n1 1\n255\n1 2 x\n',
+])
+def test_truncated_or_corrupt_ppm(tmp_path, data):
+    with pytest.raises(ImageFormatError):
+        read_image(write(tmp_path, 'bad.ppm', data))
+
+
+def test_truncated_png(tmp_path, image):
+    data = encode_png(image)
+    for size in range(len(PNG_SIGNATURE) + 1, len(data) - 12):  # Every cut before the IEND chunk
+        with pytest.raises(ImageFormatError):
+            read_image(write(tmp_path, 'cut.png', data[:size]))
+
+
+def test_corrupt_png(tmp_path, image):
+    header = _png_chunk(b'IHDR', struct.pack('>IIBBBBB', 7, 5, 8, 2, 0, 0, 0))
+    rows = np.zeros((5, 7 * 3 + 1), dtype=np.uint8).tobytes()
+    end = _png_chunk(b'IEND', b'')
+
+    corrupt = {
+        'short_header': PNG_SIGNATURE + _png_chunk(b'IHDR', b'\x00' * 5) + end,
+        'bad_zlib': PNG_SIGNATURE + header + _png_chunk(b'IDAT', b'not zlib data') + end,
+        'no_data': PNG_SIGNATURE + header + end,
+        'short_data': PNG_SIGNATURE + header + _png_chunk(b'IDAT', zlib.compress(rows[:-4])) + end,
+        'long_data': PNG_SIGNATURE + header + _png_chunk(b'IDAT', zlib.compress(rows + bytes(3))) + end,
+    }
+    for name, data in corrupt.items():
+        with pytest.raises(ImageFormatError):
+            read_image(write(tmp_path, f'{name}.png', data))
@@ -0,0 +1,35 @@
+# /tests/test_occupancy_pyramid.py
+
+import numpy as np
+
+from benchmarks.scenarios import generate_world
+from src.models.world import World
+from src.renderer.occupancy_pyramid import OccupancyPyramid, pyramid_for
+
+
+def open_world(size):
+    walls = np.zeros((size, size), dtype=np.uint8)
+    walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = 1
+    return World(size, size, 64, walls)
+
+
+def test_pyramid_follows_the_world_until_closed():
+    world = open_world(64)
+    pyramid = OccupancyPyramid(world)
+    assert pyramid.empty_level(20, 20) > 0
+
+    world.update_wall_at_position(20, 20, 1)
+    assert pyramid.levels[0][10, 10]
+
+    pyramid.close()
+    world.update_wall_at_position(20, 20, 0)
+    world.update_wall_at_position(40, 40, 1)
+    assert pyramid.levels[0][10, 10] and not pyramid.levels[0][20, 20]
+
+
+def test_pyramid_only_for_large_open_worlds():
+    assert pyramid_for(World()) is None
+    assert pyramid_for(open_world(32)) is None
+    assert pyramid_for(generate_world(256, density=0.08)) is None
+    assert isinstance(pyramid_for(open_world(256)), OccupancyPyramid)
+    assert isinstance(pyramid_for(generate_world(1024, density=0.005)), OccupancyPyramid)
@@ -0,0 +1,46 @@
+# /tests/test_ray_cache.py
+
+import math
+
+import numpy as np
+
+from benchmarks.scenarios import generate_world
+from src.renderer.batch_raycaster import raycast_columns
+from src.renderer.ray_cache import RayCache, CACHE_HIT, CACHE_MISS, CACHE_ROTATED, RESULT_FIELDS
+
+
+def assert_same_result(result, expected):
+    for field in RESULT_FIELDS:
+        np.testing.assert_allclose(getattr(result, field), getattr(expected, field), rtol=1e-9, atol=1e-9)
+
+
+def test_snapped_rotations_match_a_cast_at_the_cast_angle():
+    world = generate_world(64)
+    num_columns = 60
+    column_step = math.radians(60) / num_columns
+    cache = RayCache(world, num_columns=num_columns, fov=60, rotation_tolerance=column_step / 2)
+
+    x, y = 32 * 64 + 32, 32 * 64 + 32
+    statuses = set()
+    angle = 0.3
+    for _ in range(40):
+        angle += column_step * 0.37
+        result = cache.cast(angle, x, y)
+        statuses.add(cache.status)
+
+        # Whatever was reused, the result is the one of the angle the renderer is told to draw at
+        assert abs(math.remainder(cache.cast_angle - angle, 2 * math.pi)) <= column_step / 2 + 1e-12
+        assert_same_result(result, raycast_columns(cache.cast_angle, x, y, world, num_columns=num_columns, fov=60))
+
+    assert statuses == {CACHE_MISS, CACHE_HIT, CACHE_ROTATED}
+
+
+def test_exact_tolerance_only_reuses_whole_columns():
+    world = generate_world(64)
+    cache = RayCache(world, num_columns=60, fov=60)
+    x, y = 32 * 64 + 32, 32 * 64 + 32
+
+    cache.cast(0.3, x, y)
+    cache.cast(0.3 + math.radians(60) / 60 * 0.5, x, y)
+    assert cache.status == CACHE_MISS
+    assert cache.cast_angle == 0.3 + math.radians(60) / 60 * 0.5
@@ -0,0 +1,48 @@
+# /tests/test_software_renderer.py
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.scenarios import generate_world, camera_path
+from src.renderer.software_renderer import SoftwareRenderer
+
+
+def make_renderer(world, num_columns=480, column_width=1, height=400, columns=None):
+    player = SimpleNamespace(FOV=60, angle=0.0, x=0.0, y=0.0)
+    renderer = SoftwareRenderer(SimpleNamespace(player=player, world=world), height=height,
+                                column_width=column_width, num_columns=num_columns, columns=columns)
+    return renderer, player
+
+
+@pytest.mark.parametrize('map_size', [8, 128])
+def test_skipped_floor_rows_are_covered_by_walls(map_size):
+    world = generate_world(map_size)
+    renderer, player = make_renderer(world)
+
+    for angle, x, y in camera_path(world, 40):
+        player.angle, player.x, player.y = angle, x, y
+        result = renderer.cast_rays()
+
+        skipped = renderer.render(result).copy()
+
+        # Without a result every floor and ceiling row is cast
+        renderer.draw_background(None)
+        renderer.draw_world_3d(result)
+        renderer.draw_sprites()
+
+        np.testing.assert_array_equal(skipped, renderer.frame)
+
+
+def test_strips_match_the_full_view():
+    world = generate_world(128)
+    full, player = make_renderer(world)
+    strips = [make_renderer(world, columns=columns)[0] for columns in ((0, 160), (160, 320), (320, 480))]
+    for strip in strips:
+        strip.controller.player = player
+
+    for angle, x, y in camera_path(world, 20):
+        player.angle, player.x, player.y = angle, x, y
+        frame = full.render()
+        np.testing.assert_array_equal(np.concatenate([strip.render() for strip in strips], axis=1), frame)
@@ -0,0 +1,59 @@
+# /tests/test_spatial_hash.py
+
+import math
+
+import numpy as np
+import pytest
+
+from src.models.spatial_hash import SpatialHash
+
+
+def random_hash(count, extent, cell_size=64, seed=0):
+    rng = np.random.default_rng(seed)
+    spatial_hash = SpatialHash(cell_size)
+    for item_id, (x, y) in enumerate(rng.uniform(-extent / 4, extent, (count, 2)).tolist()):
+        spatial_hash.insert(item_id, x, y)
+    return spatial_hash, rng
+
+
+@pytest.mark.parametrize('count, extent, radius', [(500, 2000, 100), (500, 2000, 700), (20, 50000, 300)])
+def test_query_radius_batch_matches_query_radius(count, extent, radius):
+    spatial_hash, rng = random_hash(count, extent)
+    xs, ys = rng.uniform(-extent / 2, extent * 1.2, (2, 200))
+
+    batch = spatial_hash.query_radius_batch(xs, ys, radius)
+    assert len(batch) == len(xs)
+    for x, y, found in zip(xs.tolist(), ys.tolist(), batch):
+        assert sorted(found) == sorted(spatial_hash.query_radius(x, y, radius))
+
+
+@pytest.mark.parametrize('count, extent, max_distance', [(500, 2000, math.inf), (500, 2000, 150), (5, 50000, math.inf)])
+def test_nearest_batch_matches_nearest(count, extent, max_distance):
+    spatial_hash, rng = random_hash(count, extent)
+    xs, ys = rng.uniform(-extent / 2, extent * 1.2, (2, 200))
+
+    for predicate in (None, lambda item_id: item_id % 3 == 0):
+        batch = spatial_hash.nearest_batch(xs, ys, max_distance, predicate)
+        for x, y, found in zip(xs.tolist(), ys.tolist(), batch):
+            expected = spatial_hash.nearest(x, y, max_distance, predicate)
+            if expected is None:
+                assert found is None
+            else:
+                assert found[0] == expected[0]
+                assert found[1] == pytest.approx(expected[1])
+
+
+def test_batch_queries_follow_moves_and_removals():
+    spatial_hash = SpatialHash(64)
+    spatial_hash.insert(1, 10, 10)
+    spatial_hash.insert(2, 500, 500)
+    assert spatial_hash.nearest_batch([0], [0]) == [(1, pytest.approx(math.hypot(10, 10)))]
+
+    spatial_hash.move(2, 5, 0)
+    assert spatial_hash.nearest_batch([0], [0])[0][0] == 2
+    assert sorted(spatial_hash.query_radius_batch([0], [0], 20)[0]) == [1, 2]
+
+    spatial_hash.remove(2)
+    spatial_hash.remove(1)
+    assert spatial_hash.nearest_batch([0, 1], [0, 1]) == [None, None]
+    assert spatial_hash.query_radius_batch([0], [0], 20) == [[]]